@@ -0,0 +1,123 @@
+"""Running aggregates behind /data-summary.
+
+The distributions, confusion-matrix cells and recent submissions are seeded
+once from the stored history and then updated with the rows committed since,
+so answering /data-summary does not depend on how much history is stored.
+"""
+import math
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+EVAL_COLUMNS = ["teamwork_preference", "introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"]
+# Prediction recorded for rows that cannot be evaluated (missing target or features)
+NOT_EVALUATED = -1
+
+
+def _key(value):
+    # Survey scales are integers; report them as such whatever dtype they were read with
+    value = value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _missing(value):
+    return value is None or (isinstance(value, (float, np.floating)) and math.isnan(value))
+
+
+def _counts(values):
+    keys, counts = np.unique(values[~np.isnan(values)], return_counts=True)
+    return Counter({_key(key): count for key, count in zip(keys.tolist(), counts.tolist())})
+
+
+def confusion_cells(teamwork_preference, predictions):
+    """2x2 confusion matrix (actual x predicted) over the evaluated rows."""
+    evaluated = predictions != NOT_EVALUATED
+    actual = np.asarray(teamwork_preference, dtype=float)[evaluated] >= 4
+    cells = np.bincount(2 * actual.astype(int) + predictions[evaluated].astype(int), minlength=4)
+    return [[int(cells[0]), int(cells[1])], [int(cells[2]), int(cells[3])]]
+
+
+def tail_rows(history, n):
+    """The last ``n`` rows of a column mapping, as row dicts."""
+    total = len(next(iter(history.values())))
+    return [{column: values[i] for column, values in history.items()} for i in range(max(0, total - n), total)]
+
+
+def _preference(teamwork_preference):
+    return "Team" if not _missing(teamwork_preference) and teamwork_preference >= 4 else "Solo"
+
+
+class SummaryAggregates:
+    def __init__(self, columns, recent=5):
+        self.columns = list(columns)
+        self.lock = threading.RLock()
+        self.model_version = None
+        self.rows = 0
+        self.preference = Counter()
+        self.introversion = Counter()
+        self.risk_taking = Counter()
+        # confusion[actual][predicted], 0 = Solo and 1 = Team
+        self.confusion = [[0, 0], [0, 0]]
+        self.recent = deque(maxlen=recent)
+
+    def seed(self, history, recent_rows, predictions, model_version):
+        """Recompute every counter from scratch.
+
+        ``history`` maps the EVAL_COLUMNS to arrays covering every stored row,
+        ``predictions`` holds the model's prediction per row (see
+        prediction_cache.predict_history) and ``recent_rows`` are the last
+        stored rows as column -> value dicts.
+        """
+        teamwork = np.asarray(history["teamwork_preference"], dtype=float)
+        intro = np.asarray(history["introversion_extraversion"], dtype=float)
+        risk = np.asarray(history["risk_taking"], dtype=float)
+        team = teamwork >= 4
+        confusion = confusion_cells(teamwork, predictions)
+
+        with self.lock:
+            self.model_version = model_version
+            self.rows = len(teamwork)
+            # Only categories that occur are reported, as value_counts() did
+            self.preference = +Counter({"Team": int(team.sum()), "Solo": int((~team).sum())})
+            self.introversion = _counts(intro)
+            self.risk_taking = _counts(risk)
+            self.confusion = confusion
+            self.recent.clear()
+            for row in recent_rows:
+                self._push_recent(row)
+
+    def _push_recent(self, row):
+        record = {column: (None if _missing(row.get(column)) else _key(row.get(column))) for column in self.columns}
+        record["preference"] = _preference(record.get("teamwork_preference"))
+        self.recent.append(record)
+
+    def update(self, rows, predictions):
+        """Account for newly stored rows and the model's predictions for them."""
+        with self.lock:
+            for row, prediction in zip(rows, predictions):
+                self.rows += 1
+                teamwork = row.get("teamwork_preference")
+                self.preference[_preference(teamwork)] += 1
+                if not _missing(row.get("introversion_extraversion")):
+                    self.introversion[_key(row["introversion_extraversion"])] += 1
+                if not _missing(row.get("risk_taking")):
+                    self.risk_taking[_key(row["risk_taking"])] += 1
+                if not any(_missing(row.get(column)) for column in EVAL_COLUMNS):
+                    self.confusion[int(teamwork >= 4)][int(prediction == 1)] += 1
+                self._push_recent(row)
+
+    def snapshot(self):
+        with self.lock:
+            evaluated = sum(map(sum, self.confusion))
+            correct = self.confusion[0][0] + self.confusion[1][1]
+            return {
+                "preference_distribution": dict(self.preference.most_common()),
+                "introversion_distribution": dict(self.introversion.most_common()),
+                "risk_taking_distribution": dict(self.risk_taking.most_common()),
+                "recent_submissions": list(self.recent),
+                "accuracy": correct / evaluated if evaluated else 0,
+                "confusion_matrix": [list(row) for row in self.confusion],
+            }
@@ -0,0 +1,88 @@
+"""Micro-batching of concurrent single-row /predict calls.
+
+A burst of form submissions (a whole lecture hall at once) would otherwise pay
+the per-call overhead of the sklearn Pipeline once per request. The coalescer
+holds each record for at most ``window_ms`` or until ``max_batch`` records are
+waiting, scores the group with one vectorized ``scorer.score`` call and hands
+each request its own row of the result.
+
+Everything but the scoring itself runs on the event loop, so no locks are
+needed. Records are grouped by scorer, so a model swap in the middle of a
+window never scores a request with a model it did not start with.
+"""
+import asyncio
+
+from metrics import timed
+from scoring import records_to_columns
+
+
+class PredictionCoalescer:
+    def __init__(self, run, window_ms=2.0, max_batch=64):
+        # run(fn, *args) awaits fn(*args) off the event loop (e.g. executors.run_inference)
+        self.run = run
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self._pending = []
+        self._timer = None
+        # The event loop only keeps weak references to tasks; batches in flight are held here
+        self._tasks = set()
+
+    async def score_one(self, scorer, record):
+        """Same result as ``scorer.score_one(record)``, scored together with concurrent calls."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((scorer, record, future))
+        self.requests += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        groups = {}
+        for scorer, record, future in pending:
+            groups.setdefault(id(scorer), (scorer, []))[1].append((record, future))
+        for scorer, group in groups.values():
+            task = asyncio.ensure_future(self._score(scorer, group))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, scorer, group):
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(group))
+        try:
+            labels, proba = await self.run(_score_records, scorer, [record for record, _ in group])
+        except Exception as e:
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for i, (_, future) in enumerate(group):
+            # A client that disconnected has already cancelled its future
+            if not future.done():
+                future.set_result((labels[i], float(proba[i, 0]), float(proba[i, 1])))
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "waiting": len(self._pending),
+        }
+
+
+def _score_records(scorer, records):
+    with timed("frame"):
+        columns = records_to_columns(records)
+    return scorer.score(columns)
@@ -0,0 +1,638 @@
+"""Columnar submission store: memory-mapped NumPy segments plus a tail buffer.
+
+Layout of a store directory::
+
+    schema.json          column names, kinds (integer/float/text) and storage dtypes
+    dictionary/NNN.txt   values of text column NNN, one JSON string per line;
+                         segments store int32 codes into it (-1 = missing)
+    manifest.json        names of the sealed segments (the commit point)
+    segments/NNNNNN/     one NNN.npy per column plus meta.json (row count and
+                         timestamp range, used to skip segments in queries)
+    tail.csv             rows appended since the last segment was sealed
+
+Numbers and codes are read straight from the memory-mapped segments, so
+aggregations, evaluation and training do not parse text. Appends go to the
+tail, which is sealed into an immutable segment once it holds
+``segment_rows`` rows.
+
+Several processes may share a store (the backend and the Streamlit app).
+Every commit, seal and read snapshot holds an exclusive ``flock`` on
+``store.lock`` and first picks up the rows, segments and dictionary values
+the other processes wrote. New dictionary values are written with the commit
+that introduces them, so a code means the same value in every process.
+"""
+import contextlib
+import csv
+import hashlib
+import io
+import json
+import math
+import os
+import shutil
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from store import GroupCommitStore
+from submissions import QUERY_COLUMNS, output_record, timestamp_range
+
+INTEGER, FLOAT, TEXT = "integer", "float", "text"
+# Small-integer model columns fit float32 exactly and halve the mapped bytes
+FLOAT32_COLUMNS = {"introversion_extraversion", "risk_taking", "teamwork_preference", "weekly_hobby_hours"}
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except ValueError:
+        return math.nan
+
+
+class _Dictionary:
+    """Append-only value dictionary of one text column."""
+
+    def __init__(self, path):
+        self.path = path
+        self.values = []
+        self.codes = {}
+        self.persisted = 0
+        # Bytes of the file read or written so far
+        self._offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """Read the values other processes appended; call with everything persisted and the store locked."""
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        for line in data.splitlines(keepends=True):
+            try:
+                value = json.loads(line) if line.endswith(b"\n") else None
+            except ValueError:
+                value = None
+            if value is None:
+                # Torn final line from an interrupted write; later values are appended in its place
+                os.truncate(self.path, self._offset)
+                break
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+            self._offset += len(line)
+        self.persisted = len(self.values)
+
+    def code(self, value):
+        if value is None or value == "":
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def persist(self, sync=True):
+        if self.persisted == len(self.values):
+            return
+        data = "".join(json.dumps(value) + "\n" for value in self.values[self.persisted:]).encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+        self.persisted = len(self.values)
+        self._offset += len(data)
+
+
+def _timestamp_range(columns, dictionaries, arrays):
+    """[min, max] well-formed timestamp of a segment, from its distinct codes."""
+    if "timestamp" not in columns or columns.index("timestamp") not in dictionaries:
+        return [None, None]
+    index = columns.index("timestamp")
+    values = dictionaries[index].values
+    return list(timestamp_range(values[code] for code in np.unique(arrays[index]) if code >= 0))
+
+
+def _write_segment(path, name, arrays, meta):
+    directory = os.path.join(path, "segments", name)
+    os.makedirs(directory, exist_ok=True)
+    for index, values in enumerate(arrays):
+        np.save(os.path.join(directory, f"{index:03d}.npy"), values)
+    _write_json(os.path.join(directory, "meta.json"), meta)
+
+
+class ColumnarSubmissionStore(GroupCommitStore):
+    format = "columnar"
+
+    def __init__(self, path, commit_rows=256, commit_ms=5.0, segment_rows=65536):
+        super().__init__(commit_rows, commit_ms)
+        self.path = path
+        self.segment_rows = segment_rows
+
+        schema = _read_json(os.path.join(path, "schema.json"))
+        self.columns = schema["columns"]
+        self.kinds = schema["kinds"]
+        self.dtypes = [np.dtype(dtype) for dtype in schema["dtypes"]]
+        # Timestamp range per segment; stores written before ranges were recorded compute them on first use
+        self._segment_ranges = {}
+
+        # Readers snapshot segments and tail under this lock; sealed segments are immutable.
+        # It is always taken before the inter-process lock, which threads of one process share.
+        self._data_lock = threading.Lock()
+        self._lock_file = open(os.path.join(path, "store.lock"), "a")
+        self._tail_path = os.path.join(path, "tail.csv")
+        self._tail_file = open(self._tail_path, "a", newline="")
+        with self._data_lock, self._locked():
+            self.dictionaries = {
+                index: _Dictionary(os.path.join(path, "dictionary", f"{index:03d}.txt"))
+                for index, kind in enumerate(self.kinds) if kind == TEXT
+            }
+            self.segments = []
+            self.segment_sizes = []
+            self._tail = [[] for _ in self.columns]
+            self._tail_offset = 0
+            self._manifest_identity = None
+            self.row_count = 0
+            self._catch_up()
+        self._start_writer()
+
+    @property
+    def tail_rows(self):
+        return len(self._tail[0]) if self._tail else 0
+
+    def _segment_meta(self, name):
+        return _read_json(os.path.join(self.path, "segments", name, "meta.json"))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the exclusive inter-process lock on the store."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Pick up what other processes committed since this one last looked; call under both locks."""
+        stored = sum(self.segment_sizes) + self.tail_rows
+        for dictionary in self.dictionaries.values():
+            dictionary.refresh()
+        # The manifest is replaced (never rewritten in place) on every seal
+        manifest = os.stat(os.path.join(self.path, "manifest.json"))
+        identity = (manifest.st_ino, manifest.st_mtime_ns, manifest.st_size)
+        segments = self.segments
+        if identity != self._manifest_identity:
+            segments = _read_json(os.path.join(self.path, "manifest.json"))["segments"]
+            self._manifest_identity = identity
+        if segments != self.segments:
+            # Whoever sealed held every tail row, this process's included
+            for name in segments[len(self.segments):]:
+                self.segments.append(name)
+                self.segment_sizes.append(self._segment_meta(name)["rows"])
+            self._tail = [[] for _ in self.columns]
+            self._tail_offset = 0
+            self._drop_sealed_tail()
+        for row in self._read_tail():
+            self._push_tail(row)
+        # Values only a crashed writer's rows used are coded here; share them before the lock is released
+        for dictionary in self.dictionaries.values():
+            dictionary.persist(sync=False)
+        added = sum(self.segment_sizes) + self.tail_rows - stored
+        if added:
+            # row_count also counts rows still queued in this process
+            with self._cond:
+                self.row_count += added
+
+    def _drop_sealed_tail(self):
+        if not self.segments:
+            return
+        with open(self._tail_path, "rb") as f:
+            data = f.read()
+        # A seal that crashed before truncating the tail leaves the sealed rows behind
+        meta = self._segment_meta(self.segments[-1])
+        source = data[:meta["source_bytes"]]
+        if meta["source_bytes"] and len(source) == meta["source_bytes"] and \
+                hashlib.sha1(source).hexdigest() == meta["source_sha1"]:
+            with open(self._tail_path, "wb") as f:
+                f.write(data[meta["source_bytes"]:])
+
+    def _read_tail(self):
+        """Complete rows appended to the tail (by any process) since this one last read it."""
+        if os.path.getsize(self._tail_path) == self._tail_offset:
+            return []
+        with open(self._tail_path, "rb") as f:
+            f.seek(self._tail_offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # A partial row from a process that died mid-write; new rows are appended in its place
+            os.truncate(self._tail_path, self._tail_offset + end)
+        self._tail_offset += end
+        return list(csv.reader(io.StringIO(data[:end].decode("utf-8"))))
+
+    def _push_tail(self, row):
+        for index, value in enumerate(row):
+            if index in self.dictionaries:
+                self._tail[index].append(self.dictionaries[index].code(value))
+            else:
+                self._tail[index].append(_to_float(value))
+
+    def _write(self, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        data = buffer.getvalue()
+        with self._data_lock, self._locked():
+            self._catch_up()
+            self._tail_file.write(data)
+            self._tail_file.flush()
+            self._tail_offset += len(data.encode("utf-8"))
+            for row in batch:
+                self._push_tail(["" if value is None else str(value) for value in row])
+            # New values go out with the rows that use them; the seal syncs them
+            for dictionary in self.dictionaries.values():
+                dictionary.persist(sync=False)
+            if self.tail_rows >= self.segment_rows:
+                self._seal()
+
+    def _seal(self):
+        """Turn the tail into a new immutable segment and start an empty tail."""
+        with open(self._tail_path, "rb") as f:
+            source = f.read()
+        name = f"{len(self.segments):06d}"
+        arrays = [np.asarray(values, dtype=dtype) for values, dtype in zip(self._tail, self.dtypes)]
+        _write_segment(self.path, name, arrays, {
+            "rows": self.tail_rows,
+            "timestamps": _timestamp_range(self.columns, self.dictionaries, arrays),
+            "source_bytes": len(source),
+            "source_sha1": hashlib.sha1(source).hexdigest(),
+        })
+        for dictionary in self.dictionaries.values():
+            dictionary.persist()
+        _write_json(os.path.join(self.path, "manifest.json"), {"segments": self.segments + [name]})
+
+        self.segments.append(name)
+        self.segment_sizes.append(self.tail_rows)
+        # The append handles of other processes keep writing at the (new) end
+        os.truncate(self._tail_path, 0)
+        self._tail_offset = 0
+        self._tail = [[] for _ in self.columns]
+
+    def _close_files(self):
+        self._tail_file.close()
+        self._lock_file.close()
+
+    def _snapshot(self, indexes):
+        """Segment names plus copies of the requested tail columns."""
+        self.flush()
+        with self._data_lock, self._locked():
+            self._catch_up()
+            tail = {index: np.asarray(self._tail[index], dtype=self.dtypes[index]) for index in indexes}
+            return list(self.segments), tail
+
+    def _indexes(self, columns):
+        if columns is None:
+            return list(range(len(self.columns)))
+        positions = {column: index for index, column in enumerate(self.columns)}
+        return [positions[column] for column in columns]
+
+    def iter_segments(self, columns=None):
+        """Yield column -> raw array mappings per segment (memory-mapped) and for the tail.
+
+        Numbers are float arrays with NaN for missing values; text columns are
+        int32 codes into ``self.dictionaries[index].values`` with -1 for missing.
+        """
+        indexes = self._indexes(columns)
+        segments, tail = self._snapshot(indexes)
+        for name in segments:
+            directory = os.path.join(self.path, "segments", name)
+            yield {self.columns[index]: np.load(os.path.join(directory, f"{index:03d}.npy"), mmap_mode="r")
+                   for index in indexes}
+        if len(next(iter(tail.values()), ())):
+            yield {self.columns[index]: values for index, values in tail.items()}
+
+    def _decode(self, index, codes):
+        values = np.asarray(self.dictionaries[index].values + [None], dtype=object)
+        # Code -1 picks the trailing None
+        return values[codes]
+
+    def read_columns(self, columns=None, rows=None):
+        """Plain NumPy columns, as loader.to_columns returns them."""
+        return self._read(columns, 0, rows)[0]
+
+    def follow(self, columns=None, position=None):
+        """Plain NumPy columns of the rows committed past row ``position``, and the position after them.
+
+        See CsvSubmissionStore.follow; only the segments holding those rows are read.
+        """
+        return self._read(columns, position or 0, None)
+
+    def _read(self, columns, start, rows):
+        indexes = self._indexes(columns)
+        segments, tail = self._snapshot(indexes)
+        parts = {index: [] for index in indexes}
+        first = 0
+        for name, size in zip(segments, self.segment_sizes):
+            if first + size > start:
+                directory = os.path.join(self.path, "segments", name)
+                for index in indexes:
+                    values = np.load(os.path.join(directory, f"{index:03d}.npy"), mmap_mode="r")
+                    parts[index].append(values[max(start - first, 0):])
+            first += size
+        for index in indexes:
+            parts[index].append(tail[index][max(start - first, 0):])
+        end = first + len(tail[indexes[0]]) if indexes else first
+        result = {}
+        for index in indexes:
+            values = np.concatenate(parts[index])
+            values = values[:rows] if rows is not None else values
+            if index in self.dictionaries:
+                result[self.columns[index]] = self._decode(index, values)
+            else:
+                result[self.columns[index]] = values.astype("float64")
+        return result, end
+
+    def _frame(self, chunk):
+        import pandas as pd
+        from loader import COMPACT_DTYPES
+
+        data = {}
+        for column, values in chunk.items():
+            index = self.columns.index(column)
+            if index in self.dictionaries:
+                categories = self.dictionaries[index].values[:int(values.max(initial=-1)) + 1]
+                data[column] = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+            elif self.kinds[index] == INTEGER:
+                mask = np.isnan(values)
+                dtype = COMPACT_DTYPES.get(column, "Int64")
+                dtype = dtype if dtype.startswith("Int") else "Int64"
+                integers = np.where(mask, 0, values).astype(dtype.lower())
+                data[column] = pd.arrays.IntegerArray(integers, mask)
+            else:
+                data[column] = np.asarray(values, dtype="float64")
+        return pd.DataFrame(data, columns=list(chunk))
+
+    def read_frame(self, columns=None, rows=None, chunksize=None):
+        """Load the history as a DataFrame with compact dtypes.
+
+        ``columns`` defaults to the projected model columns. With ``chunksize``
+        an iterator of per-segment frames is returned.
+        """
+        import pandas as pd
+        from loader import PROJECTED_COLUMNS
+
+        columns = list(columns or PROJECTED_COLUMNS)
+        if chunksize:
+            return (self._frame(chunk) for chunk in self.iter_segments(columns))
+        chunks = [self._frame(chunk) for chunk in self.iter_segments(columns)]
+        if not chunks:
+            return self._frame({column: np.empty(0, self.dtypes[self.columns.index(column)]) for column in columns})
+        frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+        for column in columns:
+            index = self.columns.index(column)
+            if index in self.dictionaries and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype("category")
+        return frame.iloc[:rows] if rows is not None else frame
+
+    def _segment_range(self, name, arrays):
+        if name not in self._segment_ranges:
+            meta = self._segment_meta(name)
+            if "timestamps" not in meta:
+                meta["timestamps"] = _timestamp_range(self.columns, self.dictionaries, arrays)
+            self._segment_ranges[name] = tuple(meta["timestamps"])
+        return self._segment_ranges[name]
+
+    def _text(self, index, code):
+        code = int(code)
+        return self.dictionaries[index].values[code] if code >= 0 else None
+
+    def query(self, query, cursor=0, limit=100):
+        """One page of stored rows matching ``query`` (a submissions.SubmissionQuery).
+
+        Returns (records, next cursor or None). Segments whose timestamp
+        range cannot match are skipped without being mapped; within a
+        segment, the club and preference filters are evaluated on the
+        columns directly.
+        """
+        indexes = self._indexes(QUERY_COLUMNS)
+        timestamp, club, preference = (indexes[QUERY_COLUMNS.index(column)]
+                                       for column in ("timestamp", "club_top1", "teamwork_preference"))
+        segments, tail = self._snapshot(indexes)
+        parts = list(zip(segments, self.segment_sizes)) + [(None, len(tail[timestamp]))]
+        total = sum(size for _, size in parts)
+
+        results = []
+        start = 0
+        for name, size in parts:
+            end = start + size
+            if end <= cursor or size == 0:
+                start = end
+                continue
+            if name is None:
+                arrays = tail
+            else:
+                directory = os.path.join(self.path, "segments", name)
+                arrays = {index: np.load(os.path.join(directory, f"{index:03d}.npy"), mmap_mode="r")
+                          for index in indexes}
+            if query.timed:
+                if name is None:
+                    low, high = timestamp_range(self._text(timestamp, code) for code in np.unique(arrays[timestamp]))
+                else:
+                    low, high = self._segment_range(name, arrays)
+                if not query.may_match_range(low, high):
+                    start = end
+                    continue
+
+            first = max(0, cursor - start)
+            mask = np.ones(size - first, dtype=bool)
+            if query.club is not None:
+                code = self.dictionaries[club].codes.get(query.club, -2) if club in self.dictionaries else -2
+                mask &= np.asarray(arrays[club][first:]) == code
+            if query.preference is not None:
+                team = np.asarray(arrays[preference][first:], dtype=float) >= 4
+                mask &= team if query.preference == "Team" else ~team
+
+            for offset in np.flatnonzero(mask):
+                position = first + int(offset)
+                record = {
+                    column: self._text(index, arrays[index][position]) if index in self.dictionaries
+                    else float(arrays[index][position])
+                    for column, index in zip(QUERY_COLUMNS, indexes)
+                }
+                if query.matches_time(record["timestamp"]):
+                    row = start + position
+                    results.append(output_record(row, record))
+                    if len(results) == limit:
+                        return results, row + 1 if row + 1 < total else None
+            start = end
+        return results, None
+
+    def export_csv(self, destination):
+        """Write the full history, in the newdata.csv layout, to ``destination``."""
+        with open(destination, "w", newline="") as f:
+            csv.writer(f).writerow(self.columns)
+            for chunk in self.iter_segments():
+                self._frame(chunk).to_csv(f, header=False, index=False)
+        return destination
+
+    def identity(self, end=None):
+        """The store directory and its first ``end`` rows (default: all); None if it holds fewer.
+
+        Stored rows never change and a rewritten store is a new directory, so
+        the schema and first segment identify the history's content.
+        """
+        with self._data_lock, self._locked():
+            self._catch_up()
+            stored = sum(self.segment_sizes) + self.tail_rows
+            first = self.segments[0] if self.segments else None
+        end = stored if end is None else end
+        if end > stored:
+            return None
+        digest = hashlib.sha256()
+        for part in [("schema.json",)] + ([("segments", first, "meta.json")] if first else []):
+            with open(os.path.join(self.path, *part), "rb") as f:
+                digest.update(f.read())
+        stat = os.stat(self.path)
+        return {"file": [stat.st_dev, stat.st_ino], "end": end, "prefix": digest.hexdigest()[:16]}
+
+    def stats(self):
+        stats = super().stats()
+        stats.update(segments=len(self.segments), tail_rows=self.tail_rows)
+        return stats
+
+
+def storage_dtype(column, kind):
+    if kind == TEXT:
+        return "int32"
+    return "float32" if column in FLOAT32_COLUMNS and kind == INTEGER else "float64"
+
+
+class StoreBuilder:
+    """Write a new store directory segment by segment, then move it into place."""
+
+    def __init__(self, path, columns, kinds):
+        if os.path.exists(path):
+            raise FileExistsError(f"Store directory already exists: {path}")
+        self.path = path
+        self.columns = list(columns)
+        self.kinds = list(kinds)
+        self.dtypes = [storage_dtype(column, kind) for column, kind in zip(self.columns, self.kinds)]
+        self.segments = []
+
+        self._tmp_path = path + ".building"
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(os.path.join(self._tmp_path, "dictionary"))
+        _write_json(os.path.join(self._tmp_path, "schema.json"),
+                    {"columns": self.columns, "kinds": self.kinds, "dtypes": self.dtypes})
+        self.dictionaries = {index: _Dictionary(os.path.join(self._tmp_path, "dictionary", f"{index:03d}.txt"))
+                             for index, kind in enumerate(self.kinds) if kind == TEXT}
+
+    def add_segment(self, arrays):
+        """Write one segment; text columns must already be codes from ``self.dictionaries``."""
+        arrays = [np.asarray(values, dtype=dtype) for values, dtype in zip(arrays, self.dtypes)]
+        name = f"{len(self.segments):06d}"
+        _write_segment(self._tmp_path, name, arrays, {
+            "rows": len(arrays[0]),
+            "timestamps": _timestamp_range(self.columns, self.dictionaries, arrays),
+            "source_bytes": 0,
+            "source_sha1": "",
+        })
+        self.segments.append(name)
+
+    def finish(self):
+        for dictionary in self.dictionaries.values():
+            dictionary.persist()
+        _write_json(os.path.join(self._tmp_path, "manifest.json"), {"segments": self.segments})
+        open(os.path.join(self._tmp_path, "tail.csv"), "w").close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+
+def migrate_csv(csv_path, store_path, segment_rows=65536, chunksize=100_000):
+    """One-shot conversion of a newdata.csv-style file into a columnar store."""
+    import pandas as pd
+
+    if os.path.exists(store_path):
+        raise FileExistsError(f"Store directory already exists: {store_path}")
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+
+    # First pass: decide each column's kind from every value in the file
+    kinds = [INTEGER] * len(columns)
+    for chunk in pd.read_csv(csv_path, dtype=object, chunksize=chunksize):
+        for index, column in enumerate(columns):
+            if kinds[index] == TEXT:
+                continue
+            present = chunk[column].dropna()
+            numbers = pd.to_numeric(present, errors="coerce")
+            if numbers.isna().any():
+                kinds[index] = TEXT
+            elif kinds[index] == INTEGER and not (numbers == numbers.round()).all():
+                kinds[index] = FLOAT
+
+    # Second pass: encode and write segments of segment_rows rows
+    builder = StoreBuilder(store_path, columns, kinds)
+
+    def flush_segment(frame):
+        arrays = []
+        for index, column in enumerate(columns):
+            if index in builder.dictionaries:
+                code = builder.dictionaries[index].code
+                arrays.append(np.fromiter((code(value) if isinstance(value, str) else -1 for value in frame[column]),
+                                          dtype=np.int32, count=len(frame)))
+            else:
+                arrays.append(pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=builder.dtypes[index]))
+        builder.add_segment(arrays)
+
+    pending = []
+    for chunk in pd.read_csv(csv_path, dtype=object, chunksize=chunksize):
+        pending.append(chunk)
+        buffered = pd.concat(pending, ignore_index=True)
+        while len(buffered) >= segment_rows:
+            flush_segment(buffered.iloc[:segment_rows])
+            buffered = buffered.iloc[segment_rows:].reset_index(drop=True)
+        pending = [buffered]
+    if pending and len(pending[0]):
+        flush_segment(pending[0])
+    return builder.finish()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Move submissions between newdata.csv and a columnar store.")
+    parser.add_argument("command", choices=["migrate", "export"],
+                        help="migrate: CSV -> columnar store; export: columnar store -> CSV")
+    parser.add_argument("--csv", default=os.path.join(backend_dir, "newdata.csv"))
+    parser.add_argument("--store-dir", default=os.path.join(backend_dir, "submissions"))
+    parser.add_argument("--segment-rows", type=int, default=65536)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate_csv(args.csv, args.store_dir, segment_rows=args.segment_rows)
+        print(f"Migrated {args.csv} to {args.store_dir}")
+    else:
+        store = ColumnarSubmissionStore(args.store_dir)
+        store.export_csv(args.csv)
+        store.close()
+        print(f"Exported {store.row_count} rows from {args.store_dir} to {args.csv}")
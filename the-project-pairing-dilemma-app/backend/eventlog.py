@@ -0,0 +1,98 @@
+"""Structured JSON-lines event log written off the request path.
+
+Handlers call ``log.event(...)`` / ``log.error(...)``, which only build a dict
+and put it on a bounded queue; a background thread serializes and writes the
+records. When the sink falls behind and the queue is full, records are dropped
+and counted instead of blocking the handler.
+
+High-volume events can be sampled (``sample_rates={"received": 0.01}``).
+Error events are never sampled, and the last ``error_reserve`` queue slots are
+kept for them so a flood of info events cannot crowd them out.
+"""
+import json
+import queue
+import random
+import sys
+import threading
+import time
+
+_STOP = object()
+
+
+class EventLogger:
+    def __init__(self, path=None, max_queue=10000, sample_rates=None, error_reserve=100):
+        self.path = path
+        self.max_queue = max_queue
+        self.sample_rates = dict(sample_rates or {})
+        self.written = 0
+        self.dropped = {"info": 0, "error": 0}
+        self.sampled_out = 0
+        self.write_errors = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(max_queue + error_reserve)
+        self._writer = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._writer.start()
+
+    def event(self, event, **fields):
+        rate = self.sample_rates.get(event, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            with self._lock:
+                self.sampled_out += 1
+            return
+        if self._queue.qsize() >= self.max_queue:
+            with self._lock:
+                self.dropped["info"] += 1
+            return
+        self._put("info", event, fields)
+
+    def error(self, event, **fields):
+        self._put("error", event, fields)
+
+    def _put(self, level, event, fields):
+        record = {"ts": time.time(), "level": level, "event": event, **fields}
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped[level] += 1
+
+    def _run(self):
+        sink = open(self.path, "a") if self.path else sys.stdout
+        try:
+            while True:
+                record = self._queue.get()
+                # Write everything already queued, then flush once
+                while record is not _STOP:
+                    try:
+                        sink.write(json.dumps(record, default=str) + "\n")
+                        self.written += 1
+                    except (OSError, ValueError):
+                        self.write_errors += 1
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                try:
+                    sink.flush()
+                except (OSError, ValueError):
+                    self.write_errors += 1
+                if record is _STOP:
+                    return
+        finally:
+            if sink is not sys.stdout:
+                sink.close()
+
+    def close(self):
+        """Write out everything queued and stop the writer."""
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "dropped": dict(self.dropped),
+                "sampled_out": self.sampled_out,
+                "write_errors": self.write_errors,
+            }
@@ -0,0 +1,137 @@
+"""Dedicated, separately sized executors for the async serving mode.
+
+Inference, file I/O and heavy evaluation each get their own pool so a slow
+/data-summary cannot starve /predict of workers. Every pool tracks how many
+tasks are in flight and how deep its queue is.
+"""
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+from profiling import traced
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool's queue is already at its configured bound."""
+
+
+class InstrumentedExecutor:
+    def __init__(self, name, executor, workers, max_queue=0):
+        self.name = name
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.peak_queue_depth = 0
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self):
+        return max(0, self.in_flight - self.workers)
+
+    def _enter(self):
+        with self._lock:
+            if self.max_queue and self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} pool queue is full ({self.max_queue} waiting)")
+            self.in_flight += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on this pool from the event loop."""
+        self._enter()
+        try:
+            call = functools.partial(fn, *args)
+            if isinstance(self.executor, ThreadPoolExecutor):
+                # Keep request-scoped context (e.g. profiling) in the worker thread
+                call = functools.partial(contextvars.copy_context().run, call)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+        finally:
+            self._exit()
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on this pool from synchronous code and wait for the result."""
+        self._enter()
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            self._exit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.queue_depth,
+                "peak_queue_depth": self.peak_queue_depth,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+class ServingExecutors:
+    """The inference, I/O and (optional) evaluation pools.
+
+    When ``enabled`` is false every call falls back to Starlette's shared
+    threadpool, which is how sync FastAPI handlers run.
+    """
+
+    def __init__(self, enabled=False, inference_workers=4, io_workers=4, evaluation_processes=0, max_queue=0):
+        self.enabled = enabled
+        self.inference = self.io = self.evaluation = None
+        if not enabled:
+            return
+        self.inference = InstrumentedExecutor(
+            "inference", ThreadPoolExecutor(inference_workers, thread_name_prefix="inference"),
+            inference_workers, max_queue)
+        self.io = InstrumentedExecutor(
+            "io", ThreadPoolExecutor(io_workers, thread_name_prefix="io"), io_workers, max_queue)
+        if evaluation_processes:
+            self.evaluation = InstrumentedExecutor(
+                "evaluation",
+                ProcessPoolExecutor(evaluation_processes, mp_context=multiprocessing.get_context("spawn")),
+                evaluation_processes)
+
+    async def run_inference(self, fn, *args):
+        fn = traced(fn)
+        if self.inference is None:
+            return await run_in_threadpool(fn, *args)
+        return await self.inference.run(fn, *args)
+
+    async def run_io(self, fn, *args):
+        fn = traced(fn)
+        if self.io is None:
+            return await run_in_threadpool(fn, *args)
+        return await self.io.run(fn, *args)
+
+    def evaluate(self, fn, *args):
+        """Run heavy, picklable evaluation work in the process pool if one is configured."""
+        if self.evaluation is None:
+            return fn(*args)
+        return self.evaluation.call(fn, *args)
+
+    def stats(self):
+        return {
+            "mode": "async" if self.enabled else "threadpool",
+            "pools": {pool.name: pool.stats() for pool in (self.inference, self.io, self.evaluation) if pool},
+        }
+
+    def shutdown(self):
+        for pool in (self.inference, self.io, self.evaluation):
+            if pool:
+                pool.shutdown()
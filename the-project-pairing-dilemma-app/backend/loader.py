@@ -0,0 +1,171 @@
+"""Column-projected, dtype-compact loading of survey data.
+
+The survey files carry 73 columns, but the model, dashboard and training
+only need the four features, the target and the timestamp. This loader reads
+just those columns, stores the 1-5 scales as nullable ``Int8``, hobby hours
+as ``Int16`` and the club as a categorical, and can stream large files in
+chunks.
+
+pandas is imported on first use, so the serving process can use the
+constants and ``scan_columns`` without loading it.
+"""
+import csv
+import math
+
+import numpy as np
+
+PROJECTED_COLUMNS = [
+    "timestamp",
+    "introversion_extraversion",
+    "risk_taking",
+    "club_top1",
+    "weekly_hobby_hours",
+    "teamwork_preference",
+]
+SCALE_COLUMNS = ["introversion_extraversion", "risk_taking", "teamwork_preference"]
+COMPACT_DTYPES = {
+    "timestamp": "object",
+    "introversion_extraversion": "Int8",
+    "risk_taking": "Int8",
+    "teamwork_preference": "Int8",
+    "weekly_hobby_hours": "Int16",
+    "club_top1": "category",
+}
+# What read_csv is asked for. The nullable integer dtypes parse far slower than
+# float64, so the scales are read as floats and narrowed by _compact.
+PARSE_DTYPES = {column: "float64" if dtype.startswith("Int") else dtype for column, dtype in COMPACT_DTYPES.items()}
+
+
+def read_header(path):
+    with open(path, newline="") as f:
+        return next(csv.reader(f))
+
+
+def _compact(frame):
+    """Narrow the parsed columns to the compact dtypes."""
+    import pandas as pd
+
+    pending = [column for column, dtype in COMPACT_DTYPES.items()
+               if column in frame and frame[column].dtype != dtype]
+    if not pending:
+        return frame
+    for column in pending:
+        dtype = COMPACT_DTYPES[column]
+        if dtype in ("Int8", "Int16"):
+            values = frame[column]
+            if not pd.api.types.is_float_dtype(values.dtype):
+                values = pd.to_numeric(values, errors="coerce")
+            values = values.to_numpy(dtype="float64", na_value=np.nan)
+            mask = np.isnan(values)
+            present = values[~mask]
+            limits = np.iinfo(dtype.lower())
+            # Fractional values (e.g. 2.5 hours) are kept as float32
+            if (present == np.round(present)).all() and ((present >= limits.min) & (present <= limits.max)).all():
+                frame[column] = pd.arrays.IntegerArray(np.where(mask, 0, values).astype(dtype.lower()), mask)
+            else:
+                frame[column] = values.astype("float32")
+        else:
+            frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def load_survey(path, columns=None, rename=None, rows=None, chunksize=None):
+    """Read the projected columns of a survey CSV with compact dtypes.
+
+    ``columns`` are the file's column names to read (default
+    PROJECTED_COLUMNS), ``rename`` maps them to the canonical names.
+    With ``chunksize`` an iterator of frames is returned instead.
+    """
+    import pandas as pd
+
+    columns = list(columns or PROJECTED_COLUMNS)
+    rename = rename or {}
+    dtypes = {column: PARSE_DTYPES[rename.get(column, column)]
+              for column in columns if rename.get(column, column) in PARSE_DTYPES}
+
+    if chunksize:
+        return _iter_chunks(path, columns, rename, rows, chunksize, dtypes)
+    try:
+        frame = pd.read_csv(path, usecols=columns, dtype=dtypes, nrows=rows)
+    except (TypeError, ValueError):
+        # Non-numeric survey answers; parse leniently and coerce
+        frame = pd.read_csv(path, usecols=columns, nrows=rows, dtype={column: object for column in dtypes})
+    return _compact(frame.rename(columns=rename)[[rename.get(c, c) for c in columns]])
+
+
+def _iter_chunks(path, columns, rename, rows, chunksize, dtypes):
+    import pandas as pd
+
+    done = 0
+    reader = pd.read_csv(path, usecols=columns, dtype=dtypes, nrows=rows, chunksize=chunksize)
+    while True:
+        try:
+            chunk = next(reader, None)
+        except (TypeError, ValueError):
+            # Non-numeric survey answers from here on; the rest is parsed leniently and coerced
+            reader = pd.read_csv(path, usecols=columns, skiprows=range(1, done + 1), chunksize=chunksize,
+                                 nrows=rows - done if rows is not None else None,
+                                 dtype={column: object for column in dtypes})
+            for chunk in reader:
+                chunk.index += done
+                done += len(chunk)
+                yield _compact(chunk.rename(columns=rename)[[rename.get(c, c) for c in columns]])
+            return
+        if chunk is None:
+            return
+        done += len(chunk)
+        yield _compact(chunk.rename(columns=rename)[[rename.get(c, c) for c in columns]])
+
+
+def to_columns(frame, columns=None):
+    """Plain NumPy columns: float64 with NaN for numbers, object with None for text."""
+    import pandas as pd
+
+    result = {}
+    for column in columns or frame.columns:
+        series = frame[column]
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            result[column] = series.to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            values = series.astype(object)
+            result[column] = values.where(series.notna(), None).to_numpy()
+    return result
+
+
+def _to_float(value):
+    try:
+        return float(value) if value != "" else math.nan
+    except ValueError:
+        return math.nan
+
+
+def scan_columns(path, columns=None, rows=None):
+    """``to_columns(load_survey(...))`` with the csv module instead of pandas.
+
+    Columns with an integer compact dtype are parsed as numbers, the rest
+    are kept as text. Slower than pandas on large files.
+    """
+    columns = list(columns or PROJECTED_COLUMNS)
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        positions = {column: i for i, column in enumerate(next(reader))}
+        indexes = [positions[column] for column in columns]
+        values = [[] for _ in columns]
+        for n, line in enumerate(reader):
+            if rows is not None and n >= rows:
+                break
+            for index, column_values in zip(indexes, values):
+                column_values.append(line[index] if index < len(line) else "")
+
+    return typed_columns(dict(zip(columns, values)))
+
+
+def typed_columns(values):
+    """``to_columns`` output for column -> list of CSV strings."""
+    result = {}
+    for column, column_values in values.items():
+        if COMPACT_DTYPES.get(column, "").startswith("Int"):
+            result[column] = np.fromiter(map(_to_float, column_values), dtype="float64", count=len(column_values))
+        else:
+            result[column] = np.array([value if value != "" else None for value in column_values], dtype=object)
+    return result
@@ -1,19 +1,105 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pandas as pd
-import joblib
-import numpy as np
-from datetime import datetime
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
+import csv
+import io
+import json
 import os
-from sklearn.metrics import accuracy_score, confusion_matrix
+import threading
+from aggregates import SummaryAggregates, tail_rows
+from coalescer import PredictionCoalescer
+from eventlog import EventLogger
+from executors import ExecutorSaturated, ServingExecutors
+import metrics
+import profiling
+from metrics import REGISTRY, GaugeFunction, MetricsMiddleware, PERSISTENCE_ERRORS, count_predictions, timed
+from online import OnlineLearner, OnlineLogisticRegression, preference_label
+from partners import FeatureSpace, PartnerIndex, describe
+from prediction_cache import PredictionCache, model_fingerprint, predict_history
+from registry import ModelRegistry, RegistryWatcher, ServingModel
+from responses import CachedJSON, FastJSONResponse
+from scoring import CompiledScorer, TableScorer, load_pipeline, load_scorer, records_to_columns, warm_up
+from loader import PROJECTED_COLUMNS
+from store import open_labels_store, open_store, submission_row
+from submissions import PREFERENCES, SubmissionQuery, normalize_time
+from teams import balance, form_teams, team_summaries
 
 app = FastAPI()
 
 # Get the directory of the current script
 backend_dir = os.path.dirname(__file__)
 model_path = os.path.join(backend_dir, "model.pkl")
-data_path = os.path.join(backend_dir, "newdata.csv")
+compiled_model_path = os.path.join(backend_dir, "model.npz")
+registry_dir = os.environ.get("EDUPAIR_MODEL_DIR", os.path.join(backend_dir, "models"))
+data_path = os.environ.get("EDUPAIR_DATA_PATH", os.path.join(backend_dir, "newdata.csv"))
+store_dir = os.environ.get("EDUPAIR_STORE_DIR", os.path.join(backend_dir, "submissions"))
+cache_dir = os.environ.get("EDUPAIR_CACHE_DIR", os.path.join(backend_dir, ".cache"))
+# Students' own answers from /labels, the only stored rows train.py learns from
+labels_path = os.environ.get("EDUPAIR_LABELS_PATH", os.path.join(backend_dir, "labels.csv"))
+
+# Upper bound on the number of records accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.environ.get("EDUPAIR_MAX_BATCH_SIZE", "10000"))
+# Largest page /submissions returns
+MAX_PAGE_SIZE = int(os.environ.get("EDUPAIR_MAX_PAGE_SIZE", "1000"))
+# Largest roster accepted by /teams
+MAX_ROSTER_SIZE = int(os.environ.get("EDUPAIR_MAX_ROSTER_SIZE", "50000"))
+# "compiled" scores from the extracted model parameters, "pipeline" through sklearn
+SCORER_MODE = os.environ.get("EDUPAIR_SCORER", "compiled")
+# "pickle" unpickles the sklearn Pipeline; "npz" loads only the exported
+# parameters, so neither sklearn nor pandas is imported by the server
+MODEL_FORMAT = os.environ.get("EDUPAIR_MODEL_FORMAT", "pickle")
+# Precompute every form input combination and serve /predict from a lookup table
+PREDICTION_TABLE = os.environ.get("EDUPAIR_PREDICTION_TABLE", "0") == "1"
+# Group commit: the background writer flushes every N rows or M milliseconds
+COMMIT_ROWS = int(os.environ.get("EDUPAIR_COMMIT_ROWS", "256"))
+COMMIT_MS = float(os.environ.get("EDUPAIR_COMMIT_MS", "5"))
+# "csv" appends to newdata.csv, "columnar" keeps memory-mapped segments in EDUPAIR_STORE_DIR
+STORE_FORMAT = os.environ.get("EDUPAIR_STORE_FORMAT", "csv")
+# "locked" makes the CSV store safe to share between processes (uvicorn --workers,
+# the Streamlit app); "fsync" also syncs each commit and answers only once it is on disk
+STORE_DURABILITY = os.environ.get("EDUPAIR_STORE_DURABILITY", "buffered")
+# "async" moves inference, file I/O and evaluation onto dedicated pools;
+# "threadpool" runs blocking work on Starlette's shared threadpool
+SERVING_MODE = os.environ.get("EDUPAIR_SERVING", "threadpool")
+INFERENCE_WORKERS = int(os.environ.get("EDUPAIR_INFERENCE_WORKERS", "4"))
+IO_WORKERS = int(os.environ.get("EDUPAIR_IO_WORKERS", "2"))
+# Processes for full-history evaluation; 0 evaluates in the I/O pool
+EVALUATION_PROCESSES = int(os.environ.get("EDUPAIR_EVALUATION_PROCESSES", "0"))
+# Requests waiting per pool before new ones are rejected with 503; 0 = unbounded
+MAX_QUEUE = int(os.environ.get("EDUPAIR_MAX_QUEUE", "0"))
+# Seconds between checks of the model registry for a new current version; 0 = only /admin/reload
+MODEL_WATCH_SECONDS = float(os.environ.get("EDUPAIR_MODEL_WATCH_SECONDS", "0"))
+# Gather concurrent /predict calls for up to N ms (or M records) and score them
+# in one call; 0 scores every request on its own
+COALESCE_MS = float(os.environ.get("EDUPAIR_COALESCE_MS", "0"))
+COALESCE_MAX_BATCH = int(os.environ.get("EDUPAIR_COALESCE_MAX_BATCH", "64"))
+# Learn from /labels with an online logistic regression and serve a snapshot of it
+# every N seconds; the weights start from the served model
+ONLINE = os.environ.get("EDUPAIR_ONLINE", "0") == "1"
+ONLINE_BATCH = int(os.environ.get("EDUPAIR_ONLINE_BATCH", "64"))
+ONLINE_SNAPSHOT_SECONDS = float(os.environ.get("EDUPAIR_ONLINE_SNAPSHOT_SECONDS", "30"))
+ONLINE_LEARNING_RATE = float(os.environ.get("EDUPAIR_ONLINE_LEARNING_RATE", "0.05"))
+ONLINE_L2 = float(os.environ.get("EDUPAIR_ONLINE_L2", "1e-4"))
+# How many rows the served model's scaler statistics weigh against new ones
+ONLINE_PRIOR_ROWS = int(os.environ.get("EDUPAIR_ONLINE_PRIOR_ROWS", "1000"))
+# Required in the X-Admin-Token header of admin endpoints when set
+ADMIN_TOKEN = os.environ.get("EDUPAIR_ADMIN_TOKEN")
+# Gzip /data-summary bodies for clients that accept it
+SUMMARY_GZIP = os.environ.get("EDUPAIR_SUMMARY_GZIP", "1") == "1"
+# Latency histograms and counters served at /metrics
+metrics.enabled = os.environ.get("EDUPAIR_METRICS", "1") == "1"
+# Profile requests sent with an X-Profile: 1 header
+PROFILING = os.environ.get("EDUPAIR_PROFILING", "0") == "1"
+PROFILE_LOG = os.environ.get("EDUPAIR_PROFILE_LOG")
+# JSON-lines event log (stdout by default); "received" events are sampled
+LOG_PATH = os.environ.get("EDUPAIR_LOG_PATH")
+LOG_SAMPLE_RECEIVED = float(os.environ.get("EDUPAIR_LOG_SAMPLE_RECEIVED", "0.01"))
+LOG_QUEUE = int(os.environ.get("EDUPAIR_LOG_QUEUE", "10000"))
+
+# Request-path logging goes through a queue and a background writer
+log = EventLogger(LOG_PATH, max_queue=LOG_QUEUE, sample_rates={"received": LOG_SAMPLE_RECEIVED})
 
 # Enable CORS
 app.add_middleware(
@@ -23,14 +109,109 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware)
+if PROFILING:
+    app.add_middleware(profiling.ProfilingMiddleware, log_path=PROFILE_LOG, logger=log)
 
-# Load the model
-model_data = joblib.load(model_path)
-# Extract the pipeline from the dictionary if it's a dict, otherwise use it directly
-if isinstance(model_data, dict):
-    pipeline = model_data.get('model', model_data)
-else:
-    pipeline = model_data
+executors = ServingExecutors(
+    enabled=SERVING_MODE == "async",
+    inference_workers=INFERENCE_WORKERS,
+    io_workers=IO_WORKERS,
+    evaluation_processes=EVALUATION_PROCESSES,
+    max_queue=MAX_QUEUE,
+)
+
+coalescer = None
+if COALESCE_MS > 0:
+    coalescer = PredictionCoalescer(executors.run_inference, COALESCE_MS, COALESCE_MAX_BATCH)
+
+@app.exception_handler(ExecutorSaturated)
+def executor_saturated(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+registry = ModelRegistry(registry_dir)
+
+def load_model(version=None):
+    """Load and warm up a registry version (default: the current one, else model.pkl/model.npz)."""
+    if MODEL_FORMAT == "npz":
+        path, version = registry.resolve(version, fallback=compiled_model_path, kind="compiled")
+        scorer = CompiledScorer.load(path)
+        sklearn_version = scorer.manifest.get("sklearn_version")
+    else:
+        path, version = registry.resolve(version, fallback=model_path)
+        scorer = load_scorer(load_pipeline(path), SCORER_MODE, log=log)
+        sklearn_version = None
+
+    # The live scorer is warmed before the table wraps it, so warm-up lookups never reach its counters
+    warm_up(scorer)
+    if PREDICTION_TABLE:
+        scorer = TableScorer(scorer)
+        log.event("prediction_table_built", version=version, **scorer.stats())
+    # Reached from /admin/reload and the registry watcher too, so it goes through the event log
+    log.event("model_loaded", version=version, scorer=scorer.name, path=path, sklearn_version=sklearn_version)
+    return ServingModel(version, model_fingerprint(path), path, scorer)
+
+# The model being served. Handlers read this once per request; a reload
+# replaces it in a single assignment, so in-flight requests finish on the
+# model they started with.
+serving = load_model()
+reload_lock = threading.Lock()
+
+def reload_model(version=None):
+    """Load ``version`` in the background of serving and swap it in; returns (model, swapped)."""
+    global serving
+    with reload_lock:
+        candidate = load_model(version)
+        if candidate.version == serving.version and candidate.fingerprint == serving.fingerprint:
+            return serving, False
+        serving = candidate
+        if learner:
+            learner.reset(online_model(candidate))
+        return candidate, True
+
+def registry_version():
+    # Online snapshots are served as "<registry version>+online.N"
+    return serving.version.split("+", 1)[0]
+
+def online_model(model):
+    """An online model continuing from ``model``, or None when it cannot be learned on."""
+    try:
+        return OnlineLogisticRegression.from_scorer(
+            model.scorer, prior_rows=ONLINE_PRIOR_ROWS, learning_rate=ONLINE_LEARNING_RATE, l2=ONLINE_L2,
+            base_version=model.version)
+    except Exception as e:
+        log.event("online_unavailable", version=model.version, error=str(e))
+        return None
+
+def publish_snapshot(model, scorer, number):
+    """Serve an online snapshot, unless a different model was loaded since it was taken."""
+    global serving
+    # Served like the registry's models
+    warm_up(scorer)
+    if PREDICTION_TABLE:
+        scorer = TableScorer(scorer)
+    with reload_lock:
+        if learner.model is not model or registry_version() != model.base_version:
+            return
+        # The fingerprint stays the registry model's, so the history is not re-evaluated (nor its
+        # cached predictions dropped) on every snapshot; only new submissions are scored by it
+        serving = ServingModel(f"{model.base_version}+online.{number}", serving.fingerprint, serving.path, scorer)
+
+learner = None
+if ONLINE:
+    initial = online_model(serving)
+    if initial is None:
+        # EDUPAIR_ONLINE=1 is ignored; online_unavailable says why
+        log.event("online_disabled", version=serving.version)
+    else:
+        learner = OnlineLearner(initial, publish_snapshot, batch_size=ONLINE_BATCH,
+                                snapshot_seconds=ONLINE_SNAPSHOT_SECONDS, log=log)
+
+watcher = None
+if MODEL_WATCH_SECONDS > 0:
+    watcher = RegistryWatcher(registry, registry_version, reload_model, MODEL_WATCH_SECONDS, log=log)
+    watcher.start()
 
 # Define the input data model - only the 4 required features
 class UserInput(BaseModel):
@@ -39,90 +220,461 @@ class UserInput(BaseModel):
     club_top1: str
     weekly_hobby_hours: int
 
-@app.get("/data-summary")
-def data_summary():
-    df = pd.read_csv(data_path)
-
-    # Replace NaN with None for JSON compatibility
-    df = df.replace({np.nan: None})
-
-    # Binarize teamwork preference, handling potential None values
-    df['preference'] = df['teamwork_preference'].apply(lambda x: 'Team' if x is not None and x >= 4 else 'Solo')
-
-    preference_distribution = df['preference'].value_counts().to_dict()
-    introversion_distribution = df['introversion_extraversion'].dropna().value_counts().to_dict()
-    risk_taking_distribution = df['risk_taking'].dropna().value_counts().to_dict()
-    recent_submissions = df.tail(5).to_dict(orient='records')
-
-    # Calculate model accuracy and confusion matrix
-    # Ensure we only use rows where the target is not null for a fair evaluation
-    eval_df = df.dropna(subset=['teamwork_preference', "introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"])
-    X = eval_df[["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"]]
-    y_true = eval_df['teamwork_preference'].apply(lambda x: 1 if x >= 4 else 0)
-
-    if not X.empty:
-        y_pred = pipeline.predict(X)
-        accuracy = accuracy_score(y_true, y_pred)
-        cm = confusion_matrix(y_true, y_pred).tolist()
-    else:
-        accuracy = 0
-        cm = [[0,0],[0,0]]
+# A /labels record: the features with the student's own answer on the 1-5 scale
+class LabeledInput(UserInput):
+    teamwork_preference: int
+
+# Submissions are appended by the store's background writer
+if STORE_FORMAT == "columnar":
+    store = open_store(store_dir, "columnar", commit_rows=COMMIT_ROWS, commit_ms=COMMIT_MS)
+else:
+    # Without sklearn in the process there is no reason to load pandas just to parse the CSV
+    store = open_store(data_path, commit_rows=COMMIT_ROWS, commit_ms=COMMIT_MS,
+                       parser="csv" if MODEL_FORMAT == "npz" else "pandas", durability=STORE_DURABILITY)
+store.on_error = lambda rows, e: log.error("persistence_error", stage="store_commit", rows=rows, error=str(e))
+# Opened by the first /labels call, so a server that never gets labels writes no labels.csv
+labels_store = None
+labels_lock = threading.Lock()
+
+def open_labels():
+    global labels_store
+    with labels_lock:
+        if labels_store is None:
+            opened = open_labels_store(labels_path, commit_rows=COMMIT_ROWS, commit_ms=COMMIT_MS,
+                                       durability=STORE_DURABILITY)
+            opened.on_error = lambda rows, e: log.error("persistence_error", stage="labels_commit", rows=rows,
+                                                        error=str(e))
+            labels_store = opened
+        return labels_store
+
+@app.on_event("shutdown")
+def shutdown():
+    if watcher:
+        watcher.stop()
+    if learner:
+        learner.close()
+    store.close()
+    if labels_store is not None:
+        labels_store.close()
+    executors.shutdown()
+    log.close()
+
+# Counters behind /data-summary, kept up to date with the committed submissions
+aggregates = SummaryAggregates(PROJECTED_COLUMNS)
+# Stored students in the model's feature space, behind /partners
+partner_index = PartnerIndex()
+
+seed_lock = threading.Lock()
+prediction_cache = None
+# Store position up to which rows are counted and indexed; see follow_store()
+store_position = None
+
+def seed_aggregates():
+    """Recompute the /data-summary counters from the full stored history."""
+    global prediction_cache, store_position
+    with seed_lock:
+        model = serving
+        if aggregates.model_version == model.fingerprint:
+            return
+        # Cached predictions are kept per model fingerprint
+        if prediction_cache is None or prediction_cache.fingerprint != model.fingerprint:
+            prediction_cache = PredictionCache(cache_dir, model.fingerprint)
+        with timed("summary_seed"):
+            # Only the model columns are parsed, with compact dtypes
+            with timed("store_read"):
+                prediction_cache.check(store)
+                history, position = store.follow(PROJECTED_COLUMNS)
+            recent_rows = tail_rows(history, aggregates.recent.maxlen)
+            # Only rows appended since the last evaluation with this model are scored
+            predictions = executors.evaluate(predict_history, history, model.scorer, prediction_cache)
+        with timed("partner_index"):
+            try:
+                space = FeatureSpace.from_scorer(model.scorer)
+            except ValueError as e:
+                log.event("partners_disabled", version=model.version, error=str(e))
+                space = None
+            partner_index.seed(space, history, model.fingerprint)
+        aggregates.seed(history, recent_rows, predictions, model.fingerprint)
+        store_position = position
+
+def follow_store():
+    """Count and index the rows committed since the last look, whichever worker stored them.
+
+    Rows are taken in store order, so every worker sharing the store reports
+    the same counters and numbers students as /submissions does.
+    """
+    global store_position
+    if aggregates.model_version != serving.fingerprint:
+        seed_aggregates()
+    with seed_lock:
+        model = serving
+        columns, position = store.follow(PROJECTED_COLUMNS, store_position)
+        if len(columns["teamwork_preference"]):
+            predictions = predict_history(columns, model.scorer)
+            rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+            aggregates.update(rows, predictions)
+            partner_index.update(rows)
+        store_position = position
 
+seed_aggregates()
 
+# Scrape-time gauges next to the histograms and counters of metrics.py
+REGISTRY.register(GaugeFunction("edupair_store_rows", "Rows in the submission store.",
+                                lambda: {(): store.row_count}))
+REGISTRY.register(GaugeFunction("edupair_store_pending_rows", "Submissions queued but not yet committed.",
+                                lambda: {(): store.stats()["pending"]}))
+REGISTRY.register(GaugeFunction("edupair_executor_queue_depth", "Tasks waiting per executor pool.",
+                                lambda: {(name,): pool["queue_depth"]
+                                         for name, pool in executors.stats()["pools"].items()}, ["pool"]))
+REGISTRY.register(GaugeFunction("edupair_log_queue_depth", "Event log records waiting for the writer.",
+                                lambda: {(): log.stats()["queued"]}))
+REGISTRY.register(GaugeFunction("edupair_log_dropped", "Event log records dropped because the queue was full.",
+                                lambda: {(level,): count for level, count in log.stats()["dropped"].items()},
+                                ["level"]))
+REGISTRY.register(GaugeFunction("edupair_model_info", "The model being served.",
+                                lambda: {(serving.version, serving.scorer.name): 1}, ["version", "scorer"]))
+if learner:
+    REGISTRY.register(GaugeFunction("edupair_online_rows", "Labeled rows learned by the online model.",
+                                    lambda: {(): learner.stats()["rows"]}))
+    REGISTRY.register(GaugeFunction("edupair_online_queue_depth", "Labeled rows waiting for the online learner.",
+                                    lambda: {(): learner.stats()["queued"]}))
+
+def save_submissions(records, predictions, preferences=None):
+    """Queue scored submissions for the store's next group commit.
+
+    ``preferences`` are the students' own answers (from /labels), stored in
+    place of the predicted preference and also kept in the labels store.
+    """
+    rows = [submission_row(record.dict(), prediction) for record, prediction in zip(records, predictions)]
+    if preferences is not None:
+        for row, preference in zip(rows, preferences):
+            row["teamwork_preference"] = preference
+    # The counters and the partner index pick the rows up from the store once committed
+    with timed("store_append"):
+        sequence = store.append(rows)
+        labels = open_labels() if preferences is not None else None
+        labels_sequence = labels.append(rows) if labels is not None else None
+        # With fsync durability the response doubles as the write acknowledgement; a
+        # profiled request waits too, so the write shows up in its breakdown
+        if STORE_DURABILITY == "fsync" or profiling.current_profile() is not None:
+            store.wait(sequence)
+            if labels is not None:
+                labels.wait(labels_sequence)
+
+def format_prediction(prediction, prediction_proba):
     return {
-        "preference_distribution": preference_distribution,
-        "introversion_distribution": introversion_distribution,
-        "risk_taking_distribution": risk_taking_distribution,
-        "recent_submissions": recent_submissions,
-        "accuracy": accuracy,
-        "confusion_matrix": cm
+        "prediction": "Team" if prediction == 1 else "Solo",
+        "prediction_probability": {
+            "Solo": float(prediction_proba[0]),
+            "Team": float(prediction_proba[1])
+        }
     }
 
-@app.post("/predict")
-def predict(data: UserInput):
-    print(f"Received data: {data.dict()}")  # Debug log
-    
-    # Create a dataframe for prediction from the input data
-    prediction_df = pd.DataFrame([data.dict()])
+# Encoded /data-summary body, reused until the next submission or model swap
+summary_cache = CachedJSON(compress=SUMMARY_GZIP)
+
+def summary_version():
+    # The counters only change with the rows counted and the model that evaluated them.
+    # This process's own view; the ETag sent to clients is a hash of the body.
+    return aggregates.rows, aggregates.model_version
+
+def summary_snapshot():
+    with aggregates.lock:
+        return summary_version(), aggregates.snapshot()
+
+def summary_response(request):
+    # Counters are rebuilt only when a different model is being served
+    with timed("summary"):
+        follow_store()
+        with aggregates.lock:
+            version = summary_version()
+        return summary_cache.response(request, version, summary_snapshot)
 
-    # Make a prediction
-    prediction = pipeline.predict(prediction_df)[0]
-    prediction_proba = pipeline.predict_proba(prediction_df)[0]
+@app.get("/data-summary")
+async def data_summary(request: Request):
+    return await executors.run_io(summary_response, request)
+
+def query_submissions(query, cursor, limit):
+    with timed("store_query"):
+        records, next_cursor = store.query(query, cursor, limit)
+    return FastJSONResponse({"submissions": records, "next_cursor": next_cursor})
+
+@app.get("/submissions")
+async def submissions(since: str = None, until: str = None, club: str = None, preference: str = None,
+                      cursor: int = 0, limit: int = 100):
+    """Stored submissions in storage order, one page at a time; pass ``next_cursor`` back as ``cursor``."""
+    try:
+        since = normalize_time(since) if since else None
+        until = normalize_time(until) if until else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"since/until must be ISO dates or datetimes: {e}")
+    if preference is not None and preference not in PREFERENCES:
+        raise HTTPException(status_code=422, detail=f"preference must be one of {', '.join(PREFERENCES)}")
+    if cursor < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"cursor must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}")
+    query = SubmissionQuery(since=since, until=until, club=club, preference=preference)
+    return await executors.run_io(query_submissions, query, cursor, limit)
+
+def find_partners(student_id, features, k):
+    with timed("partners"):
+        # The index lives in the served model's feature space and is rebuilt with the summary counters
+        follow_store()
+        if partner_index.space is None:
+            raise HTTPException(status_code=503, detail="Partner search is not available for the model being served")
+        if student_id is not None:
+            try:
+                key = partner_index.key_of(student_id)
+            except IndexError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+        else:
+            key = partner_index.space.impute(features)
+        partners = partner_index.query(key, k, exclude=student_id)
+    return FastJSONResponse({
+        "model_version": serving.version,
+        "student": {"id": student_id, **describe(key)},
+        "partners": [{"id": row, "distance": distance, **describe(features)} for row, distance, features in partners],
+    })
+
+@app.get("/partners")
+async def partners(id: int = None, introversion_extraversion: int = None, risk_taking: int = None,
+                   club_top1: str = None, weekly_hobby_hours: int = None, k: int = 10):
+    """The ``k`` stored students closest to a stored student (``id``) or to the given features."""
+    features = {"introversion_extraversion": introversion_extraversion, "risk_taking": risk_taking,
+                "club_top1": club_top1, "weekly_hobby_hours": weekly_hobby_hours}
+    if id is None and any(value is None for value in features.values()):
+        raise HTTPException(status_code=422, detail="Pass a stored student id or all four features")
+    if not 1 <= k <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"k must be between 1 and {MAX_PAGE_SIZE}")
+    return await executors.run_io(find_partners, id, features, k)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/executors")
+def executor_stats():
+    stats = executors.stats()
+    if coalescer:
+        stats["coalescer"] = coalescer.stats()
+    return stats
+
+@app.get("/prediction-table")
+def prediction_table():
+    scorer = serving.scorer
+    if not isinstance(scorer, TableScorer):
+        return {"enabled": False}
+    return {"enabled": True, **scorer.stats()}
+
+@app.get("/model")
+def model_info():
+    manifest = registry.manifest()
+    info = {**serving.info(), "registry": {"current": manifest["current"],
+                                           "versions": [entry["version"] for entry in manifest["versions"]]}}
+    if learner:
+        info["online"] = learner.stats()
+    return info
+
+@app.post("/admin/reload")
+async def admin_reload(version: str = None, x_admin_token: str = Header(None)):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        # Loading and warming up runs off the event loop; requests keep being served
+        model, swapped = await executors.run_io(reload_model, version)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not load model: {e}")
+    return {**model.info(), "swapped": swapped}
+
+def parse_record(body):
+    """Validate a /predict body, reporting errors like FastAPI's own body validation."""
+    with timed("validation"):
+        try:
+            payload = json.loads(body)
+        except ValueError as e:
+            raise RequestValidationError([{"loc": ("body",), "msg": f"Invalid JSON: {e}", "type": "value_error.jsondecode"}])
+        if not isinstance(payload, dict):
+            raise RequestValidationError([{"loc": ("body",), "msg": "Expected an object", "type": "type_error.dict"}])
+        try:
+            return UserInput(**payload)
+        except ValidationError as e:
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+
+def prediction_scorer(model):
+    # Only /predict and /predict/batch count towards the prediction table's hit rate
+    return model.scorer.counted if isinstance(model.scorer, TableScorer) else model.scorer
+
+# The body is parsed by hand so validation shows up as its own stage; the
+# documented schema stays the same
+@app.post("/predict", openapi_extra={"requestBody": {
+    "required": True, "content": {"application/json": {"schema": UserInput.schema()}}}})
+async def predict(request: Request):
+    data = parse_record(await request.body())
+    log.event("received", endpoint="/predict", record=data.dict())
+
+    model = serving
+    scorer = prediction_scorer(model)
+    # Label and probabilities come from a single pass over the model; the
+    # compiled and table scorers take microseconds and run inline
+    with timed("inference"):
+        if scorer.blocking and coalescer:
+            prediction, prob_solo, prob_team = await coalescer.score_one(scorer, data.dict())
+        elif scorer.blocking:
+            prediction, prob_solo, prob_team = await executors.run_inference(scorer.score_one, data.dict())
+        else:
+            prediction, prob_solo, prob_team = scorer.score_one(data.dict())
+    count_predictions([prediction])
 
     # Save the prediction to CSV
     try:
-        # Read existing CSV to get all columns
-        existing_df = pd.read_csv(data_path)
-        
-        # Create a new row with all columns initialized to NaN
-        new_row = pd.DataFrame([{col: np.nan for col in existing_df.columns}])
-        
-        # Fill in the values we have
-        new_row['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_row['introversion_extraversion'] = data.introversion_extraversion
-        new_row['risk_taking'] = data.risk_taking
-        new_row['club_top1'] = data.club_top1
-        new_row['weekly_hobby_hours'] = data.weekly_hobby_hours
-        
-        # Add the predicted teamwork preference (convert back to 1-5 scale)
-        new_row['teamwork_preference'] = 5 if prediction == 1 else 1
-        
-        # Append to CSV
-        new_row.to_csv(data_path, mode='a', header=False, index=False)
-        print(f"Successfully saved data to CSV")  # Debug log
+        await executors.run_io(save_submissions, [data], [prediction])
+    except ExecutorSaturated:
+        raise
     except Exception as e:
-        print(f"Error saving to CSV: {e}")
+        PERSISTENCE_ERRORS.inc(1, ("store_append",))
+        log.error("persistence_error", stage="store_append", endpoint="/predict", rows=1, error=str(e))
 
     # Return the prediction
-    if prediction == 1:
-        preference = "Team"
-    else:
-        preference = "Solo"
+    return {**format_prediction(prediction, (prob_solo, prob_team)), "model_version": model.version}
+
+def parse_batch(body, content_type, max_rows=None):
+    """Parse a JSON array or CSV body into validated UserInput records."""
+    with timed("validation"):
+        return _parse_batch(body, content_type, max_rows or MAX_BATCH_SIZE)[1]
+
+def _parse_batch(body, content_type, max_rows, schema=UserInput):
+    try:
+        if content_type.startswith("text/csv"):
+            rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+        else:
+            rows = json.loads(body)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse request body: {e}")
 
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=422, detail="Expected an array of records")
+    if len(rows) > max_rows:
+        raise HTTPException(status_code=413, detail=f"Batch size {len(rows)} exceeds the limit of {max_rows}")
+
+    records = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise HTTPException(status_code=422, detail=f"Record {index} is not an object")
+        try:
+            records.append(schema(**row))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail={"record": index, "errors": e.errors()})
+    return rows, records
+
+def score_batch(records):
+    model = serving
+    with timed("frame"):
+        columns = records_to_columns([record.dict() for record in records])
+    # One vectorized call for the whole batch
+    with timed("inference"):
+        predictions, prediction_proba = prediction_scorer(model).score(columns)
+    count_predictions(predictions)
+
+    try:
+        save_submissions(records, predictions)
+    except Exception as e:
+        PERSISTENCE_ERRORS.inc(len(records), ("store_append",))
+        log.error("persistence_error", stage="store_append", endpoint="/predict/batch", rows=len(records),
+                  error=str(e))
+
+    # Encoded directly, without a jsonable_encoder pass over every prediction
+    return FastJSONResponse({
+        "count": len(records),
+        "model_version": model.version,
+        "predictions": [format_prediction(p, proba) for p, proba in zip(predictions, prediction_proba)]
+    })
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    body = await request.body()
+    records = parse_batch(body, request.headers.get("content-type", ""))
+    if not records:
+        return {"count": 0, "model_version": serving.version, "predictions": []}
+    log.event("received", endpoint="/predict/batch", rows=len(records))
+    return await executors.run_inference(score_batch, records)
+
+def assign_teams(rows, records, team_size, max_solo):
+    model = serving
+    with timed("frame"):
+        columns = records_to_columns([record.dict() for record in records])
+    with timed("inference"):
+        _, proba = model.scorer.score(columns)
+    with timed("teams"):
+        team, stats = form_teams(proba[:, 1], columns["introversion_extraversion"], columns["club_top1"],
+                                 team_size, max_solo=max_solo)
+    ids = [row.get("student_id", index) for index, row in enumerate(rows)]
+    summaries, solo = team_summaries(team, ids, proba[:, 1], columns["introversion_extraversion"],
+                                     columns["club_top1"])
+    return FastJSONResponse({
+        "model_version": model.version,
+        "team_size": team_size,
+        "teams": summaries,
+        "solo": solo,
+        "balance": balance(team, proba[:, 1], columns["introversion_extraversion"], columns["club_top1"]),
+        "stats": stats,
+    })
+
+@app.post("/teams")
+async def teams(request: Request, team_size: int = 4, max_solo: int = None):
+    """Split a roster (JSON array or CSV, optionally with a student_id per record) into balanced teams."""
+    if team_size < 2:
+        raise HTTPException(status_code=422, detail="team_size must be at least 2")
+    body = await request.body()
+    with timed("validation"):
+        rows, records = _parse_batch(body, request.headers.get("content-type", ""), MAX_ROSTER_SIZE)
+    if not records:
+        return {"model_version": serving.version, "team_size": team_size, "teams": [], "solo": []}
+    log.event("received", endpoint="/teams", rows=len(records))
+    return await executors.run_inference(assign_teams, rows, records, team_size, max_solo)
+
+def learn_labels(records):
+    model = serving
+    with timed("frame"):
+        columns = records_to_columns([record.dict() for record in records])
+    # Scored with the served model so /data-summary counts how it did on these students
+    with timed("inference"):
+        predictions, _ = model.scorer.score(columns)
+    preferences = [record.teamwork_preference for record in records]
+
+    try:
+        save_submissions(records, predictions, preferences)
+    except Exception as e:
+        PERSISTENCE_ERRORS.inc(len(records), ("store_append",))
+        log.error("persistence_error", stage="store_append", endpoint="/labels", rows=len(records), error=str(e))
+
+    queued = 0
+    if learner:
+        # Undecided answers (3) are stored but, as in train.py, not learned from
+        labeled = [(record.dict(), preference_label(preference)) for record, preference in zip(records, preferences)]
+        labeled = [(record, label) for record, label in labeled if label is not None]
+        queued = learner.submit([record for record, _ in labeled], [label for _, label in labeled])
+    decided = [(prediction, preference) for prediction, preference in zip(predictions, preferences) if preference != 3]
     return {
-        "prediction": preference,
-        "prediction_probability": {
-            "Solo": float(prediction_proba[0]),
-            "Team": float(prediction_proba[1])
-        }
-    }
\ No newline at end of file
+        "count": len(records),
+        "queued": queued,
+        # How the served model did on the rows with a Solo/Team answer
+        "evaluated": len(decided),
+        "correct": sum(int(prediction == 1) == int(preference >= 4) for prediction, preference in decided),
+        "model_version": model.version,
+    }
+
+@app.post("/labels")
+async def labels(request: Request):
+    """Store students' own answers (JSON array or CSV with teamwork_preference) and learn from them online."""
+    body = await request.body()
+    with timed("validation"):
+        _, records = _parse_batch(body, request.headers.get("content-type", ""), MAX_BATCH_SIZE, LabeledInput)
+        for index, record in enumerate(records):
+            if not 1 <= record.teamwork_preference <= 5:
+                raise HTTPException(status_code=422,
+                                    detail=f"Record {index}: teamwork_preference must be between 1 and 5")
+    if not records:
+        return {"count": 0, "queued": 0, "evaluated": 0, "correct": 0, "model_version": serving.version}
+    log.event("received", endpoint="/labels", rows=len(records))
+    return await executors.run_inference(learn_labels, records)
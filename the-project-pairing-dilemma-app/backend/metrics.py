@@ -0,0 +1,227 @@
+"""In-process metrics served in the Prometheus text exposition format.
+
+Histograms and counters are plain lists behind a lock, so recording a
+sample costs a couple of microseconds and the metrics can stay on in production.
+
+- ``REQUEST_SECONDS``: latency per endpoint, recorded by ``MetricsMiddleware``
+- ``STAGE_SECONDS``: latency of internal stages, recorded with ``timed(stage)``
+- ``PREDICTIONS``: predictions served per class
+- ``PERSISTENCE_ERRORS``: submissions that could not be written
+"""
+import bisect
+import threading
+import time
+
+from profiling import current_profile
+
+# 50us .. 10s
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+enabled = True
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class GaugeFunction:
+    """A gauge read from ``fn()`` at scrape time; ``fn`` returns {label values: number}."""
+
+    type = "gauge"
+
+    def __init__(self, name, help, fn, labelnames=()):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        for labels, value in sorted(self.fn().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "edupair_request_duration_seconds", "HTTP request latency by endpoint.", ["method", "path", "status"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "edupair_stage_duration_seconds",
+    "Latency of internal stages (validation, frame, predict_proba, inference, store_read, store_append, "
+    "store_commit, summary, summary_seed). Stages can nest, e.g. frame is part of inference.", ["stage"]))
+PREDICTIONS = REGISTRY.register(Counter(
+    "edupair_predictions_total", "Predictions served, by predicted class.", ["class"]))
+PERSISTENCE_ERRORS = REGISTRY.register(Counter(
+    "edupair_persistence_errors_total", "Submissions that could not be persisted.", ["stage"]))
+
+
+class _Timer:
+    __slots__ = ("labels", "profile", "started")
+
+    def __init__(self, labels, profile):
+        self.labels = labels
+        self.profile = profile
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        if enabled:
+            STAGE_SECONDS.observe(elapsed, self.labels)
+        if self.profile is not None:
+            self.profile.add(self.labels[0], elapsed)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(stage):
+    """Context manager recording the duration of ``stage`` (and adding it to a request profile)."""
+    profile = current_profile()
+    if not enabled and profile is None:
+        return _NULL_TIMER
+    return _Timer((stage,), profile)
+
+
+def count_predictions(labels):
+    """Count served predictions by class name (Team / Solo)."""
+    if not enabled:
+        return
+    team = sum(1 for label in labels if label == 1)
+    if team:
+        PREDICTIONS.inc(team, ("Team",))
+    if len(labels) - team:
+        PREDICTIONS.inc(len(labels) - team, ("Solo",))
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method, route and status."""
+
+    def __init__(self, app):
+        self.app = app
+        self._paths = None
+
+    def _path(self, scope):
+        if self._paths is None:
+            # Label by known route path only, so unknown URLs cannot blow up the series count
+            self._paths = {getattr(route, "path", None) for route in getattr(scope.get("app"), "routes", [])}
+        path = scope.get("path", "")
+        return path if path in self._paths else "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                    (scope["method"], self._path(scope), str(status[0])))
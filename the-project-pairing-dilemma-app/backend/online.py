@@ -0,0 +1,283 @@
+"""Online learning from labeled submissions (``POST /labels``).
+
+``OnlineLogisticRegression`` keeps the preprocessing schema of the served
+model: the imputation values and one-hot club vocabulary stay fixed, and the
+scaler means and scales are running statistics over every row seen. The
+weights start from the served model, which must be linear, and are updated
+with mini-batch AdaGrad on the logistic loss. A snapshot is a ``CompiledScorer``,
+so it is served exactly like an exported model.
+
+``OnlineLearner`` runs the updates on a background thread. Handlers only
+queue labeled rows; the thread takes them in mini-batches and every
+``snapshot_seconds`` hands a snapshot to ``publish`` if anything was learned
+since the last one.
+"""
+import queue
+import threading
+import time
+
+import numpy as np
+
+from partners import FeatureSpace
+from scoring import CompiledScorer, NUM_FEATURES
+
+_STOP = object()
+
+
+def preference_label(teamwork_preference):
+    """1 (Team) for 4-5, 0 (Solo) for 1-2, None for the undecided 3, as train.py labels rows."""
+    if teamwork_preference >= 4:
+        return 1
+    if teamwork_preference <= 2:
+        return 0
+    return None
+
+
+class RunningScaler:
+    """Mean and standard deviation over all rows seen, merged batch by batch."""
+
+    def __init__(self, means, scales, prior_rows):
+        # The served model's statistics count as ``prior_rows`` rows already seen
+        self.rows = prior_rows
+        self.means = np.asarray(means, dtype=float).copy()
+        self._m2 = np.asarray(scales, dtype=float) ** 2 * prior_rows
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.rows + n
+        delta = mean - self.means
+        self.means = self.means + delta * n / total
+        self._m2 = self._m2 + m2 + delta ** 2 * self.rows * n / total
+        self.rows = total
+
+    @property
+    def scales(self):
+        scales = np.sqrt(self._m2 / max(1, self.rows))
+        # Like StandardScaler, a constant feature is left unscaled
+        scales[scales == 0] = 1.0
+        return scales
+
+
+class OnlineLogisticRegression:
+    def __init__(self, space, coef=None, intercept=0.0, classes=(0, 1), prior_rows=1000,
+                 learning_rate=0.05, l2=1e-4, base_version=None):
+        self.space = space
+        # The served model version this one was started from
+        self.base_version = base_version
+        self.classes = np.asarray(classes)
+        self.scaler = RunningScaler(space.means, space.scales, prior_rows)
+        dimensions = space.dimensions
+        self.coef = np.zeros(dimensions) if coef is None else np.asarray(coef, dtype=float).copy()
+        self.intercept = float(intercept)
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        # AdaGrad's per-weight sums of squared gradients
+        self._g2 = np.zeros(dimensions + 1)
+        self.rows = 0
+        self.updates = 0
+        self.correct = 0
+
+    @classmethod
+    def from_scorer(cls, scorer, **kwargs):
+        """Continue from the served model's schema and weights; raises ValueError unless it is linear."""
+        space = FeatureSpace.from_scorer(scorer)
+        scorer = getattr(scorer, "live", scorer)
+        if not isinstance(scorer, CompiledScorer):
+            # An untrained linear model must never be served in place of a non-linear one
+            try:
+                scorer = CompiledScorer.from_pipeline(scorer.pipeline)
+            except ValueError as e:
+                raise ValueError(f"online learning needs a linear model: {e}")
+        clubs = sorted(space.clubs, key=space.clubs.get)
+        coef = np.concatenate([scorer.num_coef, [scorer.club_weights.get(club, 0.0) for club in clubs]])
+        return cls(space, coef=coef, intercept=scorer.intercept, classes=scorer.classes, **kwargs)
+
+    def _numeric(self, columns):
+        num = np.column_stack([np.asarray(columns[feature], dtype=float) for feature in self.space.num_features])
+        fill = np.array([self.space.medians[feature] for feature in self.space.num_features])
+        return np.where(np.isnan(num), fill, num)
+
+    def _design(self, columns, num):
+        n_num = len(self.space.num_features)
+        X = np.zeros((len(num), self.space.dimensions))
+        X[:, :n_num] = (num - self.scaler.means) / self.scaler.scales
+        for i, club in enumerate(columns["club_top1"]):
+            # Clubs outside the fixed vocabulary encode to all zeros
+            column = self.space.clubs.get(self.space.club_fill if club is None else club)
+            if column is not None:
+                X[i, n_num + column] = 1.0
+        return X
+
+    def partial_fit(self, columns, labels):
+        """One mini-batch step; returns how many rows were predicted right before the step."""
+        y = np.asarray(labels, dtype=float)
+        if len(y) == 0:
+            return 0
+        num = self._numeric(columns)
+        self.scaler.update(num)
+        X = self._design(columns, num)
+        z = X @ self.coef + self.intercept
+        # Progressive validation: every row is scored before it is learned from
+        correct = int(((z > 0) == (y == 1)).sum())
+        p = 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+        error = p - y
+        gradient = np.append(X.T @ error / len(y) + self.l2 * self.coef, error.mean())
+        self._g2 += gradient ** 2
+        step = self.learning_rate * gradient / (np.sqrt(self._g2) + 1e-8)
+        self.coef -= step[:-1]
+        self.intercept -= step[-1]
+        self.rows += len(y)
+        self.updates += 1
+        self.correct += correct
+        return correct
+
+    def to_scorer(self):
+        """A CompiledScorer serving the current weights and statistics."""
+        n_num = len(self.space.num_features)
+        clubs = sorted(self.space.clubs, key=self.space.clubs.get)
+        return CompiledScorer(
+            num_features=self.space.num_features,
+            medians=[self.space.medians[feature] for feature in self.space.num_features],
+            means=self.scaler.means,
+            scales=self.scaler.scales,
+            num_coef=self.coef[:n_num],
+            cat_feature="club_top1",
+            club_fill=self.space.club_fill,
+            club_weights=dict(zip(clubs, self.coef[n_num:])),
+            intercept=self.intercept,
+            classes=self.classes,
+        )
+
+
+class OnlineLearner:
+    """Background mini-batch updates of an OnlineLogisticRegression, with periodic snapshots.
+
+    Failures go to ``log`` (an eventlog.EventLogger) when given, else to stdout.
+    """
+
+    def __init__(self, model, publish, batch_size=64, snapshot_seconds=30.0, max_queue=100000, log=None):
+        self.model = model
+        self.publish = publish
+        self.log = log
+        self.batch_size = batch_size
+        self.snapshot_seconds = snapshot_seconds
+        self.max_queue = max_queue
+        self.snapshots = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._learned_since_snapshot = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="online-learner", daemon=True)
+        self._thread.start()
+
+    def submit(self, records, labels):
+        """Queue labeled rows (record dicts, 0/1 labels); returns how many were accepted."""
+        accepted = 0
+        for record, label in zip(records, labels):
+            if self._queue.qsize() >= self.max_queue:
+                with self._lock:
+                    self.dropped += 1
+                continue
+            self._queue.put((record, label))
+            accepted += 1
+        return accepted
+
+    def reset(self, model):
+        """Continue from a different base model (e.g. after POST /admin/reload); None pauses learning."""
+        with self._lock:
+            self.model = model
+            self._learned_since_snapshot = 0
+
+    def _take_batch(self, timeout):
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        batch = [item]
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        next_snapshot = time.monotonic() + self.snapshot_seconds
+        stopping = False
+        while not stopping:
+            batch = self._take_batch(max(0.0, next_snapshot - time.monotonic()))
+            if batch and batch[-1] is _STOP:
+                stopping = True
+                batch.pop()
+            if batch:
+                started = time.perf_counter()
+                records = [record for record, _ in batch]
+                columns = {feature: [record[feature] for record in records]
+                           for feature in NUM_FEATURES + ["club_top1"]}
+                with self._lock:
+                    try:
+                        if self.model is None:
+                            # The served model has no schema to learn on; the rows are not kept
+                            self.dropped += len(batch)
+                        else:
+                            self.model.partial_fit(columns, [label for _, label in batch])
+                            self._learned_since_snapshot += len(batch)
+                    except Exception as e:
+                        self.errors += 1
+                        if self.log is not None:
+                            self.log.error("online_update_failed", rows=len(batch), error=str(e))
+                        else:
+                            print(f"Online update of {len(batch)} rows failed: {e}")
+                    self.busy_seconds += time.perf_counter() - started
+            if time.monotonic() >= next_snapshot:
+                self.snapshot()
+                next_snapshot = time.monotonic() + self.snapshot_seconds
+
+    def snapshot(self):
+        """Publish the current weights if anything was learned since the last snapshot."""
+        with self._lock:
+            if self.model is None or self._learned_since_snapshot == 0:
+                return None
+            model = self.model
+            scorer = model.to_scorer()
+            self._learned_since_snapshot = 0
+            self.snapshots += 1
+            number = self.snapshots
+        try:
+            self.publish(model, scorer, number)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            if self.log is not None:
+                self.log.error("online_snapshot_failed", snapshot=number, error=str(e))
+            else:
+                print(f"Publishing online snapshot {number} failed: {e}")
+        return scorer
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            model = self.model
+            rows = model.rows if model is not None else 0
+            updates = model.updates if model is not None else 0
+            return {
+                "base_version": model.base_version if model is not None else None,
+                "queued": self._queue.qsize(),
+                "rows": rows,
+                "updates": updates,
+                "progressive_accuracy": model.correct / rows if rows else None,
+                "updates_per_second": updates / self.busy_seconds if self.busy_seconds else None,
+                "rows_per_second": rows / self.busy_seconds if self.busy_seconds else None,
+                "snapshots": self.snapshots,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
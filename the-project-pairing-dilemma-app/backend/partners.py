@@ -0,0 +1,229 @@
+"""Nearest-neighbour partner search over the stored submissions (``GET /partners``).
+
+Students are compared in the feature space of the model's fitted
+``preprocess`` step: imputed and standardized numeric features plus the
+one-hot club. The closest students in that space are the most compatible
+partners.
+
+The survey features are small integer scales and a handful of clubs, so
+100k stored students share a few thousand distinct points. The index keeps
+one entry per distinct point, with the rows of the students at it, and a
+query is a brute-force distance computation over the points followed by an
+``argpartition``; that takes well under a millisecond. New submissions are
+added once they are committed, and the index is rebuilt from the history together
+with the /data-summary counters whenever a different model is served.
+"""
+import math
+import threading
+
+import numpy as np
+
+from scoring import CAT_FEATURES, NUM_FEATURES, CompiledScorer
+
+FEATURE_ORDER = ["introversion_extraversion", "risk_taking", "club_top1", "weekly_hobby_hours"]
+
+
+def _missing(value):
+    return value is None or (isinstance(value, (float, np.floating)) and math.isnan(value))
+
+
+def _plain(value):
+    value = value.item() if isinstance(value, np.generic) else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class FeatureSpace:
+    """The fitted ``preprocess`` step, evaluated with NumPy."""
+
+    def __init__(self, num_features, medians, means, scales, club_fill, clubs):
+        self.num_features = list(num_features)
+        self.medians = dict(zip(self.num_features, np.asarray(medians, dtype=float).tolist()))
+        self.means = np.asarray(means, dtype=float)
+        self.scales = np.asarray(scales, dtype=float)
+        self.club_fill = club_fill
+        self.clubs = {club: i for i, club in enumerate(clubs)}
+        self.dimensions = len(self.num_features) + len(self.clubs)
+
+    @classmethod
+    def from_scorer(cls, scorer):
+        """Raises ValueError when the model does not use the preprocess step train.py fits."""
+        scorer = getattr(scorer, "live", scorer)
+        if isinstance(scorer, CompiledScorer):
+            return cls(scorer.num_features, scorer.medians, scorer.means, scorer.scales,
+                       scorer.club_fill, list(scorer.club_weights))
+        return cls.from_pipeline(scorer.pipeline)
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        # Whatever the final estimator (--select may pick a non-linear one), the preprocess step is the same
+        try:
+            transformers = {name: (transformer, columns)
+                            for name, transformer, columns in pipeline.named_steps["preprocess"].transformers_}
+            num, num_features = transformers["num"]
+            cat, cat_features = transformers["cat"]
+            if list(cat_features) != CAT_FEATURES or sorted(num_features) != sorted(NUM_FEATURES):
+                raise ValueError(f"unexpected feature columns: {num_features} / {cat_features}")
+            scaler = num.named_steps["scaler"]
+            n_num = len(num_features)
+            return cls(
+                num_features,
+                num.named_steps["imputer"].statistics_,
+                scaler.mean_ if scaler.mean_ is not None else np.zeros(n_num),
+                scaler.scale_ if scaler.scale_ is not None else np.ones(n_num),
+                cat.named_steps["imputer"].statistics_[0],
+                list(cat.named_steps["onehot"].categories_[0]),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"unsupported pipeline layout: {e!r}")
+
+    def impute(self, record):
+        """The record as the model sees it: a (introversion, risk, club, hours) key."""
+        return tuple(
+            (self.club_fill if _missing(record[feature]) else record[feature]) if feature == "club_top1"
+            else _plain(self.medians[feature] if _missing(record[feature]) else record[feature])
+            for feature in FEATURE_ORDER
+        )
+
+    def impute_columns(self, columns):
+        """``impute`` for every row of a feature -> array mapping, vectorized per column."""
+        values = []
+        for feature in FEATURE_ORDER:
+            column = columns[feature]
+            if feature == "club_top1":
+                values.append([self.club_fill if _missing(club) else club for club in column])
+            else:
+                number = np.asarray(column, dtype=float)
+                values.append(np.where(np.isnan(number), self.medians[feature], number).tolist())
+        return list(zip(*values))
+
+    def transform(self, keys):
+        """Feature-space vectors (one row per key) for imputed keys."""
+        positions = [FEATURE_ORDER.index(feature) for feature in self.num_features]
+        vectors = np.zeros((len(keys), self.dimensions))
+        if keys:
+            num = np.array([[key[p] for p in positions] for key in keys], dtype=float)
+            vectors[:, :len(positions)] = (num - self.means) / self.scales
+            club_position = FEATURE_ORDER.index("club_top1")
+            for i, key in enumerate(keys):
+                # Unknown clubs encode to all zeros, as OneHotEncoder(handle_unknown="ignore") does
+                column = self.clubs.get(key[club_position])
+                if column is not None:
+                    vectors[i, len(positions) + column] = 1.0
+        return vectors
+
+
+class PartnerIndex:
+    """Stored students grouped by their point in a FeatureSpace."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.space = None
+        self.model_version = None
+        self.rows = 0
+        self._reset(0)
+
+    def _reset(self, dimensions):
+        self._slots = {}
+        self._keys = []
+        self._members = []
+        self._points = np.zeros((16, dimensions))
+        self._row_point = np.zeros(1024, dtype=np.int64)
+
+    def seed(self, space, history, model_version):
+        """Rebuild from ``history`` (feature -> array over every stored row) in ``space``.
+
+        With ``space`` None (a model without a supported ``preprocess`` step)
+        the index is emptied and stays disabled until the next seed.
+        """
+        keys = space.impute_columns(history) if space is not None else []
+        with self.lock:
+            self.space = space
+            self.model_version = model_version
+            self.rows = 0
+            self._reset(space.dimensions if space is not None else 0)
+            self._add(keys)
+
+    def update(self, rows):
+        """Index newly stored rows (column -> value dicts, in store order)."""
+        with self.lock:
+            if self.space is not None:
+                self._add([self.space.impute(row) for row in rows])
+
+    def _add(self, keys):
+        new = []
+        points = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self._keys)
+                # History columns are floats; report the scales as integers
+                key = tuple(_plain(value) for value in key)
+                self._keys.append(key)
+                self._members.append([])
+                new.append(key)
+            self._members[slot].append(self.rows + i)
+            points[i] = slot
+        if new:
+            first = len(self._keys) - len(new)
+            self._points = _grow(self._points, len(self._keys))
+            self._points[first:len(self._keys)] = self.space.transform(new)
+        self._row_point = _grow(self._row_point, self.rows + len(keys))
+        self._row_point[self.rows:self.rows + len(keys)] = points
+        self.rows += len(keys)
+
+    def key_of(self, row):
+        """The imputed features of a stored row."""
+        with self.lock:
+            if not 0 <= row < self.rows:
+                raise IndexError(f"row {row} is not indexed")
+            return self._keys[self._row_point[row]]
+
+    def query(self, key, k, exclude=None):
+        """The ``k`` stored rows closest to the imputed ``key``, as (row, distance, key) tuples.
+
+        Rows at the same point are returned in storage order; ``exclude``
+        leaves one row (the student asking) out.
+        """
+        with self.lock:
+            points = len(self._keys)
+            if points == 0 or k <= 0:
+                return []
+            q = self.space.transform([key])[0]
+            difference = self._points[:points] - q
+            distances = np.einsum("ij,ij->i", difference, difference)
+            # Every point holds at least one row, so k + 1 points cover k rows even with one excluded
+            nearest = min(points, k + 1)
+            if nearest < points:
+                candidates = np.argpartition(distances, nearest - 1)[:nearest]
+            else:
+                candidates = np.arange(points)
+            candidates = candidates[np.argsort(distances[candidates], kind="stable")]
+
+            partners = []
+            for point in candidates.tolist():
+                distance = math.sqrt(float(distances[point]))
+                for row in self._members[point]:
+                    if row == exclude:
+                        continue
+                    partners.append((row, distance, self._keys[point]))
+                    if len(partners) == k:
+                        return partners
+            return partners
+
+    def stats(self):
+        with self.lock:
+            return {"rows": self.rows, "points": len(self._keys), "model_version": self.model_version}
+
+
+def _grow(array, size):
+    if size <= len(array):
+        return array
+    grown = np.zeros((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def describe(key):
+    return dict(zip(FEATURE_ORDER, key))
@@ -0,0 +1,133 @@
+"""Model-versioned cache of per-row predictions over the submission history.
+
+Evaluating the model on the stored history (accuracy, confusion matrix) only
+needs predictions for rows that were appended since the last evaluation:
+predictions are persisted per model fingerprint, indexed by row offset, and
+dropped automatically when a different model is deployed.
+
+The backend and the dashboard share the cache directory with different
+models, so each ``role`` keeps and evicts only its own files. Next to the
+predictions the cache records which store they were computed on (the store's
+``identity()``); if the store is replaced or rewritten, the offsets no longer
+mean anything and the predictions are dropped.
+"""
+import glob
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+from aggregates import EVAL_COLUMNS, NOT_EVALUATED
+
+
+def model_fingerprint(path):
+    """Content hash of a model artifact."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+class PredictionCache:
+    """Append-only int8 file of predictions, one byte per stored row."""
+
+    def __init__(self, cache_dir, fingerprint, role="backend"):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.fingerprint = fingerprint
+        self.path = os.path.join(cache_dir, f"predictions-{role}-{fingerprint}.i8")
+        self.meta_path = self.path[:-len(".i8")] + ".json"
+        # Set by check(); recorded with the first predictions
+        self.identity = None
+        # Predictions this role made with any other model are stale
+        stale_files = glob.glob(os.path.join(cache_dir, f"predictions-{role}-*"))
+        # Caches from before roles existed were named after the fingerprint alone
+        stale_files += glob.glob(os.path.join(cache_dir, "predictions-" + "?" * 16 + ".i8"))
+        for stale in stale_files:
+            if stale not in (self.path, self.meta_path):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass  # another process of the same role got there first
+
+    def _meta(self):
+        try:
+            with open(self.meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def check(self, store):
+        """Drop the predictions unless they were made on the history ``store`` holds; call before reading it."""
+        meta = self._meta()
+        if meta is not None and store.identity(meta["end"]) != meta:
+            self.reset()
+            meta = None
+        if meta is None and os.path.exists(self.path):
+            # Predictions without a record of their store cannot be trusted
+            self.reset()
+        self.identity = meta or store.identity()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return np.empty(0, dtype=np.int8)
+        return np.fromfile(self.path, dtype=np.int8)
+
+    def extend(self, offset, predictions):
+        """Store predictions for rows starting at ``offset``."""
+        if offset == 0 and self.identity is not None:
+            tmp = f"{self.meta_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(self.identity, f)
+            os.replace(tmp, self.meta_path)
+        with open(self.path, "ab") as f:
+            # Another process may have cached these rows already
+            if f.tell() != offset:
+                return
+            f.write(np.asarray(predictions, dtype=np.int8).tobytes())
+
+    def reset(self):
+        for path in (self.path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _complete(history, start):
+    rows = len(history["teamwork_preference"]) - start
+    complete = np.ones(rows, dtype=bool)
+    for column in EVAL_COLUMNS:
+        values = history[column][start:]
+        if column == "club_top1":
+            complete &= np.fromiter((not (value is None or (isinstance(value, float) and math.isnan(value)))
+                                     for value in values), dtype=bool, count=rows)
+        else:
+            complete &= ~np.isnan(np.asarray(values, dtype=float))
+    return complete
+
+
+def predict_history(history, scorer, cache=None):
+    """Predictions (1 = Team, 0 = Solo, -1 = not evaluated) for every row of ``history``.
+
+    With a cache only rows past the cached offset are scored.
+    """
+    rows = len(history["teamwork_preference"])
+    cached = cache.load() if cache is not None else np.empty(0, dtype=np.int8)
+    if len(cached) > rows:
+        # The store was replaced or truncated; offsets no longer line up
+        cache.reset()
+        cached = cached[:0]
+
+    start = len(cached)
+    fresh = np.full(rows - start, NOT_EVALUATED, dtype=np.int8)
+    complete = _complete(history, start)
+    if complete.any():
+        labels = scorer.predict({feature: np.asarray(history[feature])[start:][complete]
+                                 for feature in EVAL_COLUMNS[1:]})
+        fresh[complete] = labels == scorer.classes[1]
+
+    if cache is not None and len(fresh):
+        cache.extend(start, fresh)
+    return np.concatenate([cached, fresh])
+
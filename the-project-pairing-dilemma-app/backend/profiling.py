@@ -0,0 +1,172 @@
+"""Opt-in profiling of single requests.
+
+With ``EDUPAIR_PROFILING=1`` the backend profiles any request sent with an
+``X-Profile: 1`` header. The profile collects:
+
+- the time spent in each ``metrics.timed`` stage (validation, frame,
+  predict_proba, store_read, store_append, store_commit, ...)
+- cProfile statistics of the request's work in executor threads, reduced to
+  the top functions by cumulative time. The event loop interleaves every
+  request's coroutines, so it is not profiled; its time shows up in the stages
+
+The stage breakdown is returned in a ``Server-Timing`` response header and the
+full report is written to the event log. Requests without the header never see a
+profile: ``current_profile()`` returns None and every hook is a no-op.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import uuid
+
+_current = contextvars.ContextVar("edupair_profile", default=None)
+# The profile of the request being served in this context, or None
+current_profile = _current.get
+
+# cProfile hooks are per thread, so only the executor threads running a
+# request's work are profiled, and only one request at a time gets function
+# statistics; others get stages only. From Python 3.12 the hooks are per
+# interpreter, and work other threads do meanwhile is counted as well.
+_functions_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, functions=True):
+        self.id = uuid.uuid4().hex[:12]
+        self.functions = functions
+        self.started = time.perf_counter()
+        self.stages = {}
+        self._profilers = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def start_profiler(self):
+        """Start a cProfile.Profile on the calling thread; None if not collecting functions."""
+        if not self.functions:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active
+            return None
+        with self._lock:
+            self._profilers.append(profiler)
+        return profiler
+
+    def top_functions(self, top):
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0], stream=io.StringIO())
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.sort_stats("cumulative")
+        functions = []
+        for function in stats.fcn_list[:top]:
+            _, calls, own, cumulative, _ = stats.stats[function]
+            functions.append({
+                "function": pstats.func_std_string(function),
+                "calls": calls,
+                "cumulative_ms": round(cumulative * 1000, 3),
+                "own_ms": round(own * 1000, 3),
+            })
+        return functions
+
+    def report(self, top=20):
+        with self._lock:
+            stages = {stage: {"ms": round(seconds * 1000, 3), "calls": calls}
+                      for stage, (seconds, calls) in self.stages.items()}
+        return {
+            "id": self.id,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": stages,
+            "functions": self.top_functions(top),
+        }
+
+
+def traced(fn):
+    """``fn`` wrapped to run under the current request's profiler, if it has one."""
+    profile = _current.get()
+    if profile is None or not profile.functions:
+        return fn
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        profiler = profile.start_profiler()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+    return run
+
+
+def server_timing(report):
+    entries = [f"{stage};dur={stage_report['ms']}" for stage, stage_report in report["stages"].items()]
+    entries.append(f"total;dur={report['total_ms']}")
+    return ", ".join(entries)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests that ask for it with ``X-Profile: 1``."""
+
+    def __init__(self, app, log_path=None, top=20, logger=None):
+        self.app = app
+        self.log_path = log_path
+        self.top = top
+        self.logger = logger
+        self._log_lock = threading.Lock()
+
+    @staticmethod
+    def _requested(scope):
+        for name, value in scope.get("headers", ()):
+            if name == b"x-profile":
+                return value.strip().lower() in (b"1", b"true")
+        return False
+
+    def _log(self, report):
+        if self.logger is not None:
+            self.logger.event("profile", **report)
+        else:
+            print(f"Profile {report['method']} {report['path']}: {json.dumps(report)}")
+        if self.log_path:
+            line = json.dumps(report)
+            with self._log_lock, open(self.log_path, "a") as f:
+                f.write(line + "\n")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(functions=_functions_lock.acquire(blocking=False))
+        token = _current.set(profile)
+
+        async def send_with_report(message):
+            if message["type"] == "http.response.start":
+                report = {"method": scope["method"], "path": scope["path"], **profile.report(self.top)}
+                self._log(report)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(report).encode()))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            _current.reset(token)
+            if profile.functions:
+                _functions_lock.release()
@@ -0,0 +1,177 @@
+"""Versioned model registry and the watcher that hot-reloads from it.
+
+Layout of the registry directory::
+
+    manifest.json      {"current": "v0002", "versions": [{"version": "v0001", ...}, ...]}
+    v0001/model.pkl    the sklearn Pipeline ("pipeline" artifact)
+    v0001/model.npz    its extracted parameters ("compiled" artifact, see scoring.CompiledScorer.save)
+    v0002/...
+
+Artifacts are copied in before the manifest is replaced, and the manifest is
+replaced atomically, so a reader never sees a version whose file is missing.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from prediction_cache import model_fingerprint
+
+MANIFEST = "manifest.json"
+
+
+class ModelRegistry:
+    def __init__(self, root):
+        self.root = root
+
+    def manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        if not os.path.exists(path):
+            return {"current": None, "versions": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.root, MANIFEST)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, path)
+
+    def entry(self, version=None):
+        """The manifest entry for ``version`` (default: the current one), or None."""
+        manifest = self.manifest()
+        version = version or manifest["current"]
+        for entry in manifest["versions"]:
+            if entry["version"] == version:
+                return entry
+        return None
+
+    def resolve(self, version=None, fallback=None, kind="pipeline"):
+        """Path of the ``kind`` artifact and the version to report.
+
+        Without a registered current version, ``fallback`` (the legacy
+        model.pkl or model.npz) is served under its content fingerprint.
+        """
+        entry = self.entry(version)
+        if entry is not None:
+            if kind not in entry["artifacts"]:
+                raise LookupError(f"Model {entry['version']} has no {kind} artifact")
+            return os.path.join(self.root, entry["artifacts"][kind]), entry["version"]
+        if version is not None:
+            raise LookupError(f"Unknown model version: {version}")
+        if fallback is None or not os.path.exists(fallback):
+            raise LookupError(f"No model registered in {self.root}")
+        return fallback, model_fingerprint(fallback)
+
+    def publish(self, artifacts, metadata=None, activate=True):
+        """Copy ``artifacts`` (kind -> file) in as the next version and (by default) make it current."""
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.manifest()
+        version = f"v{len(manifest['versions']) + 1:04d}"
+        os.makedirs(os.path.join(self.root, version), exist_ok=True)
+        names = {}
+        for kind, artifact in artifacts.items():
+            names[kind] = os.path.join(version, os.path.basename(artifact))
+            tmp = os.path.join(self.root, names[kind] + ".tmp")
+            shutil.copyfile(artifact, tmp)
+            os.replace(tmp, os.path.join(self.root, names[kind]))
+
+        entry = {
+            "version": version,
+            "artifacts": names,
+            "fingerprints": {kind: model_fingerprint(artifact) for kind, artifact in artifacts.items()},
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            **(metadata or {}),
+        }
+        manifest["versions"].append(entry)
+        if activate:
+            manifest["current"] = version
+        self._write_manifest(manifest)
+        return entry
+
+    def activate(self, version):
+        """Point ``current`` at an already published version (e.g. to roll back)."""
+        manifest = self.manifest()
+        if not any(entry["version"] == version for entry in manifest["versions"]):
+            raise LookupError(f"Unknown model version: {version}")
+        manifest["current"] = version
+        self._write_manifest(manifest)
+
+
+class ServingModel:
+    """Everything that belongs to one loaded model version.
+
+    Request handlers take a reference once and use it throughout, so a swap
+    never mixes two versions within a request.
+    """
+
+    def __init__(self, version, fingerprint, path, scorer):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.path = path
+        self.scorer = scorer
+        self.loaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def info(self):
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "scorer": self.scorer.name,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class RegistryWatcher:
+    """Poll the registry and call ``on_change(version)`` when ``current`` moves.
+
+    Failures go to ``log`` (an eventlog.EventLogger) when given, else to stdout.
+    """
+
+    def __init__(self, registry, serving_version, on_change, interval=5.0, log=None):
+        self.registry = registry
+        self.serving_version = serving_version
+        self.on_change = on_change
+        self.interval = interval
+        self.log = log
+        self._failed = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                entry = self.registry.entry()
+            except (OSError, ValueError) as e:
+                if self.log is not None:
+                    self.log.error("registry_read_failed", error=str(e))
+                else:
+                    print(f"Could not read the model registry: {e}")
+                continue
+            if entry is None or entry["version"] in (self.serving_version(), self._failed):
+                continue
+            started = time.perf_counter()
+            try:
+                self.on_change(entry["version"])
+                self._failed = None
+                if self.log is not None:
+                    self.log.event("model_watch_reload", version=entry["version"],
+                                   seconds=time.perf_counter() - started)
+                else:
+                    print(f"Model {entry['version']} loaded in {time.perf_counter() - started:.2f}s")
+            except Exception as e:
+                # Keep serving the old model; retry only once a different version is published
+                self._failed = entry["version"]
+                if self.log is not None:
+                    self.log.error("model_reload_failed", version=entry["version"], error=str(e))
+                else:
+                    print(f"Loading model {entry['version']} failed: {e}")
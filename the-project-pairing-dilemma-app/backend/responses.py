@@ -0,0 +1,121 @@
+"""JSON responses serialized once, with orjson when it is installed.
+
+``FastJSONResponse`` skips FastAPI's ``jsonable_encoder`` pass and encodes
+with orjson (NumPy scalars and int dictionary keys included), falling back to
+the standard library ``json`` module.
+
+``CachedJSON`` keeps the encoded (and gzipped) body of a slow-changing
+response together with its ETag, so repeated polls are answered from memory
+or with ``304 Not Modified``. The ETag is a weak hash of the body, so every
+server process that would send the same content sends the same ETag.
+"""
+import gzip
+import hashlib
+import json
+import threading
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Smaller bodies are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    if orjson is not None:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+
+def accepts_gzip(request):
+    return "gzip" in request.headers.get("accept-encoding", "")
+
+
+def content_etag(body):
+    # Weak: the plain and the gzipped body are the same representation
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def matching_etag(request, etag):
+    """Whether If-None-Match names ``etag``, by weak comparison."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class CachedJSON:
+    """The encoded body of one response, reused for as long as its state version."""
+
+    def __init__(self, compress=True):
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._entry = None
+
+    def get(self, version):
+        with self._lock:
+            if version != self._version:
+                return None
+            self.hits += 1
+            return self._entry
+
+    def put(self, version, content):
+        body = dumps(content)
+        gzipped = None
+        if self.compress and len(body) >= GZIP_MIN_BYTES:
+            gzipped = gzip.compress(body, compresslevel=6)
+        entry = (content_etag(body), body, gzipped)
+        with self._lock:
+            self.misses += 1
+            self._version, self._entry = version, entry
+        return entry
+
+    def response(self, request, version, snapshot):
+        """A 304, the cached body or a freshly encoded one, whichever applies.
+
+        ``version`` names the current state within this process and only
+        decides whether the cached body can be reused; ``snapshot()`` returns
+        a (version, content) pair taken together, in case the state moved on.
+        """
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        entry = self.get(version)
+        if entry is None:
+            version, content = snapshot()
+            entry = self.put(version, content)
+        etag, body, gzipped = entry
+        if matching_etag(request, etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=304, headers={**headers, "ETag": etag})
+        if gzipped is not None and accepts_gzip(request):
+            return Response(gzipped, media_type="application/json",
+                            headers={**headers, "ETag": etag, "Content-Encoding": "gzip"})
+        return Response(body, media_type="application/json", headers={**headers, "ETag": etag})
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "not_modified": self.not_modified}
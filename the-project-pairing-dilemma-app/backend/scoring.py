@@ -0,0 +1,465 @@
+"""Scorers that turn UserInput features into Solo/Team predictions.
+
+Both scorers expose the same interface:
+
+- ``score(columns)`` takes a mapping of feature name -> sequence and returns
+  ``(labels, proba)`` where ``proba`` has one ``[Solo, Team]`` row per input.
+- ``score_one(record)`` takes a single record dict and returns
+  ``(label, prob_solo, prob_team)`` from one pass over the model.
+"""
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from metrics import timed
+
+NUM_FEATURES = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours"]
+CAT_FEATURES = ["club_top1"]
+FEATURES = ["introversion_extraversion", "risk_taking", "club_top1", "weekly_hobby_hours"]
+
+# Input domain offered by the Streamlit form
+SCALE_RANGE = (1, 5)
+HOURS_RANGE = (0, 100)
+CLUB_OPTIONS = [
+    "Coding Club",
+    "Sports Club",
+    "Music Club",
+    "Cultural Club",
+    "Drama Club",
+    "Entrepreneurship Cell",
+    "Literary Club",
+    "Robotics Club",
+]
+
+
+def records_to_columns(records):
+    """Turn a list of record dicts into a feature -> list mapping."""
+    return {feature: [record[feature] for record in records] for feature in FEATURES}
+
+
+def _is_missing(value):
+    return value is None or _is_nan(value)
+
+
+def _is_nan(value):
+    # The pipeline imputes only NaN clubs; None is a category it has not seen
+    return isinstance(value, float) and math.isnan(value)
+
+
+def _sigmoid(z):
+    # Numerically stable logistic function, matches scipy.special.expit
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class PipelineScorer:
+    """Scores through the fitted sklearn Pipeline."""
+
+    name = "pipeline"
+    # CPU-bound sklearn work that should not run on the event loop
+    blocking = True
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self.classes = np.asarray(pipeline.classes_)
+
+    def score(self, columns):
+        import pandas as pd
+
+        with timed("frame"):
+            frame = pd.DataFrame({feature: columns[feature] for feature in FEATURES}, columns=FEATURES)
+        with timed("predict_proba"):
+            proba = self.pipeline.predict_proba(frame)
+        labels = self.classes[np.argmax(proba, axis=1)]
+        return labels, proba
+
+    def score_one(self, record):
+        labels, proba = self.score({feature: [record[feature]] for feature in FEATURES})
+        return labels[0], float(proba[0, 0]), float(proba[0, 1])
+
+    def predict(self, columns):
+        return self.score(columns)[0]
+
+
+class CompiledScorer:
+    """Logistic regression evaluated directly from the fitted pipeline parameters.
+
+    The pipeline is median imputation + StandardScaler on the numeric features,
+    most-frequent imputation + OneHotEncoder on the club, and a binary
+    LogisticRegression. All of that folds into a handful of floats.
+    """
+
+    name = "compiled"
+    blocking = False
+    # Identifies the .npz layout written by save()
+    ARTIFACT_FORMAT = "edupair-compiled-logreg"
+    ARTIFACT_VERSION = 1
+
+    def __init__(self, num_features, medians, means, scales, num_coef,
+                 cat_feature, club_fill, club_weights, intercept, classes):
+        self.num_features = list(num_features)
+        self.medians = np.asarray(medians, dtype=float)
+        self.means = np.asarray(means, dtype=float)
+        self.scales = np.asarray(scales, dtype=float)
+        self.num_coef = np.asarray(num_coef, dtype=float)
+        self.cat_feature = cat_feature
+        self.club_fill = club_fill
+        self.club_weights = {club: float(weight) for club, weight in club_weights.items()}
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+        # Provenance (sklearn version etc.) when loaded from an .npz artifact
+        self.manifest = None
+
+        # Plain Python copies for the single-row path
+        self._params = list(zip(self.num_features, self.medians.tolist(), self.means.tolist(),
+                                self.scales.tolist(), self.num_coef.tolist()))
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        """Extract the fitted parameters; raises ValueError for other model shapes."""
+        try:
+            preprocess = pipeline.named_steps["preprocess"]
+            model = pipeline.named_steps["model"]
+            transformers = {name: (transformer, columns)
+                            for name, transformer, columns in preprocess.transformers_}
+            num, num_features = transformers["num"]
+            cat, cat_features = transformers["cat"]
+
+            imputer = num.named_steps["imputer"]
+            scaler = num.named_steps["scaler"]
+            cat_imputer = cat.named_steps["imputer"]
+            onehot = cat.named_steps["onehot"]
+            coef = np.asarray(model.coef_, dtype=float)
+            # 0-d (a plain 0.0) when the model was fitted with fit_intercept=False
+            intercept = np.ravel(np.asarray(model.intercept_, dtype=float))
+            classes = np.asarray(model.classes_)
+        except (AttributeError, KeyError, TypeError) as e:
+            raise ValueError(f"unsupported pipeline layout: {e!r}")
+
+        if list(cat_features) != CAT_FEATURES or sorted(num_features) != sorted(NUM_FEATURES):
+            raise ValueError(f"unexpected feature columns: {num_features} / {cat_features}")
+        if len(classes) != 2 or coef.shape[0] != 1:
+            raise ValueError("only binary linear models can be compiled")
+        if getattr(onehot, "drop_idx_", None) is not None:
+            raise ValueError("OneHotEncoder(drop=...) is not supported")
+
+        categories = list(onehot.categories_[0])
+        n_num = len(num_features)
+        if coef.shape[1] != n_num + len(categories):
+            raise ValueError("coefficient count does not match the transformed features")
+
+        means = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_num)
+        scales = scaler.scale_ if scaler.scale_ is not None else np.ones(n_num)
+        return cls(
+            num_features=num_features,
+            medians=imputer.statistics_,
+            means=means,
+            scales=scales,
+            num_coef=coef[0, :n_num],
+            cat_feature=cat_features[0],
+            club_fill=cat_imputer.statistics_[0],
+            club_weights=dict(zip(categories, coef[0, n_num:])),
+            intercept=float(intercept[0]) if intercept.size else 0.0,
+            classes=classes,
+        )
+
+    def save(self, path, **manifest):
+        """Write the parameters to an .npz artifact that loads with NumPy alone.
+
+        ``manifest`` (e.g. ``sklearn_version``) is stored in the artifact.
+        """
+        manifest = {"format": self.ARTIFACT_FORMAT, "format_version": self.ARTIFACT_VERSION,
+                    "numpy_version": np.__version__, **manifest}
+        clubs = list(self.club_weights)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                num_features=np.array(self.num_features),
+                medians=self.medians,
+                means=self.means,
+                scales=self.scales,
+                num_coef=self.num_coef,
+                cat_feature=np.array(self.cat_feature),
+                club_fill=np.array(self.club_fill),
+                clubs=np.array(clubs, dtype=str),
+                club_coef=np.array([self.club_weights[club] for club in clubs], dtype=float),
+                intercept=np.array(self.intercept),
+                classes=self.classes,
+                manifest=np.array(json.dumps(manifest)),
+            )
+        os.replace(tmp, path)
+        return manifest
+
+    @classmethod
+    def load(cls, path):
+        """Load an artifact written by ``save``; raises ValueError for other files."""
+        with np.load(path, allow_pickle=False) as data:
+            manifest = json.loads(data["manifest"].item())
+            if (manifest.get("format") != cls.ARTIFACT_FORMAT
+                    or manifest.get("format_version", 0) > cls.ARTIFACT_VERSION):
+                raise ValueError(f"unsupported model artifact: {manifest.get('format')} "
+                                 f"v{manifest.get('format_version')}")
+            scorer = cls(
+                num_features=data["num_features"].tolist(),
+                medians=data["medians"],
+                means=data["means"],
+                scales=data["scales"],
+                num_coef=data["num_coef"],
+                cat_feature=data["cat_feature"].item(),
+                club_fill=data["club_fill"].item(),
+                club_weights=dict(zip(data["clubs"].tolist(), data["club_coef"].tolist())),
+                intercept=data["intercept"].item(),
+                classes=data["classes"],
+            )
+        scorer.manifest = manifest
+        return scorer
+
+    def decision_function(self, columns):
+        num = np.column_stack([np.asarray(columns[feature], dtype=float) for feature in self.num_features])
+        num = np.where(np.isnan(num), self.medians, num)
+        z = ((num - self.means) / self.scales) @ self.num_coef + self.intercept
+
+        weights = self.club_weights
+        fill = weights.get(self.club_fill, 0.0)
+        clubs = columns[self.cat_feature]
+        z += np.fromiter((fill if _is_nan(club) else weights.get(club, 0.0) for club in clubs),
+                         dtype=float, count=len(z))
+        return z
+
+    def score(self, columns):
+        z = self.decision_function(columns)
+        team = np.empty_like(z)
+        positive = z >= 0
+        team[positive] = 1.0 / (1.0 + np.exp(-z[positive]))
+        e = np.exp(z[~positive])
+        team[~positive] = e / (1.0 + e)
+        proba = np.column_stack([1.0 - team, team])
+        labels = self.classes[(z > 0).astype(int)]
+        return labels, proba
+
+    def score_one(self, record):
+        z = self.intercept
+        for feature, median, mean, scale, coef in self._params:
+            value = record[feature]
+            if _is_missing(value):
+                value = median
+            z += (value - mean) / scale * coef
+        club = record[self.cat_feature]
+        if _is_nan(club):
+            club = self.club_fill
+        z += self.club_weights.get(club, 0.0)
+
+        prob_team = _sigmoid(z)
+        return self.classes[1 if z > 0 else 0], 1.0 - prob_team, prob_team
+
+    def predict(self, columns):
+        return self.classes[(self.decision_function(columns) > 0).astype(int)]
+
+
+class TableScorer:
+    """Precomputed predictions for every point of the form's input domain.
+
+    Lookups are served from a dense array indexed by
+    (introversion, risk, club, hours); anything outside the table is
+    delegated to the live scorer. Only lookups made through ``counted``
+    (the /predict paths) count towards the reported hit rate.
+    """
+
+    def __init__(self, live, clubs=CLUB_OPTIONS, scale_range=SCALE_RANGE, hours_range=HOURS_RANGE):
+        self.live = live
+        self.name = f"table+{live.name}"
+        self.blocking = live.blocking
+        self.classes = live.classes
+        self.clubs = list(clubs)
+        self.club_index = {club: i for i, club in enumerate(self.clubs)}
+        self.scale_low, self.scale_high = scale_range
+        self.hours_low, self.hours_high = hours_range
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.counted = _CountedTable(self)
+
+        started = time.perf_counter()
+        n_scale = self.scale_high - self.scale_low + 1
+        shape = (n_scale, n_scale, len(self.clubs), self.hours_high - self.hours_low + 1)
+        intro, risk, club, hours = np.indices(shape).reshape(4, -1)
+        labels, proba = live.score({
+            "introversion_extraversion": (intro + self.scale_low).tolist(),
+            "risk_taking": (risk + self.scale_low).tolist(),
+            "club_top1": [self.clubs[i] for i in club],
+            "weekly_hobby_hours": (hours + self.hours_low).tolist(),
+        })
+        self.prob_team = np.ascontiguousarray(proba[:, 1]).reshape(shape)
+        self.label_index = (labels == self.classes[1]).astype(np.int8).reshape(shape)
+        # Flat Python lists make the single-row lookup a plain list index
+        self._flat_prob = self.prob_team.ravel().tolist()
+        self._flat_label = self.classes[self.label_index.ravel()].tolist()
+        self._strides = (shape[1] * shape[2] * shape[3], shape[2] * shape[3], shape[3])
+        self.build_seconds = time.perf_counter() - started
+
+    def _flat_index(self, record):
+        intro = record["introversion_extraversion"]
+        risk = record["risk_taking"]
+        hours = record["weekly_hobby_hours"]
+        club = self.club_index.get(record["club_top1"]) if isinstance(record["club_top1"], str) else None
+        if club is None or type(intro) is not int or type(risk) is not int or type(hours) is not int:
+            return -1
+        if not (self.scale_low <= intro <= self.scale_high and self.scale_low <= risk <= self.scale_high
+                and self.hours_low <= hours <= self.hours_high):
+            return -1
+        intro_stride, risk_stride, club_stride = self._strides
+        return ((intro - self.scale_low) * intro_stride + (risk - self.scale_low) * risk_stride
+                + club * club_stride + hours - self.hours_low)
+
+    def _count(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def score_one(self, record, count=False):
+        index = self._flat_index(record)
+        if count:
+            self._count(int(index >= 0), int(index < 0))
+        if index < 0:
+            return self.live.score_one(record)
+        prob_team = self._flat_prob[index]
+        return self._flat_label[index], 1.0 - prob_team, prob_team
+
+    def score(self, columns, count=False):
+        intro = np.asarray(columns["introversion_extraversion"], dtype=float)
+        risk = np.asarray(columns["risk_taking"], dtype=float)
+        hours = np.asarray(columns["weekly_hobby_hours"], dtype=float)
+        club = np.fromiter((self.club_index.get(c, -1) if isinstance(c, str) else -1
+                            for c in columns["club_top1"]), dtype=np.int64, count=len(intro))
+
+        hit = (club >= 0) & (intro == np.round(intro)) & (risk == np.round(risk)) & (hours == np.round(hours))
+        hit &= (intro >= self.scale_low) & (intro <= self.scale_high)
+        hit &= (risk >= self.scale_low) & (risk <= self.scale_high)
+        hit &= (hours >= self.hours_low) & (hours <= self.hours_high)
+
+        index = (np.where(hit, intro - self.scale_low, 0).astype(np.intp),
+                 np.where(hit, risk - self.scale_low, 0).astype(np.intp),
+                 np.where(hit, club, 0),
+                 np.where(hit, hours - self.hours_low, 0).astype(np.intp))
+        prob_team = self.prob_team[index]
+        labels = self.classes[self.label_index[index]]
+
+        n_hits = int(hit.sum())
+        if count:
+            self._count(n_hits, len(hit) - n_hits)
+        if n_hits < len(hit):
+            miss = np.flatnonzero(~hit)
+            miss_labels, miss_proba = self.live.score(
+                {feature: [columns[feature][i] for i in miss] for feature in FEATURES})
+            prob_team[miss] = miss_proba[:, 1]
+            labels[miss] = miss_labels
+        return labels, np.column_stack([1.0 - prob_team, prob_team])
+
+    def predict(self, columns):
+        return self.score(columns)[0]
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "live_scorer": self.live.name,
+            "entries": int(self.prob_team.size),
+            "bytes": int(self.prob_team.nbytes + self.label_index.nbytes),
+            "build_seconds": self.build_seconds,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+        }
+
+
+class _CountedTable:
+    """The same table, counting every lookup towards its hit rate."""
+
+    def __init__(self, table):
+        self.table = table
+        self.name = table.name
+        self.blocking = table.blocking
+        self.classes = table.classes
+
+    def score_one(self, record):
+        return self.table.score_one(record, count=True)
+
+    def score(self, columns):
+        return self.table.score(columns, count=True)
+
+    def predict(self, columns):
+        return self.score(columns)[0]
+
+
+def parity_grid(clubs):
+    """Feature grid covering the UserInput domain plus an unseen club."""
+    clubs = list(clubs) + ["__unseen_club__"]
+    grid = np.array(np.meshgrid(range(1, 6), range(1, 6), [0, 1, 5, 10, 20, 40, 100], range(len(clubs))),
+                    dtype=int).reshape(4, -1)
+    return {
+        "introversion_extraversion": grid[0].tolist(),
+        "risk_taking": grid[1].tolist(),
+        "weekly_hobby_hours": grid[2].tolist(),
+        "club_top1": [clubs[i] for i in grid[3]],
+    }
+
+
+def check_parity(pipeline, scorer, tol=1e-9):
+    """Raise ValueError if ``scorer`` disagrees with ``pipeline`` on the parity grid."""
+    columns = parity_grid(scorer.club_weights)
+    expected_labels, expected = PipelineScorer(pipeline).score(columns)
+    labels, proba = scorer.score(columns)
+
+    error = float(np.max(np.abs(proba - expected)))
+    if error > tol or not np.array_equal(labels, expected_labels):
+        raise ValueError(f"compiled scorer deviates from the pipeline (max abs error {error:.3g})")
+
+    # The single-row path must agree with the vectorized one
+    for i in range(0, len(labels), 97):
+        label, _, prob_team = scorer.score_one({feature: columns[feature][i] for feature in FEATURES})
+        if label != labels[i] or abs(prob_team - proba[i, 1]) > tol:
+            raise ValueError("compiled scorer single-row path deviates from the batch path")
+    return error
+
+
+def load_pipeline(path):
+    """The fitted Pipeline in a model.pkl, whether saved bare or as {"model": Pipeline}."""
+    import joblib
+
+    model_data = joblib.load(path)
+    if isinstance(model_data, dict):
+        return model_data.get("model", model_data)
+    return model_data
+
+
+def load_scorer(pipeline, mode="compiled", log=None):
+    """Build the scorer for ``mode``, falling back to the pipeline if it cannot be compiled.
+
+    The fallback is reported to ``log`` (an eventlog.EventLogger) when given, else to stdout.
+    """
+    if mode == "compiled":
+        try:
+            scorer = CompiledScorer.from_pipeline(pipeline)
+            check_parity(pipeline, scorer)
+            return scorer
+        except ValueError as e:
+            if log is not None:
+                log.event("compiled_scorer_unavailable", error=str(e))
+            else:
+                print(f"Compiled scorer unavailable, using the sklearn pipeline: {e}")
+    return PipelineScorer(pipeline)
+
+
+def warm_up(scorer, rows=32):
+    """Exercise both scoring paths once so the first real request pays no first-call costs."""
+    columns = {feature: values[:rows] for feature, values in parity_grid(CLUB_OPTIONS).items()}
+    scorer.score(columns)
+    for i in range(rows):
+        scorer.score_one({feature: columns[feature][i] for feature in FEATURES})
@@ -0,0 +1,119 @@
+"""Content-addressed cache for the stages of train.py.
+
+Each stage result is stored under a key that hashes the stage name and its
+inputs: file contents, parameters and the keys of the stages it depends on.
+A rerun on unchanged inputs loads the last stage's result instead of
+recomputing the chain, and a changed input reruns only the stages that
+depend on it. Results are pickled with joblib; a few entries are kept per
+stage so switching back and forth between two datasets stays cached.
+"""
+import glob
+import hashlib
+import json
+import os
+import time
+
+# Bytes hashed at each end of a prefix by prefix_fingerprint
+FINGERPRINT_BLOCK = 1 << 16
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def prefix_fingerprint(path, end):
+    """Cheap identity of bytes [0, end) of an append-only file: its length plus its first and last blocks."""
+    digest = hashlib.sha256(str(end).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(min(end, FINGERPRINT_BLOCK)))
+        f.seek(max(0, end - FINGERPRINT_BLOCK))
+        digest.update(f.read(end - f.tell()))
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    def __init__(self, root, enabled=True, keep=3):
+        self.root = root
+        self.enabled = enabled
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, stage, *inputs):
+        payload = json.dumps([stage, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def file_digest(self, path):
+        """Content hash of ``path``; rehashed only when its size or mtime changes."""
+        stat = os.stat(path)
+        identity = [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+        digests = self.state("digests") or {}
+        entry = digests.get(identity[0])
+        if entry is not None and entry[:2] == identity[1:]:
+            return entry[2]
+        digest = _hash_file(path)
+        digests[identity[0]] = identity[1:] + [digest]
+        self.set_state("digests", digests)
+        return digest
+
+    def _path(self, stage, key):
+        return os.path.join(self.root, f"{stage}-{key}.joblib")
+
+    def load(self, stage, key):
+        """(True, result) when ``stage`` has a result for ``key``, else (False, None)."""
+        import joblib
+
+        path = self._path(stage, key)
+        if not self.enabled or not os.path.exists(path):
+            return False, None
+        try:
+            result = joblib.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable cache entry {path}: {e}")
+            return False, None
+        # Recently used entries survive pruning
+        os.utime(path)
+        return True, result
+
+    def save(self, stage, key, result):
+        import joblib
+
+        if not self.enabled:
+            return
+        path = self._path(stage, key)
+        tmp = path + ".tmp"
+        joblib.dump(result, tmp)
+        os.replace(tmp, path)
+        entries = sorted(glob.glob(os.path.join(self.root, f"{stage}-*.joblib")), key=os.path.getmtime)
+        for stale in entries[:-self.keep]:
+            os.remove(stale)
+
+    def run(self, stage, key, compute):
+        """The cached result of ``stage`` for ``key``, or ``compute()``'s, which is then cached."""
+        started = time.perf_counter()
+        hit, result = self.load(stage, key)
+        if hit:
+            print(f"{stage}: cached ({key}, {time.perf_counter() - started:.2f}s)")
+            return result
+        result = compute()
+        self.save(stage, key, result)
+        print(f"{stage}: computed ({key}, {time.perf_counter() - started:.2f}s)")
+        return result
+
+    def state(self, name):
+        """Small JSON state kept next to the entries (e.g. how far the submissions were read)."""
+        path = os.path.join(self.root, f"{name}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def set_state(self, name, value):
+        path = os.path.join(self.root, f"{name}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
@@ -0,0 +1,513 @@
+"""Append-only submission store.
+
+Submissions are appended by a background writer thread. Callers only
+enqueue rows, so a write costs the same no matter how much history is
+stored; the writer group-commits everything that arrived within
+``commit_ms`` milliseconds (or as soon as ``commit_rows`` rows are waiting)
+in one go.
+
+Two on-disk formats share that front end: ``csv`` appends to
+``newdata.csv`` and ``columnar`` keeps memory-mapped NumPy segments plus a
+tail buffer (see columnar.py).
+
+The CSV store can be shared by several processes (``uvicorn --workers N``, the
+Streamlit app next to the API). With ``durability="locked"`` each group commit
+is written under an exclusive ``flock`` so rows from different processes never
+interleave; ``"fsync"`` also fsyncs every commit, and ``wait()`` on a sequence
+then acknowledges that the rows are on disk.
+"""
+import collections
+import contextlib
+import csv
+import io
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from metrics import PERSISTENCE_ERRORS, timed
+from profiling import current_profile
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DURABILITY = ("buffered", "locked", "fsync")
+# Layout of labels.csv: the students' own answers sent to POST /labels
+LABEL_COLUMNS = ["timestamp", "introversion_extraversion", "risk_taking", "club_top1", "weekly_hobby_hours",
+                 "teamwork_preference"]
+
+
+def complete_rows(path, start, size):
+    """Yield (offset, length, values) for the complete CSV rows in bytes [start, size) of ``path``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        consumed = [0]
+
+        def lines():
+            while consumed[0] + start < size:
+                line = f.readline(size - start - consumed[0])
+                # A row still being written by another process is left for later
+                if not line.endswith(b"\n"):
+                    return
+                consumed[0] += len(line)
+                yield line.decode("utf-8")
+
+        offset = start
+        for values in csv.reader(lines()):
+            yield offset, start + consumed[0] - offset, values
+            offset = start + consumed[0]
+
+
+def read_appended(path, columns, start=None):
+    """``columns`` of the rows stored in a CSV store from byte offset ``start`` on.
+
+    ``start`` defaults to the first row after the header. Returns
+    (column -> list of strings, offset just past the last complete row), so
+    the next call can pick up where this one ended.
+    """
+    with open(path, "rb") as f:
+        header_line = f.readline()
+        size = os.fstat(f.fileno()).st_size
+    header = next(csv.reader([header_line.decode("utf-8")]))
+    start = len(header_line) if start is None else start
+    positions = [header.index(column) for column in columns]
+    result = {column: [] for column in columns}
+    end = start
+    for offset, length, values in complete_rows(path, start, size):
+        for column, position in zip(columns, positions):
+            result[column].append(values[position] if position < len(values) else "")
+        end = offset + length
+    return result, end
+
+
+def count_rows(path):
+    """(rows, offset just past the last complete row) of a CSV store."""
+    with open(path, "rb") as f:
+        f.readline()
+        rows, end = 0, f.tell()
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                return rows, end
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                rows += chunk.count(b"\n")
+                end = f.tell() - len(chunk) + newline + 1
+
+
+def submission_row(record, prediction, timestamp=None):
+    """Build the stored row for a scored UserInput record."""
+    return {
+        "timestamp": timestamp or datetime.now().strftime(TIMESTAMP_FORMAT),
+        "introversion_extraversion": record["introversion_extraversion"],
+        "risk_taking": record["risk_taking"],
+        "club_top1": record["club_top1"],
+        "weekly_hobby_hours": record["weekly_hobby_hours"],
+        # Store the predicted teamwork preference on the 1-5 scale
+        "teamwork_preference": 5 if prediction == 1 else 1,
+    }
+
+
+class GroupCommitStore:
+    """Queue and background writer shared by the store formats.
+
+    Subclasses set ``columns`` and ``row_count`` before calling
+    ``_start_writer`` and implement ``_write(batch)``.
+    """
+
+    format = None
+
+    def __init__(self, commit_rows=256, commit_ms=5.0):
+        self.commit_rows = commit_rows
+        self.commit_interval = commit_ms / 1000.0
+
+        self.errors = 0
+        self.last_error = None
+        # Called as on_error(rows, error) from the writer thread instead of printing
+        self.on_error = None
+        self._pending = []
+        self._pending_since = None
+        self._enqueued = 0
+        self._committed = 0
+        self._urgent = 0
+        # (first, last) sequence ranges of recent commits that failed, with the error
+        self._failed = collections.deque(maxlen=256)
+        # Profiled requests waiting on the next commit
+        self._profiles = []
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _start_writer(self):
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+        self._writer = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._writer.start()
+
+    def _to_line(self, row):
+        values = [""] * len(self.columns)
+        for column, value in row.items():
+            position = self._positions.get(column)
+            if position is not None and value is not None:
+                values[position] = value
+        return values
+
+    def append(self, rows, wait=False, timeout=None):
+        """Queue rows for the writer and return their commit sequence number.
+
+        With ``wait=True`` this blocks until the rows have been written.
+        """
+        lines = [self._to_line(row) for row in rows]
+        profile = current_profile()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("submission store is closed")
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(lines)
+            self._enqueued += len(lines)
+            self.row_count += len(lines)
+            sequence = self._enqueued
+            if profile is not None:
+                self._profiles.append(profile)
+            self._cond.notify_all()
+        if wait:
+            self.wait(sequence, timeout)
+        return sequence
+
+    def wait(self, sequence, timeout=None):
+        """Block until the rows up to ``sequence`` have been written.
+
+        Returns False on timeout and raises OSError if the commit holding
+        ``sequence`` failed, so a True return acknowledges the write.
+        """
+        if not self._wait(sequence, timeout):
+            return False
+        with self._cond:
+            for first, last, error in self._failed:
+                if first < sequence <= last:
+                    raise OSError(f"Submissions were not saved: {error}")
+        return True
+
+    def _wait(self, sequence, timeout):
+        with self._cond:
+            self._urgent += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: self._committed >= sequence, timeout)
+            finally:
+                self._urgent -= 1
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been committed (or has failed)."""
+        with self._cond:
+            sequence = self._enqueued
+        return self._wait(sequence, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # Let the group fill up until the deadline unless someone is waiting on it
+                deadline = self._pending_since + self.commit_interval
+                while (len(self._pending) < self.commit_rows and not self._urgent and not self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+                profiles, self._profiles = self._profiles, []
+                sequence = self._enqueued
+
+            started = time.perf_counter()
+            ok = self._commit(batch)
+            # The writer thread has no request context, so report the commit to profiled requests here
+            for profile in profiles:
+                profile.add("store_commit", time.perf_counter() - started)
+
+            with self._cond:
+                if not ok:
+                    self._failed.append((self._committed, sequence, self.last_error))
+                self._committed = sequence
+                self._cond.notify_all()
+
+    def _commit(self, batch):
+        try:
+            with timed("store_commit"):
+                self._write(batch)
+            return True
+        except OSError as e:
+            PERSISTENCE_ERRORS.inc(len(batch), ("store_commit",))
+            self.errors += 1
+            self.last_error = str(e)
+            if self.on_error is not None:
+                self.on_error(len(batch), e)
+            else:
+                print(f"Error saving {len(batch)} submissions to the {self.format} store: {e}")
+            return False
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def close(self):
+        """Commit everything still queued and stop the writer."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._close_files()
+
+    def _close_files(self):
+        pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "format": self.format,
+                "rows": self.row_count,
+                "pending": len(self._pending),
+                "committed": self._committed,
+                "errors": self.errors,
+            }
+
+
+class CsvSubmissionStore(GroupCommitStore):
+    """Append-only CSV log with a cached schema and group commit."""
+
+    format = "csv"
+
+    def __init__(self, path, commit_rows=256, commit_ms=5.0, parser="pandas", durability="buffered"):
+        super().__init__(commit_rows, commit_ms)
+        if durability not in DURABILITY:
+            raise ValueError(f"Unknown durability: {durability} (expected one of {', '.join(DURABILITY)})")
+        if durability != "buffered" and fcntl is None:
+            raise RuntimeError(f"durability={durability} needs fcntl file locks, which this platform lacks")
+        self.path = path
+        # "csv" reads the history with the csv module, keeping pandas out of the process
+        self.parser = parser
+        self.durability = durability
+        # Sparse row index for query(), built on the first query and kept up on append
+        self._index = None
+        self._index_lock = threading.Lock()
+
+        self._file = open(path, "a", newline="")
+        with self._locked():
+            if durability != "buffered":
+                self._repair_tail()
+            # The column schema and row count are read once, at startup
+            with open(path, newline="") as f:
+                reader = csv.reader(f)
+                self.columns = next(reader)
+                self.row_count = sum(1 for _ in reader)
+        self._start_writer()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the exclusive inter-process lock on the file (no-op when buffered)."""
+        if self.durability == "buffered":
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _repair_tail(self):
+        """Cut off a partial last row left by a process that died mid-write."""
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b"\n")
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if 0 < position < end:
+                f.truncate(position)
+                print(f"Dropped a partial row ({end - position} bytes) at the end of {self.path}")
+
+    def _write(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        ends = None
+        if self._index is None:
+            writer.writerows(batch)
+        else:
+            ends = []
+            for line in batch:
+                writer.writerow(line)
+                ends.append(buffer.tell())
+        text = buffer.getvalue()
+        with self._locked():
+            start = os.fstat(self._file.fileno()).st_size
+            self._file.write(text)
+            self._file.flush()
+            if self.durability == "fsync":
+                os.fsync(self._file.fileno())
+        if ends is not None:
+            self._index_batch(start, batch, text, ends)
+
+    def _index_batch(self, start, batch, text, ends):
+        timestamp = self._positions["timestamp"]
+        if text.isascii():
+            lengths = [end - begin for begin, end in zip([0] + ends[:-1], ends)]
+        else:
+            lengths = [len(text[begin:end].encode("utf-8")) for begin, end in zip([0] + ends[:-1], ends)]
+        with self._index_lock:
+            # Rows another process appended in between are picked up by the next query's catch-up
+            if self._index.end != start:
+                return
+            offset = start
+            for line, length in zip(batch, lengths):
+                self._index.add(offset, length, line[timestamp])
+                offset += length
+
+    def _records_from(self, start, size):
+        return complete_rows(self.path, start, size)
+
+    def _indexed(self):
+        """The sparse index, brought up to date with the file, as (rows, every, blocks)."""
+        from submissions import SparseIndex
+
+        with self._index_lock:
+            if self._index is None:
+                with open(self.path, "rb") as f:
+                    self._index = SparseIndex(len(f.readline()))
+            size = os.path.getsize(self.path)
+            if size > self._index.end:
+                timestamp = self._positions["timestamp"]
+                for offset, length, values in self._records_from(self._index.end, size):
+                    self._index.add(offset, length, values[timestamp] if len(values) > timestamp else "")
+            index = self._index
+            return index.rows, index.every, list(zip(index.offsets, index.low, index.high))
+
+    def query(self, query, cursor=0, limit=100):
+        """One page of stored rows matching ``query`` (a submissions.SubmissionQuery).
+
+        Returns (records, next cursor or None). Only the index blocks that can
+        hold a match are read.
+        """
+        from submissions import QUERY_COLUMNS, output_record
+
+        self.flush()
+        rows, every, blocks = self._indexed()
+        positions = [(column, self._positions[column]) for column in QUERY_COLUMNS]
+        results = []
+        with open(self.path, "rb") as f:
+            for block in range(cursor // every, len(blocks)):
+                offset, low, high = blocks[block]
+                if not query.may_match_range(low, high):
+                    continue
+                f.seek(offset)
+                first = block * every
+                reader = csv.reader(line.decode("utf-8") for line in f)
+                for row in range(first, min(first + every, rows)):
+                    values = next(reader)
+                    if row < cursor:
+                        continue
+                    record = {column: values[position] if position < len(values) else ""
+                              for column, position in positions}
+                    if query.matches(record):
+                        results.append(output_record(row, record))
+                        if len(results) == limit:
+                            return results, row + 1 if row + 1 < rows else None
+        return results, None
+
+    def _close_files(self):
+        self._file.close()
+
+    def identity(self, end=None):
+        """The file and a fingerprint of its first ``end`` bytes (default: all); None if it is shorter."""
+        from stage_cache import prefix_fingerprint
+
+        stat = os.stat(self.path)
+        end = stat.st_size if end is None else end
+        if end > stat.st_size:
+            return None
+        return {"file": [stat.st_dev, stat.st_ino], "end": end, "prefix": prefix_fingerprint(self.path, end)}
+
+    def read_frame(self, columns=None, rows=None, chunksize=None):
+        """Load the committed history (optionally only the first ``rows`` rows) as a DataFrame.
+
+        Only ``columns`` (default: the projected model columns) are parsed,
+        with compact dtypes; see loader.load_survey.
+        """
+        from loader import load_survey
+
+        self.flush()
+        return load_survey(self.path, columns=columns, rows=rows, chunksize=chunksize)
+
+    def read_columns(self, columns=None, rows=None):
+        """Plain NumPy columns of the committed history; see loader.to_columns."""
+        from loader import scan_columns, to_columns
+
+        if self.parser == "csv":
+            self.flush()
+            return scan_columns(self.path, columns, rows=rows)
+        return to_columns(self.read_frame(columns, rows=rows))
+
+    def follow(self, columns=None, position=None):
+        """Typed columns of the rows committed past ``position``, and the position after them.
+
+        ``position`` is one a previous call returned; None reads the whole
+        history as ``read_columns`` does. Rows other processes appended to the
+        file are included, in file order, so every reader numbers rows alike.
+        """
+        from loader import PROJECTED_COLUMNS, typed_columns
+
+        self.flush()
+        if position is None:
+            rows, end = count_rows(self.path)
+            return self.read_columns(columns, rows=rows), end
+        values, end = read_appended(self.path, list(columns or PROJECTED_COLUMNS), position)
+        return typed_columns(values), end
+
+    def export_csv(self, destination):
+        """Write the full history, in the newdata.csv layout, to ``destination``."""
+        self.flush()
+        shutil.copyfile(self.path, destination)
+        return destination
+
+
+def open_labels_store(path, **kwargs):
+    """Open labels.csv, creating it with its header on first use.
+
+    The main store's /predict rows carry the model's own prediction as
+    ``teamwork_preference``; only the answers kept here are trained on.
+    """
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", newline="") as f:
+            csv.writer(f).writerow(LABEL_COLUMNS)
+        # Another process may have created it in the meantime; theirs is kept
+        try:
+            os.link(tmp, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+    return CsvSubmissionStore(path, parser="csv", **kwargs)
+
+
+def open_store(path, format="csv", **kwargs):
+    """Open the submission store: ``newdata.csv`` for ``csv``, a directory for ``columnar``."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Submission store not found: {path}")
+    if format == "columnar":
+        from columnar import ColumnarSubmissionStore
+
+        return ColumnarSubmissionStore(path, **kwargs)
+    if format != "csv":
+        raise ValueError(f"Unknown store format: {format}")
+    return CsvSubmissionStore(path, **kwargs)
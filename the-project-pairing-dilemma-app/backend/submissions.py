@@ -0,0 +1,125 @@
+"""Paged queries over the stored submissions (``GET /submissions``).
+
+Both store formats answer ``store.query(query, cursor, limit)`` by skipping
+whole blocks of rows that cannot match. The CSV store keeps a ``SparseIndex``
+(the byte offset of every ``every``-th row plus the timestamp range of each
+block), so a page seeks straight to the right part of the file. The columnar
+store keeps the timestamp range of each segment in its meta.json.
+
+A cursor is the position of the next row to look at; rows are returned in
+the order they were stored.
+"""
+import math
+from datetime import datetime
+
+from store import TIMESTAMP_FORMAT
+
+QUERY_COLUMNS = ["timestamp", "introversion_extraversion", "risk_taking", "club_top1",
+                 "weekly_hobby_hours", "teamwork_preference"]
+PREFERENCES = ("Team", "Solo")
+
+
+def normalize_time(value):
+    """An ISO date or datetime in the stored timestamp format."""
+    return datetime.fromisoformat(value).strftime(TIMESTAMP_FORMAT)
+
+
+def valid_timestamp(value):
+    # Older survey rows carry mangled timestamps ("00:00.0") that time filters never match
+    return isinstance(value, str) and len(value) == 19 and value[4] == "-" and value[10] == " "
+
+
+def timestamp_range(values):
+    """(min, max) over the well-formed timestamps in ``values``, or (None, None)."""
+    valid = [value for value in values if valid_timestamp(value)]
+    return (min(valid), max(valid)) if valid else (None, None)
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def preference_of(teamwork_preference):
+    number = _number(teamwork_preference)
+    return "Team" if number is not None and number >= 4 else "Solo"
+
+
+class SubmissionQuery:
+    def __init__(self, since=None, until=None, club=None, preference=None):
+        self.since = since
+        self.until = until
+        self.club = club
+        self.preference = preference
+
+    @property
+    def timed(self):
+        return self.since is not None or self.until is not None
+
+    def may_match_range(self, low, high):
+        """Whether a block whose timestamps span [low, high] can hold a match."""
+        if not self.timed:
+            return True
+        if low is None:
+            return False
+        return (self.since is None or high >= self.since) and (self.until is None or low <= self.until)
+
+    def matches_time(self, timestamp):
+        if not self.timed:
+            return True
+        if not valid_timestamp(timestamp):
+            return False
+        return (self.since is None or timestamp >= self.since) and (self.until is None or timestamp <= self.until)
+
+    def matches(self, record):
+        """``record`` maps QUERY_COLUMNS to the stored (string or numeric) values."""
+        if self.club is not None and record["club_top1"] != self.club:
+            return False
+        if self.preference is not None and preference_of(record["teamwork_preference"]) != self.preference:
+            return False
+        return self.matches_time(record["timestamp"])
+
+
+def output_record(row, record):
+    result = {"id": row, "timestamp": record["timestamp"] or None}
+    for column in QUERY_COLUMNS[1:]:
+        if column == "club_top1":
+            result[column] = record[column] or None
+        else:
+            result[column] = _number(record[column])
+    result["preference"] = preference_of(record["teamwork_preference"])
+    return result
+
+
+class SparseIndex:
+    """Byte offset of every ``every``-th row, and the timestamp range of each block of rows."""
+
+    def __init__(self, data_start, every=1024):
+        self.every = every
+        self.offsets = []
+        self.low = []
+        self.high = []
+        # Rows and bytes covered so far
+        self.rows = 0
+        self.end = data_start
+
+    def add(self, offset, length, timestamp):
+        if self.rows % self.every == 0:
+            self.offsets.append(offset)
+            self.low.append(None)
+            self.high.append(None)
+        if valid_timestamp(timestamp):
+            block = len(self.offsets) - 1
+            if self.low[block] is None or timestamp < self.low[block]:
+                self.low[block] = timestamp
+            if self.high[block] is None or timestamp > self.high[block]:
+                self.high[block] = timestamp
+        self.rows += 1
+        self.end = offset + length
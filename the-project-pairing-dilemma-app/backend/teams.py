@@ -0,0 +1,178 @@
+"""Split a cohort into balanced teams using the preference model's scores.
+
+Every student is described by their predicted Team probability, their
+introversion score and their top club. Teams should end up with similar mean
+Team probability and introversion, and with as few club-mates as possible.
+
+1. Solo: the remainder that does not divide into full teams (or up to
+   ``max_solo`` students) is taken from the most confident Solo predictions;
+   they work alone instead of being squeezed into a team.
+2. Greedy: students are placed from the most extreme to the most typical. Each
+   goes to the open team where they pull the team's feature sums closest to
+   the cohort mean and add the fewest club-mates. The cost for all teams is
+   one vectorized expression.
+3. Local search: for each student, the best swap with any of a random sample
+   of students in other teams is found with one vectorized pass over the
+   sample. It is applied if it lowers the objective.
+
+The objective is the sum over teams of the squared deviation of the team's
+(standardized) feature sums from the cohort mean, plus ``club_weight`` per
+pair of team-mates sharing a club.
+"""
+import time
+
+import numpy as np
+
+
+def team_capacities(students, team_size):
+    """Sizes of the teams ``students`` are split into: team_size, or team_size + 1 for the leftovers."""
+    if students == 0:
+        return np.zeros(0, dtype=np.int64)
+    teams = max(1, students // team_size)
+    capacity = np.full(teams, students // teams, dtype=np.int64)
+    capacity[:students % teams] += 1
+    return capacity
+
+
+def _objective(sums, club_counts, club_weight):
+    return float((sums ** 2).sum() + club_weight * (club_counts * (club_counts - 1) / 2).sum())
+
+
+def form_teams(team_probability, introversion, clubs, team_size, max_solo=None, club_weight=1.0,
+               passes=1, candidates=512, seed=0):
+    """Assign students to teams.
+
+    Returns (team per student, with -1 for students working alone; stats dict).
+    """
+    if team_size < 2:
+        raise ValueError("team_size must be at least 2")
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    p = np.asarray(team_probability, dtype=float)
+    n = len(p)
+    intro = np.asarray(introversion, dtype=float)
+    intro = np.where(np.isnan(intro), np.nanmean(intro) if np.isfinite(intro).any() else 0.0, intro)
+    club_names, club = np.unique(np.asarray(["" if c is None else str(c) for c in clubs], dtype=object),
+                                 return_inverse=True)
+    # Students without a club have nobody to collide with
+    no_club = np.flatnonzero(club_names == "")
+    club_weights = np.ones(len(club_names))
+    club_weights[no_club] = 0.0
+
+    # 1. Students who work alone
+    remainder = n % team_size
+    max_solo = remainder if max_solo is None else max_solo
+    solo_leaning = np.flatnonzero(p < 0.5)
+    solo = solo_leaning[np.argsort(p[solo_leaning], kind="stable")][:max(0, max_solo)]
+    team = np.full(n, -1, dtype=np.int64)
+    placed = np.setdiff1d(np.arange(n), solo)
+    capacity = team_capacities(len(placed), team_size)
+    teams = len(capacity)
+
+    features = np.column_stack([p, intro])
+    scale = features[placed].std(axis=0) if len(placed) else np.ones(2)
+    scale[scale == 0] = 1.0
+    centered = (features - (features[placed].mean(axis=0) if len(placed) else 0.0)) / scale
+
+    # 2. Greedy placement, most extreme students first
+    sums = np.zeros((teams, centered.shape[1]))
+    sizes = np.zeros(teams, dtype=np.int64)
+    club_counts = np.zeros((teams, len(club_names)))
+    order = placed[np.argsort(-np.linalg.norm(centered[placed], axis=1), kind="stable")]
+    for i in order:
+        # ||S + v||^2 - ||S||^2 = 2 S.v + |v|^2; the last term is the same for every team
+        cost = 2.0 * sums @ centered[i] + club_weight * club_weights[club[i]] * club_counts[:, club[i]]
+        cost[sizes >= capacity] = np.inf
+        t = int(np.argmin(cost))
+        team[i] = t
+        sums[t] += centered[i]
+        sizes[t] += 1
+        club_counts[t, club[i]] += 1
+    greedy_seconds = time.perf_counter() - started
+    greedy_objective = _objective(sums, club_counts * club_weights, club_weight)
+
+    # 3. Local search with vectorized best-swap evaluation
+    swaps = 0
+    if teams > 1:
+        for _ in range(passes):
+            for i in rng.permutation(placed):
+                # Sampling with replacement is O(candidates); rng.choice without it is O(students)
+                pool = placed if len(placed) <= candidates else placed[rng.integers(0, len(placed), candidates)]
+                a, ci = team[i], club[i]
+                b, cj = team[pool], club[pool]
+                delta = centered[pool] - centered[i]
+                gain = 2.0 * np.einsum("ij,ij->i", delta, sums[a] - sums[b]) + 2.0 * np.einsum("ij,ij->i", delta, delta)
+                club_delta = (club_weights[cj] * (club_counts[a, cj] - club_counts[b, cj] + 1)
+                              + club_weights[ci] * (club_counts[b, ci] - club_counts[a, ci] + 1))
+                gain += club_weight * np.where(ci == cj, 0.0, club_delta)
+                gain[b == a] = np.inf
+                best = int(np.argmin(gain))
+                if gain[best] >= -1e-9:
+                    continue
+                j, b = pool[best], b[best]
+                sums[a] += centered[j] - centered[i]
+                sums[b] += centered[i] - centered[j]
+                club_counts[a, ci] -= 1
+                club_counts[a, club[j]] += 1
+                club_counts[b, club[j]] -= 1
+                club_counts[b, ci] += 1
+                team[i], team[j] = b, a
+                swaps += 1
+
+    stats = {
+        "students": n,
+        "teams": teams,
+        "solo": int(len(solo)),
+        "greedy_objective": greedy_objective,
+        "objective": _objective(sums, club_counts * club_weights, club_weight),
+        "swaps": swaps,
+        "greedy_seconds": greedy_seconds,
+        "seconds": time.perf_counter() - started,
+    }
+    return team, stats
+
+
+def balance(team, team_probability, introversion, clubs):
+    """Spread of the team means and the number of club-mate pairs, for judging an assignment."""
+    placed = team >= 0
+    if not placed.any():
+        return {"team_probability_std": 0.0, "introversion_std": 0.0, "shared_club_pairs": 0}
+    t = team[placed]
+    counts = np.bincount(t)
+    p_means = np.bincount(t, np.asarray(team_probability, dtype=float)[placed]) / counts
+    intro = np.asarray(introversion, dtype=float)[placed]
+    intro = np.where(np.isnan(intro), np.nanmean(intro), intro)
+    intro_means = np.bincount(t, intro) / counts
+    club_names, club = np.unique(np.asarray(["" if c is None else str(c) for c in clubs], dtype=object)[placed],
+                                 return_inverse=True)
+    pair_counts = np.unique(t * len(club_names) + club, return_counts=True)
+    keys, members = pair_counts
+    shared = members * (members - 1) // 2
+    shared[club_names[keys % len(club_names)] == ""] = 0
+    return {
+        "team_probability_std": float(p_means.std()),
+        "introversion_std": float(intro_means.std()),
+        "shared_club_pairs": int(shared.sum()),
+    }
+
+
+def team_summaries(team, ids, team_probability, introversion, clubs):
+    """Members, mean scores and club counts of every team, plus the ids of the solo students."""
+    p = np.asarray(team_probability, dtype=float)
+    intro = np.asarray(introversion, dtype=float)
+    placed = np.flatnonzero(team >= 0)
+    placed = placed[np.argsort(team[placed], kind="stable")]
+    bounds = np.flatnonzero(np.diff(team[placed])) + 1
+    summaries = []
+    for members in np.split(placed, bounds) if len(placed) else []:
+        club_counts = {}
+        for i in members:
+            club_counts[clubs[i]] = club_counts.get(clubs[i], 0) + 1
+        summaries.append({
+            "team": int(team[members[0]]),
+            "members": [ids[i] for i in members],
+            "mean_team_probability": float(p[members].mean()),
+            "mean_introversion": float(np.nanmean(intro[members])),
+            "clubs": club_counts,
+        })
+    return summaries, [ids[i] for i in np.flatnonzero(team < 0)]
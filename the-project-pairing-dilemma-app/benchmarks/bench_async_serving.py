@@ -0,0 +1,115 @@
+"""/predict latency while /data-summary is busy, for each serving mode.
+
+Each mode runs in its own process against a synthetic history. The busy
+summary is simulated by forcing a full reseed (as after a model change) on
+every /data-summary call, then /predict p50/p99 are compared with and
+without that background load.
+
+    python benchmarks/bench_async_serving.py --rows 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import backend_env, percentiles, synthetic_records, write_synthetic_csv
+
+MODES = {
+    "threadpool": {"EDUPAIR_SERVING": "threadpool"},
+    "async": {"EDUPAIR_SERVING": "async", "EDUPAIR_EVALUATION_PROCESSES": "1"},
+}
+
+
+async def predict_load(client, records, concurrency):
+    latencies = []
+    queue = list(records)
+
+    async def worker():
+        while queue:
+            record = queue.pop()
+            record = {key: value for key, value in record.items() if key != "teamwork_preference"}
+            started = time.perf_counter()
+            response = await client.post("/predict", json=record)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def summary_load(client, main, stop):
+    calls = 0
+    while not stop.is_set():
+        # Pretend a new model was deployed so the summary recomputes from scratch
+        main.aggregates.model_version = None
+        (await client.get("/data-summary")).raise_for_status()
+        calls += 1
+    return calls
+
+
+async def run_mode(requests, concurrency):
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        records = synthetic_records(requests, seed=3)
+        await predict_load(client, records[:50], concurrency)  # warm up
+
+        idle = await predict_load(client, records, concurrency)
+
+        stop = asyncio.Event()
+        summaries = asyncio.create_task(summary_load(client, main, stop))
+        await asyncio.sleep(0.05)
+        busy = await predict_load(client, records, concurrency)
+        stop.set()
+        summary_calls = await summaries
+
+        stats = (await client.get("/executors")).json()
+    return {
+        "predict_idle": percentiles(idle),
+        "predict_during_summary": percentiles(busy),
+        "summary_calls": summary_calls,
+        "executors": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="stored history size")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run_mode(args.requests, args.concurrency))))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = write_synthetic_csv(os.path.join(workdir, "newdata.csv"), args.rows)
+        for mode, env in MODES.items():
+            child_env = backend_env(workdir, EDUPAIR_DATA_PATH=data_path,
+                                  EDUPAIR_CACHE_DIR=os.path.join(workdir, f"cache-{mode}"), **env)
+            output = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--requests", str(args.requests),
+                 "--concurrency", str(args.concurrency)],
+                env=child_env, check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    report = json.dumps({"benchmark": "async_serving", "rows": args.rows, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""/predict throughput and latency with and without request coalescing.
+
+Each mode runs in its own backend process serving the sklearn Pipeline
+(``EDUPAIR_SCORER=pipeline``; the compiled scorer is never coalesced). For
+every concurrency level, that many clients send /predict calls back to back.
+Reported per level: requests per second, p50/p99 latency and, when
+coalescing, the mean batch size that was scored.
+
+    python benchmarks/bench_coalescing.py --concurrency 1 16 64 256 --window-ms 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import backend_dir, backend_env, newdata_path, percentiles, synthetic_records
+
+
+async def load(client, records, concurrency):
+    latencies = []
+    queue = list(records)
+
+    async def worker():
+        while queue:
+            record = queue.pop()
+            started = time.perf_counter()
+            response = await client.post("/predict", json=record)
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def run_mode(requests, levels):
+    import httpx
+
+    import main
+
+    records = [{key: value for key, value in record.items() if key != "teamwork_preference"}
+               for record in synthetic_records(requests, seed=11)]
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await load(client, records[:100], 8)  # warm up
+        for concurrency in levels:
+            before = main.coalescer.stats() if main.coalescer else None
+            latencies, wall = await load(client, records, concurrency)
+            result = {**percentiles(latencies), "requests_per_second": len(records) / wall}
+            if before is not None:
+                after = main.coalescer.stats()
+                if after["batches"] == before["batches"]:
+                    raise SystemExit(f"The coalescer scored no batches at concurrency {concurrency}")
+                result["mean_batch_size"] = ((after["requests"] - before["requests"])
+                                             / max(1, after["batches"] - before["batches"]))
+            results[str(concurrency)] = result
+    main.store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64, 256])
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_mode(args.requests, args.concurrency))))
+        return
+
+    modes = {
+        "direct": {"EDUPAIR_COALESCE_MS": "0"},
+        "coalesced": {"EDUPAIR_COALESCE_MS": str(args.window_ms), "EDUPAIR_COALESCE_MAX_BATCH": str(args.max_batch)},
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode, env in modes.items():
+            data_path = os.path.join(workdir, f"newdata-{mode}.csv")
+            shutil.copyfile(newdata_path, data_path)
+            child_env = backend_env(workdir, EDUPAIR_MODEL_FORMAT="pickle", EDUPAIR_SCORER="pipeline",
+                                  EDUPAIR_DATA_PATH=data_path,
+                                  EDUPAIR_CACHE_DIR=os.path.join(workdir, f"cache-{mode}"), **env)
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--requests", str(args.requests),
+                 "--concurrency", *map(str, args.concurrency)],
+                env=child_env, cwd=backend_dir, capture_output=True, text=True,
+            )
+            if child.returncode:
+                raise SystemExit(f"The {mode} run failed:\n{child.stderr}")
+            results[mode] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    report = json.dumps({"benchmark": "coalescing", "window_ms": args.window_ms, "max_batch": args.max_batch,
+                         "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Memory and time of the projected loader versus a full pd.read_csv.
+
+Writes a synthetic newdata.csv-shaped file (73 columns) and reports, for the
+current full read and for loader.load_survey (whole file and chunked),
+wall time, peak traced allocation and resident frame size.
+
+    python benchmarks/bench_loader.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from common import write_synthetic_csv
+from loader import load_survey
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    frame_bytes = fn()
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_mb": peak / 2**20, "frame_mb": frame_bytes / 2**20}
+
+
+def full_read(path):
+    return int(pd.read_csv(path).memory_usage(deep=True).sum())
+
+
+def projected_read(path):
+    return int(load_survey(path).memory_usage(deep=True).sum())
+
+
+def chunked_read(path, chunksize):
+    # Streaming consumers only ever hold one chunk
+    largest = 0
+    for chunk in load_survey(path, chunksize=chunksize):
+        largest = max(largest, int(chunk.memory_usage(deep=True).sum()))
+    return largest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=100_000)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = write_synthetic_csv(os.path.join(workdir, "newdata.csv"), args.rows)
+        results = {
+            "file_mb": os.path.getsize(path) / 2**20,
+            "read_csv_all_columns": measure(lambda: full_read(path)),
+            "load_survey_projected": measure(lambda: projected_read(path)),
+            "load_survey_chunked": measure(lambda: chunked_read(path, args.chunksize)),
+        }
+
+    report = json.dumps({"benchmark": "loader", "rows": args.rows, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Overhead of the /metrics instrumentation.
+
+Two measurements:
+
+- the cost of one ``timed(stage)`` block and one histogram ``observe``
+- /predict p50/p99 in fresh backend processes with EDUPAIR_METRICS=1 and 0
+
+    python benchmarks/bench_metrics.py --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import backend_dir, backend_env, newdata_path, percentiles, synthetic_records
+
+
+def micro(n):
+    import metrics
+
+    result = {}
+    for enabled in (True, False):
+        metrics.enabled = enabled
+        started = time.perf_counter()
+        for _ in range(n):
+            with metrics.timed("bench"):
+                pass
+        result[f"timed_{'on' if enabled else 'off'}_us"] = (time.perf_counter() - started) / n * 1e6
+    metrics.enabled = True
+
+    started = time.perf_counter()
+    for _ in range(n):
+        metrics.STAGE_SECONDS.observe(0.001, ("bench",))
+    result["observe_us"] = (time.perf_counter() - started) / n * 1e6
+    return result
+
+
+def serve(requests):
+    import httpx
+
+    import main
+
+    records = [{key: value for key, value in record.items() if key != "teamwork_preference"}
+               for record in synthetic_records(requests + 50, seed=5)]
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        samples = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for i, record in enumerate(records):
+                started = time.perf_counter()
+                (await client.post("/predict", json=record)).raise_for_status()
+                if i >= 50:
+                    samples.append(time.perf_counter() - started)
+        return samples
+
+    samples = asyncio.run(run())
+    main.store.close()
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=200_000, help="iterations of the micro benchmark")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(serve(args.requests)))
+        return
+
+    results = {"micro": micro(args.samples)}
+    with tempfile.TemporaryDirectory() as workdir:
+        for flag in ("1", "0"):
+            data_path = os.path.join(workdir, f"newdata-{flag}.csv")
+            shutil.copyfile(newdata_path, data_path)
+            env = backend_env(workdir, EDUPAIR_METRICS=flag, EDUPAIR_DATA_PATH=data_path,
+                              EDUPAIR_CACHE_DIR=os.path.join(workdir, f"cache-{flag}"))
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child",
+                                     "--requests", str(args.requests)],
+                                    env=env, check=True, capture_output=True, text=True, cwd=backend_dir).stdout
+            results[f"predict_metrics_{'on' if flag == '1' else 'off'}"] = json.loads(output.strip().splitlines()[-1])
+
+    report = json.dumps({"benchmark": "metrics", "requests": args.requests, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
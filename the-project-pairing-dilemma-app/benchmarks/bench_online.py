@@ -0,0 +1,182 @@
+"""Online learning throughput and accuracy next to periodic full retrains.
+
+A synthetic labeled stream is drawn from a known logistic model over the four
+features (with ``--drift``, its coefficients change halfway through). Both
+learners start from train.py's pipeline fitted on the first ``--warm-rows``
+rows, then see the rest of the stream in order:
+
+    online   ``online.OnlineLogisticRegression`` updated every ``--batch-size`` rows
+    retrain  train.py's pipeline refitted on every row so far, every ``--retrain-every`` rows
+
+Reported: updates and rows per second of the online model, the total refit
+time, progressive accuracy (each row predicted before it is learned from) and
+accuracy on a holdout drawn from the end of the stream, with the accuracy of
+the true model as the ceiling.
+
+    python benchmarks/bench_online.py --rows 200000 --batch-size 64 --retrain-every 20000 --drift
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from common import CLUBS
+
+NUM_FEATURES = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours"]
+
+
+def true_coefficients(drifted):
+    # Extraverts and risk takers prefer teams; after the drift hobby hours matter and the clubs trade places
+    clubs = np.linspace(-0.8, 0.8, len(CLUBS))
+    if drifted:
+        return {"intercept": 0.2, "introversion_extraversion": -0.9, "risk_taking": 0.3,
+                "weekly_hobby_hours": -0.06, "clubs": clubs[::-1]}
+    return {"intercept": 0.0, "introversion_extraversion": -0.8, "risk_taking": 0.5,
+            "weekly_hobby_hours": 0.0, "clubs": clubs}
+
+
+def labeled_stream(n, rng, drifted):
+    columns = {
+        "introversion_extraversion": rng.integers(1, 6, n),
+        "risk_taking": rng.integers(1, 6, n),
+        "weekly_hobby_hours": rng.integers(0, 41, n),
+        "club_top1": rng.integers(0, len(CLUBS), n),
+    }
+    z = np.zeros(n)
+    for start, end, coefficients in [(0, n // 2, true_coefficients(False)),
+                                     (n // 2, n, true_coefficients(drifted))]:
+        part = slice(start, end)
+        z[part] = (coefficients["intercept"]
+                   + coefficients["introversion_extraversion"] * (columns["introversion_extraversion"][part] - 3)
+                   + coefficients["risk_taking"] * (columns["risk_taking"][part] - 3)
+                   + coefficients["weekly_hobby_hours"] * (columns["weekly_hobby_hours"][part] - 20)
+                   + coefficients["clubs"][columns["club_top1"][part]])
+    labels = (rng.random(n) < 1.0 / (1.0 + np.exp(-z))).astype(int)
+    columns["club_top1"] = np.array(CLUBS, dtype=object)[columns["club_top1"]]
+    # The label the true model would predict, for the accuracy ceiling
+    return columns, labels, (z > 0).astype(int)
+
+
+def rows_of(columns, start, end):
+    return {feature: values[start:end] for feature, values in columns.items()}
+
+
+def make_pipeline():
+    # train.py's pipeline
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocess = ColumnTransformer(transformers=[
+        ("num", Pipeline(steps=[("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())]),
+         NUM_FEATURES),
+        ("cat", Pipeline(steps=[("imputer", SimpleImputer(strategy="most_frequent")),
+                                ("onehot", OneHotEncoder(handle_unknown="ignore"))]), ["club_top1"]),
+    ])
+    return Pipeline(steps=[("preprocess", preprocess),
+                           ("model", LogisticRegression(max_iter=5000, solver="liblinear"))])
+
+
+def fit_pipeline(columns, labels, end):
+    import pandas as pd
+
+    return make_pipeline().fit(pd.DataFrame(rows_of(columns, 0, end)), labels[:end])
+
+
+def pipeline_predict(pipeline, columns):
+    import pandas as pd
+
+    return pipeline.predict(pd.DataFrame(columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--warm-rows", type=int, default=1000)
+    parser.add_argument("--holdout", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--retrain-every", type=int, default=20_000)
+    parser.add_argument("--learning-rate", type=float, default=0.05)
+    parser.add_argument("--drift", action="store_true", help="change the true model halfway through the stream")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    from online import OnlineLogisticRegression
+    from scoring import CompiledScorer
+
+    rng = np.random.default_rng(7)
+    columns, labels, _ = labeled_stream(args.rows, rng, args.drift)
+    # The holdout follows the distribution at the end of the stream
+    holdout, holdout_labels, holdout_ceiling = labeled_stream(2 * args.holdout, rng, args.drift)
+    holdout = rows_of(holdout, args.holdout, 2 * args.holdout)
+    holdout_labels = holdout_labels[args.holdout:]
+    holdout_ceiling = holdout_ceiling[args.holdout:]
+
+    initial = fit_pipeline(columns, labels, args.warm_rows)
+    checkpoints = list(range(args.warm_rows + args.retrain_every, args.rows, args.retrain_every)) + [args.rows]
+
+    # Online: mini-batches, timed on their own
+    online = OnlineLogisticRegression.from_scorer(CompiledScorer.from_pipeline(initial),
+                                                  learning_rate=args.learning_rate)
+    online_curve = []
+    update_seconds = 0.0
+    start = args.warm_rows
+    for checkpoint in checkpoints:
+        for batch_start in range(start, checkpoint, args.batch_size):
+            batch_end = min(batch_start + args.batch_size, checkpoint)
+            started = time.perf_counter()
+            online.partial_fit(rows_of(columns, batch_start, batch_end), labels[batch_start:batch_end])
+            update_seconds += time.perf_counter() - started
+        start = checkpoint
+        online_curve.append(float((online.to_scorer().score(holdout)[0] == holdout_labels).mean()))
+
+    # Periodic retrains: each block is predicted by the model refitted before it
+    pipeline = initial
+    retrain_curve = []
+    retrain_seconds = []
+    correct = 0
+    start = args.warm_rows
+    for checkpoint in checkpoints:
+        correct += int((pipeline_predict(pipeline, rows_of(columns, start, checkpoint))
+                        == labels[start:checkpoint]).sum())
+        started = time.perf_counter()
+        pipeline = fit_pipeline(columns, labels, checkpoint)
+        retrain_seconds.append(time.perf_counter() - started)
+        start = checkpoint
+        retrain_curve.append(float((pipeline_predict(pipeline, holdout) == holdout_labels).mean()))
+
+    streamed = args.rows - args.warm_rows
+    results = {
+        "online": {
+            "updates": online.updates,
+            "update_seconds": update_seconds,
+            "updates_per_second": online.updates / update_seconds,
+            "rows_per_second": online.rows / update_seconds,
+            "progressive_accuracy": online.correct / online.rows,
+            "holdout_accuracy": online_curve[-1],
+        },
+        "retrain": {
+            "retrains": len(retrain_seconds),
+            "retrain_seconds": sum(retrain_seconds),
+            "last_retrain_seconds": retrain_seconds[-1],
+            "progressive_accuracy": correct / streamed,
+            "holdout_accuracy": retrain_curve[-1],
+        },
+        "true_model_holdout_accuracy": float((holdout_ceiling == holdout_labels).mean()),
+        # Holdout accuracy of both after each block of --retrain-every rows
+        "curve": {"rows": checkpoints, "online": online_curve, "retrain": retrain_curve},
+    }
+
+    report = json.dumps({"benchmark": "online", "rows": args.rows, "batch_size": args.batch_size,
+                         "retrain_every": args.retrain_every, "drift": args.drift, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
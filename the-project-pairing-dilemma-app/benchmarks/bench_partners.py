@@ -0,0 +1,113 @@
+"""/partners latency over a large synthetic history.
+
+A backend process serves a synthetic newdata.csv with ``--rows`` students.
+Reported: the time to build the partner index, the index query time, the
+same query as a brute-force scan over every stored row, /partners p50/p99
+through the app, and the cost of indexing a /predict submission.
+
+    python benchmarks/bench_partners.py --rows 100000 --queries 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from common import backend_dir, backend_env, percentiles, synthetic_records, write_synthetic_csv
+
+
+async def run(queries, k):
+    import httpx
+
+    import main
+    from partners import FEATURE_ORDER
+
+    index = main.partner_index
+    started = time.perf_counter()
+    # As after a model swap: the history is read again and the index rebuilt
+    main.aggregates.model_version = None
+    main.seed_aggregates()
+    result = {"seed_with_partner_index_seconds": time.perf_counter() - started, **index.stats()}
+
+    rng = np.random.default_rng(5)
+    rows = rng.integers(0, index.rows, queries).tolist()
+    keys = [index.key_of(row) for row in rows]
+    samples = []
+    for row, key in zip(rows, keys):
+        started = time.perf_counter()
+        index.query(key, k, exclude=row)
+        samples.append(time.perf_counter() - started)
+    result["index_query"] = percentiles(samples)
+
+    # Every stored row in the feature space, scanned in full
+    history = main.store.read_columns(FEATURE_ORDER)
+    vectors = index.space.transform(index.space.impute_columns(history))
+    samples = []
+    for key in keys[:200]:
+        q = index.space.transform([key])[0]
+        started = time.perf_counter()
+        difference = vectors - q
+        np.argpartition(np.einsum("ij,ij->i", difference, difference), k)[:k + 1]
+        samples.append(time.perf_counter() - started)
+    result["brute_force_query"] = percentiles(samples)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples = []
+        for row in rows:
+            started = time.perf_counter()
+            response = await client.get("/partners", params={"id": row, "k": k})
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+        result["endpoint"] = percentiles(samples)
+
+        records = [{key: value for key, value in record.items() if key != "teamwork_preference"}
+                   for record in synthetic_records(500, seed=9)]
+        before = index.rows
+        started = time.perf_counter()
+        for record in records:
+            (await client.post("/predict", json=record)).raise_for_status()
+        result["predict_seconds_per_call"] = (time.perf_counter() - started) / len(records)
+        result["indexed_submissions"] = index.rows - before
+    main.store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run(args.queries, args.k))))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "newdata.csv")
+        write_synthetic_csv(data_path, args.rows)
+        env = backend_env(workdir, EDUPAIR_DATA_PATH=data_path, EDUPAIR_CACHE_DIR=os.path.join(workdir, "cache"),
+                          EDUPAIR_LOG_SAMPLE_RECEIVED="0")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--queries", str(args.queries), "-k", str(args.k)],
+            env=env, cwd=backend_dir, check=True, capture_output=True, text=True,
+        ).stdout
+        results = json.loads(output.strip().splitlines()[-1])
+
+    report = json.dumps({"benchmark": "partners", "rows": args.rows, "k": args.k, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Backend cold start with the pickled Pipeline versus the .npz artifact.
+
+Each run is a fresh interpreter that imports main (model load, scorer
+warm-up, store open, summary seed) and then answers one /predict. Reported
+per mode: median import time, first-request time, whole-process wall time
+and whether sklearn / pandas ended up imported.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import backend_dir, backend_env, newdata_path
+
+MODES = {
+    "pickle": {"EDUPAIR_MODEL_FORMAT": "pickle"},
+    "npz": {"EDUPAIR_MODEL_FORMAT": "npz"},
+}
+RECORD = {"introversion_extraversion": 3, "risk_taking": 4, "club_top1": "Coding Club", "weekly_hobby_hours": 10}
+
+
+def cold_start():
+    import httpx
+
+    started = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+
+    async def first_request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            (await client.post("/predict", json=RECORD)).raise_for_status()
+
+    asyncio.run(first_request())
+    answered = time.perf_counter()
+    return {
+        "import_seconds": imported - started,
+        "first_request_seconds": answered - imported,
+        "sklearn_imported": "sklearn" in sys.modules,
+        "pandas_imported": "pandas" in sys.modules,
+    }
+
+
+def build_registry(root):
+    """Register the repo's model.pkl together with its .npz export."""
+    import sklearn
+
+    from registry import ModelRegistry
+    from scoring import CompiledScorer, check_parity, load_pipeline
+
+    pipeline = load_pipeline(os.path.join(backend_dir, "model.pkl"))
+    compiled = CompiledScorer.from_pipeline(pipeline)
+    check_parity(pipeline, compiled)
+    npz_path = os.path.join(root, "model.npz")
+    compiled.save(npz_path, sklearn_version=sklearn.__version__)
+    ModelRegistry(os.path.join(root, "models")).publish(
+        {"pipeline": os.path.join(backend_dir, "model.pkl"), "compiled": npz_path})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(cold_start()))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        build_registry(workdir)
+        for mode, env in MODES.items():
+            runs = []
+            for run in range(args.repeat):
+                data_path = os.path.join(workdir, f"newdata-{mode}-{run}.csv")
+                shutil.copyfile(newdata_path, data_path)
+                child_env = backend_env(workdir, EDUPAIR_DATA_PATH=data_path,
+                                      EDUPAIR_CACHE_DIR=os.path.join(workdir, f"cache-{mode}-{run}"), **env)
+                started = time.perf_counter()
+                output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], env=child_env,
+                                        check=True, capture_output=True, text=True, cwd=backend_dir).stdout
+                wall = time.perf_counter() - started
+                runs.append({**json.loads(output.strip().splitlines()[-1]), "process_seconds": wall})
+            results[mode] = {
+                key: statistics.median(run[key] for run in runs)
+                for key in ("import_seconds", "first_request_seconds", "process_seconds")
+            }
+            results[mode]["sklearn_imported"] = runs[0]["sklearn_imported"]
+            results[mode]["pandas_imported"] = runs[0]["pandas_imported"]
+
+    report = json.dumps({"benchmark": "startup", "repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
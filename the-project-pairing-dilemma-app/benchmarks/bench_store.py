@@ -0,0 +1,86 @@
+"""Submission write latency against stored history size.
+
+Compares the append-only store (enqueue, and enqueue + wait for the group
+commit) with the previous read-the-whole-CSV-then-append approach.
+
+    python benchmarks/bench_store.py --sizes 100 10000 1000000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import percentiles, synthetic_records, write_synthetic_csv
+from store import CsvSubmissionStore, submission_row
+
+
+def legacy_append(path, record, prediction):
+    import numpy as np
+    import pandas as pd
+
+    existing_df = pd.read_csv(path)
+    new_row = pd.DataFrame([{col: np.nan for col in existing_df.columns}])
+    for key, value in submission_row(record, prediction).items():
+        new_row[key] = value
+    new_row.to_csv(path, mode="a", header=False, index=False)
+
+
+def bench_size(size, writes, legacy_max, workdir):
+    path = write_synthetic_csv(os.path.join(workdir, f"history_{size}.csv"), size)
+    records = synthetic_records(writes, seed=7)
+    result = {"rows": size}
+
+    started = time.perf_counter()
+    store = CsvSubmissionStore(path)
+    result["open_seconds"] = time.perf_counter() - started
+
+    samples = []
+    for record in records:
+        started = time.perf_counter()
+        store.append([submission_row(record, 1)])
+        samples.append(time.perf_counter() - started)
+    result["enqueue"] = percentiles(samples)
+    store.flush()
+
+    samples = []
+    for record in records:
+        started = time.perf_counter()
+        store.append([submission_row(record, 1)], wait=True)
+        samples.append(time.perf_counter() - started)
+    result["durable_append"] = percentiles(samples)
+    store.close()
+
+    if size <= legacy_max:
+        samples = []
+        for record in records[:max(1, writes // 10)]:
+            started = time.perf_counter()
+            legacy_append(path, record, 1)
+            samples.append(time.perf_counter() - started)
+        result["legacy_read_then_append"] = percentiles(samples)
+
+    os.remove(path)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--writes", type=int, default=2000, help="appends measured per history size")
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest history size to run the legacy read+append path on")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [bench_size(size, args.writes, args.legacy_max, workdir) for size in args.sizes]
+
+    report = json.dumps({"benchmark": "store_append", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Team formation time and quality on synthetic rosters.
+
+For each roster size the roster is scored with the sklearn Pipeline and split
+into teams with ``teams.form_teams``. Reported per size: scoring, greedy and
+local-search time, and the balance of the result next to a random assignment
+into teams of the same sizes.
+
+    python benchmarks/bench_teams.py --sizes 500 2000 5000 20000 --team-size 4
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from common import backend_dir, synthetic_records
+
+
+def random_assignment(students, team_size, seed=0):
+    from teams import team_capacities
+
+    capacity = team_capacities(students, team_size)
+    team = np.repeat(np.arange(len(capacity)), capacity)
+    np.random.default_rng(seed).shuffle(team)
+    return team
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000, 5000, 20000])
+    parser.add_argument("--team-size", type=int, default=4)
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    from scoring import load_pipeline, load_scorer, records_to_columns
+    from teams import balance, form_teams
+
+    scorer = load_scorer(load_pipeline(os.path.join(backend_dir, "model.pkl")))
+    results = {}
+    for size in args.sizes:
+        columns = records_to_columns(synthetic_records(size, seed=size))
+        started = time.perf_counter()
+        _, proba = scorer.score(columns)
+        scoring_seconds = time.perf_counter() - started
+
+        team, stats = form_teams(proba[:, 1], columns["introversion_extraversion"], columns["club_top1"],
+                                 args.team_size, max_solo=0)
+        baseline = random_assignment(size, args.team_size)
+        results[str(size)] = {
+            "teams": stats["teams"],
+            "scoring_seconds": scoring_seconds,
+            "greedy_seconds": stats["greedy_seconds"],
+            "local_search_seconds": stats["seconds"] - stats["greedy_seconds"],
+            "total_seconds": scoring_seconds + stats["seconds"],
+            "swaps": stats["swaps"],
+            "balance": balance(team, proba[:, 1], columns["introversion_extraversion"], columns["club_top1"]),
+            "random_balance": balance(baseline, proba[:, 1], columns["introversion_extraversion"],
+                                      columns["club_top1"]),
+        }
+
+    report = json.dumps({"benchmark": "teams", "team_size": args.team_size, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
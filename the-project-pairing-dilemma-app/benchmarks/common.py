@@ -0,0 +1,88 @@
+"""Helpers shared by the benchmark scripts."""
+import csv
+import os
+import sys
+
+import numpy as np
+
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_dir = os.path.join(app_dir, "backend")
+newdata_path = os.path.join(backend_dir, "newdata.csv")
+
+# Benchmarks import the backend modules directly
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+CLUBS = [
+    "Coding Club", "Sports Club", "Music Club", "Cultural Club",
+    "Drama Club", "Entrepreneurship Cell", "Literary Club", "Robotics Club",
+]
+
+
+def newdata_columns():
+    with open(newdata_path, newline="") as f:
+        return next(csv.reader(f))
+
+
+def synthetic_records(n, seed=42):
+    """Random UserInput-shaped records plus a teamwork preference."""
+    rng = np.random.default_rng(seed)
+    intro = rng.integers(1, 6, n)
+    risk = rng.integers(1, 6, n)
+    hours = rng.integers(0, 41, n)
+    clubs = rng.integers(0, len(CLUBS), n)
+    preference = rng.integers(1, 6, n)
+    return [
+        {
+            "introversion_extraversion": int(intro[i]),
+            "risk_taking": int(risk[i]),
+            "club_top1": CLUBS[clubs[i]],
+            "weekly_hobby_hours": int(hours[i]),
+            "teamwork_preference": int(preference[i]),
+        }
+        for i in range(n)
+    ]
+
+
+def write_synthetic_csv(path, n, columns=None, seed=42, chunk=100_000):
+    """Write a newdata.csv-shaped file with ``n`` synthetic rows."""
+    columns = columns or newdata_columns()
+    positions = {column: i for i, column in enumerate(columns)}
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for start in range(0, n, chunk):
+            for record in synthetic_records(min(chunk, n - start), seed=seed + start):
+                row = [""] * len(columns)
+                row[positions["timestamp"]] = "2025-11-09 18:20:42"
+                for key, value in record.items():
+                    row[positions[key]] = value
+                writer.writerow(row)
+    return path
+
+
+def percentiles(samples):
+    """Summary statistics for a list of latencies in seconds, reported in milliseconds."""
+    values = np.asarray(samples, dtype=float) * 1000.0
+    return {
+        "n": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def backend_env(workdir, **env):
+    """Environment for a backend child whose runtime files (labels, registry, store, event log) all land in ``workdir``.
+
+    The event log stays off stdout, where the child prints its results.
+    """
+    return {
+        **os.environ,
+        "EDUPAIR_LOG_PATH": os.path.join(workdir, "events.jsonl"),
+        "EDUPAIR_LABELS_PATH": os.path.join(workdir, "labels.csv"),
+        "EDUPAIR_MODEL_DIR": os.path.join(workdir, "models"),
+        "EDUPAIR_STORE_DIR": os.path.join(workdir, "submissions"),
+        **env,
+    }
@@ -0,0 +1,168 @@
+"""Stress test: many processes hammering /predict against one newdata.csv.
+
+Starts ``uvicorn main:app --workers N`` on a copy of newdata.csv, runs client
+processes that send /predict calls as fast as they can, stops the server and
+checks the file:
+
+- every new row has the full column count and valid values (nothing torn or interleaved)
+- the new rows are exactly the submissions that were answered with 200 (nothing lost or duplicated)
+
+The exit status is non-zero when a check fails.
+
+    python benchmarks/stress_store.py --workers 4 --clients 16 --requests 500 --durability fsync
+"""
+import argparse
+import collections
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from common import CLUBS, backend_dir, backend_env, newdata_path
+
+FEATURES = ["introversion_extraversion", "risk_taking", "club_top1", "weekly_hobby_hours"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def client(args):
+    url, index, requests = args
+    import httpx
+
+    accepted = []
+    failed = 0
+    with httpx.Client(base_url=url, timeout=30.0) as session:
+        for i in range(requests):
+            record = {
+                "introversion_extraversion": 1 + (index + i) % 5,
+                "risk_taking": 1 + (index * 7 + i) % 5,
+                "club_top1": CLUBS[(index + i * 3) % len(CLUBS)],
+                "weekly_hobby_hours": (index * 13 + i) % 41,
+            }
+            try:
+                response = session.post("/predict", json=record)
+            except httpx.HTTPError:
+                failed += 1
+                continue
+            if response.status_code == 200:
+                accepted.append(record)
+            else:
+                failed += 1
+    return accepted, failed
+
+
+def wait_until_up(url, process, timeout=120.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(url + "/model", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("uvicorn did not come up in time")
+
+
+def check(path, initial_rows, accepted):
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader)
+        rows = list(reader)[initial_rows:]
+
+    positions = {column: columns.index(column) for column in ["timestamp", *FEATURES, "teamwork_preference"]}
+    malformed = 0
+    stored = collections.Counter()
+    for row in rows:
+        try:
+            if len(row) != len(columns):
+                raise ValueError(f"{len(row)} fields")
+            datetime.strptime(row[positions["timestamp"]], "%Y-%m-%d %H:%M:%S")
+            if row[positions["club_top1"]] not in CLUBS or row[positions["teamwork_preference"]] not in ("1", "5"):
+                raise ValueError("unexpected value")
+            stored[tuple(int(row[positions[f]]) if f != "club_top1" else row[positions[f]] for f in FEATURES)] += 1
+        except ValueError:
+            malformed += 1
+
+    sent = collections.Counter(tuple(record[f] for f in FEATURES) for record in accepted)
+    return {
+        "new_rows": len(rows),
+        "accepted_requests": len(accepted),
+        "malformed_rows": malformed,
+        "lost_rows": sum((sent - stored).values()),
+        "unexpected_rows": sum((stored - sent).values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--clients", type=int, default=16, help="client processes")
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--durability", choices=["buffered", "locked", "fsync"], default="fsync")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_path = os.path.join(workdir, "newdata.csv")
+        shutil.copyfile(newdata_path, data_path)
+        with open(data_path, newline="") as f:
+            initial_rows = sum(1 for _ in csv.reader(f)) - 1
+
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        env = backend_env(workdir, EDUPAIR_DATA_PATH=data_path, EDUPAIR_STORE_DURABILITY=args.durability,
+                          EDUPAIR_CACHE_DIR=os.path.join(workdir, "cache"), EDUPAIR_LOG_SAMPLE_RECEIVED="0")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=backend_dir, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up(url, server)
+            started = time.perf_counter()
+            with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+                results = pool.map(client, [(url, i, args.requests) for i in range(args.clients)])
+            elapsed = time.perf_counter() - started
+        finally:
+            # A graceful shutdown lets every worker commit what it has queued
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+        accepted = [record for records, _ in results for record in records]
+        report = {
+            "workers": args.workers,
+            "clients": args.clients,
+            "durability": args.durability,
+            "requests_per_second": len(accepted) / elapsed,
+            "failed_requests": sum(failed for _, failed in results),
+            **check(data_path, initial_rows, accepted),
+        }
+
+    ok = report["malformed_rows"] == 0 and report["lost_rows"] == 0 and report["unexpected_rows"] == 0
+    report["ok"] = ok
+    text = json.dumps({"benchmark": "stress_store", "results": report}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
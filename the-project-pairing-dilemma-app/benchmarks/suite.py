@@ -0,0 +1,257 @@
+"""Local benchmark suite for the backend, the dashboard logic and training.
+
+Every case runs in a fresh process against a synthetic history of each
+size, so timings include no state from other cases and peak RSS is per
+case. Cases:
+
+    predict    /predict latency (plus backend startup time at that history size)
+    batch      /predict/batch latency and throughput per batch size
+    summary    /data-summary latency, warm and with a full recompute
+    dashboard  the Streamlit dashboard's history evaluation, without Streamlit
+    append     submission store enqueue and durable append cost
+    train      train.py wall time
+
+The report is JSON with the commit and environment it was measured on.
+Pass ``--baseline`` with an earlier report to get current/baseline ratios
+for every timing and memory figure.
+
+    python benchmarks/suite.py --sizes 1000 100000 1000000 --output bench.json
+    python benchmarks/suite.py --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from common import app_dir, backend_dir, backend_env, percentiles, synthetic_records, write_synthetic_csv
+
+CASES = ["predict", "batch", "summary", "dashboard", "append", "train"]
+BATCH_SIZES = [1, 100, 1000, 10000]
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def _record(record):
+    return {key: value for key, value in record.items() if key != "teamwork_preference"}
+
+
+def start_backend():
+    started = time.perf_counter()
+    import main
+    return main, time.perf_counter() - started
+
+
+async def _timed_requests(app, calls):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    samples = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for method, path, kwargs in calls:
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+    return samples
+
+
+def timed_requests(app, calls):
+    return asyncio.run(_timed_requests(app, calls))
+
+
+def case_predict(args):
+    main, startup = start_backend()
+    records = [_record(record) for record in synthetic_records(args.requests + 50, seed=3)]
+    timed_requests(main.app, [("POST", "/predict", {"json": record}) for record in records[:50]])
+    samples = timed_requests(main.app, [("POST", "/predict", {"json": record}) for record in records[50:]])
+    main.store.close()
+    return {"startup_seconds": startup, "predict": percentiles(samples)}
+
+
+def case_batch(args):
+    main, _ = start_backend()
+    result = {}
+    for size in BATCH_SIZES:
+        body = [_record(record) for record in synthetic_records(size, seed=size)]
+        repeat = max(3, min(200, args.requests // size))
+        samples = timed_requests(main.app, [("POST", "/predict/batch", {"json": body})] * (repeat + 1))[1:]
+        result[f"batch_{size}"] = {**percentiles(samples), "rows_per_second": size / float(np.median(samples))}
+    main.store.close()
+    return result
+
+
+def case_summary(args):
+    main, _ = start_backend()
+    calls = [("GET", "/data-summary", {})]
+    warm = timed_requests(main.app, calls * args.requests)
+
+    cold, cached = [], []
+    for _ in range(3):
+        # As after deploying a different model: everything is rescored
+        main.aggregates.model_version = None
+        main.prediction_cache.reset()
+        cold += timed_requests(main.app, calls)
+        # As after a restart with the same model: predictions come from the cache
+        main.aggregates.model_version = None
+        cached += timed_requests(main.app, calls)
+    main.store.close()
+    return {"warm": percentiles(warm), "recompute": percentiles(cold), "recompute_cached": percentiles(cached)}
+
+
+def case_dashboard(args):
+    from aggregates import SummaryAggregates, tail_rows
+    from loader import PROJECTED_COLUMNS
+    from prediction_cache import predict_history
+    from scoring import load_pipeline, load_scorer
+    from store import open_store
+
+    scorer = load_scorer(load_pipeline(os.path.join(backend_dir, "model.pkl")))
+    samples = []
+    for _ in range(3):
+        started = time.perf_counter()
+        store = open_store(args.data)
+        history = store.read_columns(PROJECTED_COLUMNS)
+        predictions = predict_history(history, scorer)
+        summary = SummaryAggregates(PROJECTED_COLUMNS)
+        summary.seed(history, tail_rows(history, 5), predictions, "bench")
+        summary.snapshot()
+        store.close()
+        samples.append(time.perf_counter() - started)
+    return {"evaluate_history": percentiles(samples)}
+
+
+def case_append(args):
+    from store import CsvSubmissionStore, submission_row
+
+    records = synthetic_records(args.requests, seed=7)
+    started = time.perf_counter()
+    store = CsvSubmissionStore(args.data)
+    result = {"open_seconds": time.perf_counter() - started}
+    for key, wait in (("enqueue", False), ("durable_append", True)):
+        samples = []
+        for record in records:
+            started = time.perf_counter()
+            store.append([submission_row(record, 1)], wait=wait)
+            samples.append(time.perf_counter() - started)
+        store.flush()
+        result[key] = percentiles(samples)
+    store.close()
+    return result
+
+
+def case_train(args):
+    output_dir = tempfile.mkdtemp(prefix="train-", dir=os.path.dirname(args.data))
+    started = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(app_dir, "train.py"), "--data", args.data, "--output-dir", output_dir],
+                   check=True, capture_output=True)
+    wall = time.perf_counter() - started
+    return {"wall_seconds": wall, "train_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+
+def run_child(args):
+    result = globals()[f"case_{args.child}"](args)
+    result["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(result))
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=app_dir, check=True,
+                                capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def ratios(current, baseline):
+    """current/baseline for every matching timing or memory figure."""
+    result = {}
+    for key, value in current.items():
+        if isinstance(value, dict) and isinstance(baseline.get(key), dict):
+            nested = ratios(value, baseline[key])
+            if nested:
+                result[key] = nested
+        elif (isinstance(value, (int, float)) and isinstance(baseline.get(key), (int, float)) and baseline[key]
+              and key.endswith(("_ms", "_seconds", "_mb"))):
+            result[key] = round(value / baseline[key], 3)
+    return result
+
+
+def compare(report, baseline):
+    previous = {(entry["case"], entry["rows"]): entry for entry in baseline["results"]}
+    return [
+        {"case": entry["case"], "rows": entry["rows"], "ratio": ratios(entry, previous[(entry["case"], entry["rows"])])}
+        for entry in report["results"] if (entry["case"], entry["rows"]) in previous
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--requests", type=int, default=1000, help="requests or writes per latency measurement")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    report = {"suite": "edupair", "environment": environment(), "results": []}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            fixture = write_synthetic_csv(os.path.join(workdir, f"history_{rows}.csv"), rows)
+            for case in args.cases:
+                # Each case gets its own copy; several of them append to the history
+                data = os.path.join(workdir, f"{case}_{rows}.csv")
+                shutil.copyfile(fixture, data)
+                env = backend_env(workdir, EDUPAIR_DATA_PATH=data,
+                                  EDUPAIR_CACHE_DIR=os.path.join(workdir, f"cache_{case}_{rows}"),
+                                  EDUPAIR_MODEL_DIR=os.path.join(workdir, "no-registry"))
+                print(f"{case} @ {rows} rows", file=sys.stderr)
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", case, "--data", data,
+                     "--requests", str(args.requests)],
+                    env=env, cwd=backend_dir, check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                report["results"].append({"case": case, "rows": rows, **result})
+                os.remove(data)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = {"baseline": args.baseline, "ratios": compare(report, json.load(f))}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
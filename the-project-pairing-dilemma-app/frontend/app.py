@@ -4,10 +4,16 @@ import plotly.graph_objects as go
 import plotly.express as px
 import base64
 import os
-import joblib
-import numpy as np
-from datetime import datetime
-from sklearn.metrics import accuracy_score, confusion_matrix
+import sys
+
+# Share the submission store and evaluation cache with the backend
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from aggregates import SummaryAggregates, tail_rows
+from loader import PROJECTED_COLUMNS
+from prediction_cache import PredictionCache, model_fingerprint, predict_history
+from registry import ModelRegistry
+from scoring import load_pipeline, load_scorer
+from store import open_store, submission_row
 
 # Page config
 st.set_page_config(
@@ -26,21 +32,34 @@ if 'prediction_made' not in st.session_state:
 @st.cache_resource
 def load_model():
     backend_dir = os.path.join(os.path.dirname(__file__), "..", "backend")
-    model_path = os.path.join(backend_dir, "model.pkl")
-    model_data = joblib.load(model_path)
-    if isinstance(model_data, dict):
-        return model_data.get('model', model_data)
-    return model_data
+    # The registry's current version, or model.pkl when nothing is registered
+    model_path, _ = ModelRegistry(os.path.join(backend_dir, "models")).resolve(
+        fallback=os.path.join(backend_dir, "model.pkl"))
+    return load_pipeline(model_path)
+
+@st.cache_resource
+def load_store():
+    # Same store and format switch as the backend
+    backend_dir = os.path.join(os.path.dirname(__file__), "..", "backend")
+    if os.environ.get("EDUPAIR_STORE_FORMAT", "csv") == "columnar":
+        store_dir = os.environ.get("EDUPAIR_STORE_DIR", os.path.join(backend_dir, "submissions"))
+        return open_store(store_dir, "columnar")
+    return open_store(os.environ.get("EDUPAIR_DATA_PATH", os.path.join(backend_dir, "newdata.csv")),
+                      durability=os.environ.get("EDUPAIR_STORE_DURABILITY", "buffered"))
 
-@st.cache_data
-def load_data():
+@st.cache_resource
+def load_evaluator(_pipeline):
+    # Dashboard predictions are cached per model, so only new rows get scored
     backend_dir = os.path.join(os.path.dirname(__file__), "..", "backend")
-    data_path = os.path.join(backend_dir, "newdata.csv")
-    return pd.read_csv(data_path), data_path
+    model_path, _ = ModelRegistry(os.path.join(backend_dir, "models")).resolve(
+        fallback=os.path.join(backend_dir, "model.pkl"))
+    fingerprint = model_fingerprint(model_path)
+    return load_scorer(_pipeline), PredictionCache(os.path.join(backend_dir, ".cache"), fingerprint, role="dashboard")
 
 try:
     pipeline = load_model()
-    df, data_path = load_data()
+    store = load_store()
+    scorer, prediction_cache = load_evaluator(pipeline)
 except Exception as e:
     st.error(f"Error loading model or data: {e}")
     st.stop()
@@ -408,15 +427,7 @@ def show_form():
                 
                 # Save prediction to CSV
                 try:
-                    existing_df = pd.read_csv(data_path)
-                    new_row = pd.DataFrame([{col: np.nan for col in existing_df.columns}])
-                    new_row['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    new_row['introversion_extraversion'] = introversion_extraversion
-                    new_row['risk_taking'] = risk_taking
-                    new_row['club_top1'] = club_top1
-                    new_row['weekly_hobby_hours'] = weekly_hobby_hours
-                    new_row['teamwork_preference'] = 5 if prediction_value == 1 else 1
-                    new_row.to_csv(data_path, mode='a', header=False, index=False)
+                    store.append([submission_row(prediction_df.iloc[0].to_dict(), prediction_value)])
                 except Exception as e:
                     st.warning(f"Could not save prediction: {e}")
                 
@@ -523,36 +534,16 @@ def show_dashboard():
     
     try:
         # Load and process data
-        df_dash = pd.read_csv(data_path)
-        df_dash = df_dash.replace({np.nan: None})
-        df_dash['preference'] = df_dash['teamwork_preference'].apply(lambda x: 'Team' if x is not None and x >= 4 else 'Solo')
-        
-        # Calculate metrics
-        preference_distribution = df_dash['preference'].value_counts().to_dict()
-        introversion_distribution = df_dash['introversion_extraversion'].dropna().value_counts().to_dict()
-        risk_taking_distribution = df_dash['risk_taking'].dropna().value_counts().to_dict()
-        recent_submissions = df_dash.tail(5).to_dict(orient='records')
-        
-        # Calculate accuracy
-        eval_df = df_dash.dropna(subset=['teamwork_preference', "introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"])
-        if not eval_df.empty:
-            X = eval_df[["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"]]
-            y_true = eval_df['teamwork_preference'].apply(lambda x: 1 if x >= 4 else 0)
-            y_pred = pipeline.predict(X)
-            accuracy = accuracy_score(y_true, y_pred)
-            cm = confusion_matrix(y_true, y_pred).tolist()
-        else:
-            accuracy = 0
-            cm = [[0,0],[0,0]]
+        # Only the model columns are parsed, with compact dtypes
+        prediction_cache.check(store)
+        history = store.read_columns(PROJECTED_COLUMNS)
         
-        data = {
-            "preference_distribution": preference_distribution,
-            "introversion_distribution": introversion_distribution,
-            "risk_taking_distribution": risk_taking_distribution,
-            "recent_submissions": recent_submissions,
-            "accuracy": accuracy,
-            "confusion_matrix": cm
-        }
+        # Calculate metrics the same way the backend does; only rows added
+        # since the last visit are scored
+        predictions = predict_history(history, scorer, prediction_cache)
+        summary = SummaryAggregates(PROJECTED_COLUMNS)
+        summary.seed(history, tail_rows(history, 5), predictions, prediction_cache.fingerprint)
+        data = summary.snapshot()
         
         # Key Metrics
         st.markdown("### 📈 Key Metrics")
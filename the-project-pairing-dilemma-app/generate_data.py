@@ -0,0 +1,341 @@
+"""Generate synthetic survey data in the newdata.csv schema, at any size.
+
+A profile is learned from the existing survey files:
+
+- every column keeps its missing rate and its marginal distribution (the
+  observed answers for categorical and small-range columns, an interpolated
+  empirical quantile function for wide numeric ones);
+- the modeled columns (introversion, risk taking, hobby hours and teamwork
+  preference) are drawn jointly through a Gaussian copula fitted to their
+  rank correlations, and the top club is drawn conditionally on whether
+  the teamwork preference is Team (4-5) or not.
+
+Rows are produced in fixed-size chunks, each from its own seeded generator,
+so the output only depends on ``--seed`` and ``--chunk-rows``, not on the
+number of processes, and memory stays constant whatever ``--rows`` is.
+
+    python generate_data.py --rows 10000000 --processes 8 --output fixtures/newdata_10m.csv
+    python generate_data.py --rows 1000000 --format columnar --output fixtures/submissions_1m
+"""
+import argparse
+import collections
+import csv
+import io
+import json
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+app_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.join(app_dir, "backend")
+sys.path.insert(0, backend_dir)
+from columnar import FLOAT, INTEGER, TEXT, StoreBuilder
+from loader import read_header
+
+# Drawn jointly; the first three are discrete scales, hours are continuous
+COPULA_COLUMNS = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "teamwork_preference"]
+CLUB_COLUMN = "club_top1"
+TEAM_THRESHOLD = 4
+# Numeric columns with more distinct answers than this are sampled from their quantile function
+MAX_TOKENS = 12
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _decimals(value):
+    return len(value.split(".", 1)[1]) if "." in value else 0
+
+
+def _quote(value):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow([value])
+    return buffer.getvalue()
+
+
+def _average_ranks(values):
+    order = np.argsort(values, kind="mergesort")
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(1, len(values) + 1)
+    # Tied values share the mean of their ranks
+    for value in np.unique(values):
+        tied = values == value
+        ranks[tied] = ranks[tied].mean()
+    return ranks
+
+
+def _normal_cdf(z):
+    # Abramowitz & Stegun 7.1.26 (absolute error < 1.5e-7); NumPy has no erf
+    x = np.abs(z) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-x * x)
+    return 0.5 * (1.0 + np.sign(z) * erf)
+
+
+def learn_profile(paths):
+    """Learn the per-column marginals and the modeled columns' joint distribution."""
+    columns, rows = None, []
+    for path in paths:
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            if columns is None:
+                columns = header
+            elif header != columns:
+                raise ValueError(f"{path} does not have the same columns as {paths[0]}")
+            rows.extend(line + [""] * (len(columns) - len(line)) for line in reader)
+    if not rows:
+        raise ValueError("the source files contain no rows")
+
+    specs = {}
+    for index, column in enumerate(columns):
+        values = [row[index] for row in rows]
+        present = [value for value in values if value != ""]
+        numbers = [_parse_float(value) for value in present]
+        numeric = bool(present) and all(number is not None for number in numbers)
+        spec = {"missing": 1.0 - len(present) / len(values)}
+        if numeric:
+            spec["integral"] = all(number.is_integer() for number in numbers)
+            spec["decimals"] = max(_decimals(value) for value in present)
+        if numeric and len(set(present)) > MAX_TOKENS:
+            spec.update(type="quantile", values=sorted(numbers))
+        else:
+            counts = collections.Counter(present)
+            spec.update(type="tokens", numeric=numeric, tokens=list(counts), weights=list(counts.values()))
+        specs[column] = spec
+
+    # Gaussian copula over the modeled numeric columns
+    complete = [row for row in rows if all(row[columns.index(column)] != "" for column in COPULA_COLUMNS)]
+    if len(complete) < 3:
+        raise ValueError("too few complete rows to learn the joint distribution of the modeled columns")
+    normal = statistics.NormalDist()
+    data = np.array([[float(row[columns.index(column)]) for column in COPULA_COLUMNS] for row in complete])
+    scores = np.column_stack([
+        [normal.inv_cdf(rank / (len(data) + 1)) for rank in _average_ranks(data[:, i])]
+        for i in range(len(COPULA_COLUMNS))
+    ])
+    correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+    np.fill_diagonal(correlation, 1.0)
+    # Clip to positive definite so the Cholesky factor exists
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    correlation = eigenvectors @ np.diag(np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+    scale = np.sqrt(np.diag(correlation))
+    correlation = correlation / np.outer(scale, scale)
+
+    # Club given Team / not Team, with add-one smoothing over the observed clubs
+    clubs = specs[CLUB_COLUMN]["tokens"]
+    team_index, club_index = columns.index("teamwork_preference"), columns.index(CLUB_COLUMN)
+    given = {"team": np.ones(len(clubs)), "solo": np.ones(len(clubs))}
+    for row in rows:
+        if row[club_index] != "" and row[team_index] != "":
+            bucket = "team" if float(row[team_index]) >= TEAM_THRESHOLD else "solo"
+            given[bucket][clubs.index(row[club_index])] += 1
+
+    return {
+        "columns": columns,
+        "source_rows": len(rows),
+        "specs": specs,
+        "copula": {
+            "columns": COPULA_COLUMNS,
+            "correlation": correlation.tolist(),
+            "quantiles": {column: sorted(data[:, i].tolist()) for i, column in enumerate(COPULA_COLUMNS)},
+        },
+        "club_given": {bucket: (weights / weights.sum()).tolist() for bucket, weights in given.items()},
+    }
+
+
+def _quantile(sorted_values, u, discrete):
+    values = np.asarray(sorted_values)
+    if discrete:
+        return values[np.minimum((u * len(values)).astype(int), len(values) - 1)]
+    return np.interp(u, np.linspace(0.0, 1.0, len(values)), values)
+
+
+def generate_chunk(profile, seed, index, rows):
+    """One chunk as column -> ("codes", token indexes, -1 = missing) or ("values", floats, NaN = missing)."""
+    rng = np.random.default_rng([seed, index])
+    specs = profile["specs"]
+    chunk = {}
+
+    copula = profile["copula"]
+    z = rng.standard_normal((rows, len(copula["columns"]))) @ np.linalg.cholesky(np.array(copula["correlation"])).T
+    u = np.clip(_normal_cdf(z), 0.0, 1.0 - 1e-12)
+    for i, column in enumerate(copula["columns"]):
+        spec = specs[column]
+        discrete = spec["type"] == "tokens"
+        values = _quantile(copula["quantiles"][column], u[:, i], discrete)
+        chunk[column] = ("values", np.round(values, spec.get("decimals", 0)))
+
+    team = chunk["teamwork_preference"][1] >= TEAM_THRESHOLD
+    clubs = np.empty(rows, dtype=np.int64)
+    for bucket, mask in (("team", team), ("solo", ~team)):
+        weights = profile["club_given"][bucket]
+        clubs[mask] = rng.choice(len(weights), size=int(mask.sum()), p=weights)
+    chunk[CLUB_COLUMN] = ("codes", clubs)
+
+    for column in profile["columns"]:
+        spec = specs[column]
+        if column not in chunk:
+            if spec["type"] == "quantile":
+                values = _quantile(spec["values"], rng.random(rows), discrete=False)
+                chunk[column] = ("values", np.round(values, spec["decimals"]))
+            elif spec["tokens"]:
+                weights = np.asarray(spec["weights"], dtype=float)
+                chunk[column] = ("codes", rng.choice(len(weights), size=rows, p=weights / weights.sum()))
+            else:
+                chunk[column] = ("codes", np.full(rows, -1))
+        if spec["missing"]:
+            kind, values = chunk[column]
+            missing = rng.random(rows) < spec["missing"]
+            values = values.astype(float) if kind == "values" else values
+            values[missing] = np.nan if kind == "values" else -1
+            chunk[column] = (kind, values)
+    return chunk
+
+
+def render_csv(profile, chunk):
+    """CSV text of a chunk, formatted like the source files."""
+    rendered = []
+    for column in profile["columns"]:
+        spec = profile["specs"][column]
+        kind, values = chunk[column]
+        if kind == "codes":
+            tokens = np.array([_quote(token) for token in spec["tokens"]] + [""], dtype=object)
+            rendered.append(tokens[values])
+        else:
+            text = np.char.mod(f"%.{spec.get('decimals', 0)}f", values).astype(object)
+            text[np.isnan(values)] = ""
+            rendered.append(text)
+    return "".join(",".join(row) + "\n" for row in zip(*rendered))
+
+
+def store_kinds(profile):
+    kinds = []
+    for column in profile["columns"]:
+        spec = profile["specs"][column]
+        if spec["type"] == "tokens" and not spec["numeric"]:
+            kinds.append(TEXT)
+        else:
+            kinds.append(INTEGER if spec.get("integral", True) else FLOAT)
+    return kinds
+
+
+def render_arrays(profile, chunk):
+    """Column arrays of a chunk for a columnar store (text as token indexes)."""
+    arrays = []
+    for column, kind in zip(profile["columns"], store_kinds(profile)):
+        spec = profile["specs"][column]
+        encoding, values = chunk[column]
+        if kind == TEXT:
+            arrays.append(values.astype(np.int32))
+        elif encoding == "codes":
+            numbers = np.array([float(token) for token in spec["tokens"]] + [np.nan])
+            arrays.append(numbers[values])
+        else:
+            arrays.append(values)
+    return arrays
+
+
+_worker = {}
+
+
+def _init_worker(profile, seed, output_format):
+    _worker.update(profile=profile, seed=seed, format=output_format)
+
+
+def _make_chunk(index, rows):
+    chunk = generate_chunk(_worker["profile"], _worker["seed"], index, rows)
+    if _worker["format"] == "csv":
+        return render_csv(_worker["profile"], chunk).encode("utf-8")
+    return render_arrays(_worker["profile"], chunk)
+
+
+def iter_chunks(profile, rows, seed=42, chunk_rows=65536, output_format="csv", processes=1):
+    """Yield rendered chunks in order, generating up to 2 * ``processes`` ahead."""
+    tasks = [(index, min(chunk_rows, rows - start)) for index, start in enumerate(range(0, rows, chunk_rows))]
+    if processes <= 1:
+        _init_worker(profile, seed, output_format)
+        for task in tasks:
+            yield _make_chunk(*task)
+        return
+
+    with multiprocessing.get_context("spawn").Pool(processes, _init_worker, (profile, seed, output_format)) as pool:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(_make_chunk, task))
+            if len(pending) >= 2 * processes:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def write_csv(profile, path, rows, **kwargs):
+    with open(path, "wb") as f:
+        f.write((",".join(_quote(column) for column in profile["columns"]) + "\n").encode("utf-8"))
+        for data in iter_chunks(profile, rows, output_format="csv", **kwargs):
+            f.write(data)
+    return path
+
+
+def write_columnar(profile, path, rows, **kwargs):
+    kinds = store_kinds(profile)
+    builder = StoreBuilder(path, profile["columns"], kinds)
+    # Token order fixes the dictionary codes, so generated indexes are store codes as-is
+    for index, column in enumerate(profile["columns"]):
+        if kinds[index] == TEXT:
+            for token in profile["specs"][column]["tokens"]:
+                builder.dictionaries[index].code(token)
+    for arrays in iter_chunks(profile, rows, output_format="columnar", **kwargs):
+        builder.add_segment(arrays)
+    return builder.finish()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", required=True, help="CSV file, or store directory with --format columnar")
+    parser.add_argument("--format", choices=["csv", "columnar"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int, default=65536, help="rows per chunk (and per columnar segment)")
+    parser.add_argument("--source", nargs="+", help="survey files to learn from (default: backend/newdata.csv "
+                                                    "and ../data.csv when present)")
+    parser.add_argument("--profile", help="load the learned profile from this JSON file instead of the sources")
+    parser.add_argument("--save-profile", help="write the learned profile to this JSON file")
+    args = parser.parse_args()
+
+    if args.profile:
+        with open(args.profile) as f:
+            profile = json.load(f)
+    else:
+        sources = args.source or [path for path in (os.path.join(backend_dir, "newdata.csv"),
+                                                    os.path.join(app_dir, "..", "data.csv"))
+                                  if os.path.exists(path)]
+        if not args.source:
+            # data.csv may carry the raw survey headers; only sources sharing newdata.csv's schema are used
+            sources = [path for path in sources if read_header(path) == read_header(sources[0])]
+        profile = learn_profile(sources)
+        print(f"Learned a profile from {profile['source_rows']} rows in {', '.join(sources)}")
+    if args.save_profile:
+        with open(args.save_profile, "w") as f:
+            json.dump(profile, f, indent=2)
+
+    started = time.perf_counter()
+    write = write_columnar if args.format == "columnar" else write_csv
+    write(profile, args.output, args.rows, seed=args.seed, chunk_rows=args.chunk_rows, processes=args.processes)
+    seconds = time.perf_counter() - started
+    print(f"Wrote {args.rows} rows to {args.output} in {seconds:.1f}s ({args.rows / max(seconds, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
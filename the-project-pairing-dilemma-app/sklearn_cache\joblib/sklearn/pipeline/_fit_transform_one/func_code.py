@@ -0,0 +1,23 @@
+# first line: 1297
+def _fit_transform_one(
+    transformer, X, y, weight, message_clsname="", message=None, params=None
+):
+    """
+    Fits ``transformer`` to ``X`` and ``y``. The transformed result is returned
+    with the fitted transformer. If ``weight`` is not ``None``, the result will
+    be multiplied by ``weight``.
+
+    ``params`` needs to be of the form ``process_routing()["step_name"]``.
+    """
+    params = params or {}
+    with _print_elapsed_time(message_clsname, message):
+        if hasattr(transformer, "fit_transform"):
+            res = transformer.fit_transform(X, y, **params.get("fit_transform", {}))
+        else:
+            res = transformer.fit(X, y, **params.get("fit", {})).transform(
+                X, **params.get("transform", {})
+            )
+
+    if weight is None:
+        return res, transformer
+    return res * weight, transformer
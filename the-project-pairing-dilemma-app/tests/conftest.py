@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+backend_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+# Tests import the backend modules directly, as the benchmarks do
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    """Start the app with the given EDUPAIR_* settings; every file it writes lands in ``tmp_path``.
+
+    The submission store starts as a copy of ``backend/newdata.csv`` unless
+    ``EDUPAIR_DATA_PATH`` is given. Returns ``(main, client)``.
+    """
+    from fastapi.testclient import TestClient
+
+    import metrics
+
+    registered, enabled = list(metrics.REGISTRY.metrics), metrics.enabled
+    clients = []
+
+    def start(**env):
+        if "EDUPAIR_DATA_PATH" not in env:
+            env["EDUPAIR_DATA_PATH"] = shutil.copyfile(os.path.join(backend_dir, "newdata.csv"),
+                                                       tmp_path / "newdata.csv")
+        env = {"EDUPAIR_MODEL_DIR": tmp_path / "models", "EDUPAIR_STORE_DIR": tmp_path / "submissions",
+               "EDUPAIR_CACHE_DIR": tmp_path / "cache", "EDUPAIR_LABELS_PATH": tmp_path / "labels.csv",
+               "EDUPAIR_LOG_PATH": tmp_path / "events.jsonl", **env}
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        # main reads its settings at import time
+        sys.modules.pop("main", None)
+        import main
+        client = TestClient(main.app)
+        client.__enter__()
+        clients.append(client)
+        return main, client
+
+    yield start
+    for client in clients:
+        client.__exit__(None, None, None)
+    sys.modules.pop("main", None)
+    # Drop the gauges the app registered, so the next app starts from the module's metrics
+    metrics.REGISTRY.metrics[:] = registered
+    metrics.enabled = enabled
@@ -0,0 +1,55 @@
+import asyncio
+
+import numpy as np
+
+from coalescer import PredictionCoalescer
+
+
+class RecordingScorer:
+    """Predicts Team for extraverts and records the size of every scored batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def score(self, columns):
+        intro = np.asarray(columns["introversion_extraversion"], dtype=float)
+        self.batches.append(len(intro))
+        team = intro / 10
+        return (intro >= 3).astype(int), np.column_stack([1 - team, team])
+
+
+async def run_inline(fn, *args):
+    return fn(*args)
+
+
+def record(intro):
+    return {"introversion_extraversion": intro, "risk_taking": 3, "club_top1": "Music Club",
+            "weekly_hobby_hours": 5}
+
+
+def test_concurrent_calls_are_scored_in_one_batch():
+    scorer = RecordingScorer()
+    coalescer = PredictionCoalescer(run_inline, window_ms=50, max_batch=64)
+
+    async def burst():
+        return await asyncio.gather(*(coalescer.score_one(scorer, record(i % 5 + 1)) for i in range(10)))
+
+    results = asyncio.run(burst())
+    assert scorer.batches == [10]
+    assert coalescer.stats()["batches"] == 1
+    assert coalescer.stats()["mean_batch_size"] == 10
+    # Each caller gets its own row back
+    assert [label for label, _, _ in results] == [int(i % 5 + 1 >= 3) for i in range(10)]
+    assert results[4][2] == 0.5
+    assert not coalescer._tasks
+
+
+def test_a_full_batch_is_scored_without_waiting_for_the_window():
+    scorer = RecordingScorer()
+    coalescer = PredictionCoalescer(run_inline, window_ms=10_000, max_batch=4)
+
+    async def burst():
+        return await asyncio.wait_for(asyncio.gather(*(coalescer.score_one(scorer, record(2)) for _ in range(8))), 5)
+
+    asyncio.run(burst())
+    assert scorer.batches == [4, 4]
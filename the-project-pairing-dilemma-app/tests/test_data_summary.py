@@ -0,0 +1,31 @@
+from loader import PROJECTED_COLUMNS
+
+RECORD = {"introversion_extraversion": 2, "risk_taking": 5, "club_top1": "Drama Club", "weekly_hobby_hours": 9}
+
+
+def test_running_counters_match_a_summary_seeded_from_the_store(serve):
+    main, client = serve(EDUPAIR_STORE_DURABILITY="fsync")
+    before = client.get("/data-summary").json()
+
+    client.post("/predict", json=RECORD)
+    client.post("/predict/batch", json=[{**RECORD, "introversion_extraversion": i} for i in range(1, 6)])
+    labeled = [{**RECORD, "teamwork_preference": 4}, {**RECORD, "risk_taking": 1, "teamwork_preference": 1}]
+    assert client.post("/labels", json=labeled).status_code == 200
+    summary = client.get("/data-summary").json()
+    assert sum(summary["preference_distribution"].values()) == sum(before["preference_distribution"].values()) + 8
+    # One /predict, one batch record and both labels have introversion 2
+    assert summary["introversion_distribution"]["2"] == before["introversion_distribution"].get("2", 0) + 4
+    evaluated = sum(map(sum, summary["confusion_matrix"]))
+    correct = summary["confusion_matrix"][0][0] + summary["confusion_matrix"][1][1]
+    assert summary["accuracy"] == correct / evaluated
+
+    # The newest rows come last, with the projected columns and the derived preference only
+    recent = summary["recent_submissions"]
+    assert len(recent) == 5
+    assert set(recent[-1]) == set(PROJECTED_COLUMNS) | {"preference"}
+    assert [(row["risk_taking"], row["teamwork_preference"], row["preference"]) for row in recent[-2:]] == \
+        [(5, 4, "Team"), (1, 1, "Solo")]
+
+    # A fresh process seeds the same counters from the store
+    _, restarted = serve(EDUPAIR_STORE_DURABILITY="fsync", EDUPAIR_DATA_PATH=main.data_path)
+    assert restarted.get("/data-summary").json() == summary
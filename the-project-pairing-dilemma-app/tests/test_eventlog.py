@@ -0,0 +1,72 @@
+import json
+import time
+
+from eventlog import EventLogger
+
+RECORD = {"introversion_extraversion": 4, "risk_taking": 2, "club_top1": "Coding Club", "weekly_hobby_hours": 6}
+
+
+def read_events(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_events_are_written_as_json_lines(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    log = EventLogger(path)
+    log.event("received", endpoint="/predict", rows=3)
+    log.error("persistence_error", stage="store_append", error=OSError("disk full"))
+    log.close()
+
+    received, error = read_events(path)
+    assert (received["level"], received["event"], received["rows"]) == ("info", "received", 3)
+    # Fields that are not JSON types are written as text
+    assert (error["level"], error["error"]) == ("error", "disk full")
+    assert log.stats()["written"] == 2
+
+
+def test_sampling_and_drops_never_lose_errors(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    # No room for info events at all; errors still have their reserve
+    log = EventLogger(path, max_queue=0, sample_rates={"received": 0.0}, error_reserve=2)
+    for _ in range(5):
+        log.event("received")
+        log.event("reloaded")
+    for i in range(3):
+        log.error("persistence_error", attempt=i)
+    log.close()
+
+    stats = log.stats()
+    assert stats["sampled_out"] == 5
+    assert stats["dropped"]["info"] == 5
+    written = read_events(path)
+    assert [event["event"] for event in written] == ["persistence_error"] * (3 - stats["dropped"]["error"])
+    assert len(written) >= 2
+
+
+def test_requests_are_logged_by_the_app(serve, tmp_path):
+    main, client = serve(EDUPAIR_LOG_SAMPLE_RECEIVED="1")
+    client.post("/predict", json=RECORD)
+    client.post("/predict/batch", json=[RECORD] * 3)
+
+    deadline = time.monotonic() + 5
+    events = []
+    while len(events) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        events = [event for event in read_events(tmp_path / "events.jsonl") if event["event"] == "received"]
+    assert events[0]["endpoint"] == "/predict"
+    assert events[0]["record"] == RECORD
+    assert (events[1]["endpoint"], events[1]["rows"]) == ("/predict/batch", 3)
+
+
+def test_model_loads_are_logged_instead_of_printed(serve, tmp_path, capsys):
+    main, client = serve(EDUPAIR_PREDICTION_TABLE="1")
+    reloaded = client.post("/admin/reload").json()
+
+    deadline = time.monotonic() + 5
+    loaded = []
+    while len(loaded) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        loaded = [event for event in read_events(tmp_path / "events.jsonl") if event["event"] == "model_loaded"]
+    assert [(event["version"], event["scorer"]) for event in loaded] == [(reloaded["version"], reloaded["scorer"])] * 2
+    assert "Serving model" not in capsys.readouterr().out
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from loader import load_survey
+
+HEADER = "timestamp,introversion_extraversion,risk_taking,club_top1,weekly_hobby_hours,teamwork_preference,extra\n"
+
+
+def write_survey(path, hours):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for i, value in enumerate(hours):
+            f.write(f"2025-01-01 00:00:{i:02d},{i % 5 + 1},3,Music Club,{value},{5 - i % 5},x\n")
+
+
+def test_chunks_match_the_whole_file_when_answers_turn_non_numeric(tmp_path):
+    path = str(tmp_path / "survey.csv")
+    # The first chunks parse as numbers; the fourth holds a free-text answer
+    write_survey(path, ["4", "10", "", "7", "12", "3", "a lot", "8"])
+    frame = load_survey(path)
+    assert str(frame["weekly_hobby_hours"].dtype) == "Int16"
+    assert frame["weekly_hobby_hours"].isna().tolist() == [False, False, True, False, False, False, True, False]
+    assert str(frame["introversion_extraversion"].dtype) == "Int8"
+    assert frame["club_top1"].dtype == "category"
+
+    chunks = list(load_survey(path, chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks).reset_index(drop=True).astype({"club_top1": object}),
+                                  frame.astype({"club_top1": object}))
+    assert chunks[-1].index.tolist() == [6, 7]
+
+
+def test_fractional_hours_stay_floats(tmp_path):
+    path = str(tmp_path / "survey.csv")
+    write_survey(path, ["4", "2.5", "10"])
+    frame = load_survey(path, rows=2)
+    assert str(frame["weekly_hobby_hours"].dtype) == "float32"
+    assert frame["weekly_hobby_hours"].tolist() == [4.0, 2.5]
+    assert str(frame["teamwork_preference"].dtype) == "Int8"
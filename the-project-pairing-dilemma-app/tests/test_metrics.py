@@ -0,0 +1,62 @@
+from metrics import Counter, Histogram, Registry
+
+RECORD = {"introversion_extraversion": 4, "risk_taking": 2, "club_top1": "Coding Club", "weekly_hobby_hours": 6}
+
+
+def samples(text):
+    """Sample name with labels -> value, from a Prometheus text exposition."""
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ["path"], buckets=(0.1, 1.0)))
+    counter = registry.register(Counter("served_total", "Served.", ["class"]))
+    for value in [0.05, 0.1, 0.5, 3.0]:
+        histogram.observe(value, ("/predict",))
+    counter.inc(2, ('Say "hi"',))
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert samples(text) == {
+        'latency_seconds_bucket{path="/predict",le="0.1"}': 2,
+        'latency_seconds_bucket{path="/predict",le="1.0"}': 3,
+        'latency_seconds_bucket{path="/predict",le="+Inf"}': 4,
+        'latency_seconds_sum{path="/predict"}': 3.65,
+        'latency_seconds_count{path="/predict"}': 4,
+        'served_total{class="Say \\"hi\\""}': 2,
+    }
+
+
+def test_requests_predictions_and_gauges_are_exported(serve):
+    main, client = serve(EDUPAIR_STORE_DURABILITY="fsync")
+    before = samples(client.get("/metrics").text)
+    prediction = client.post("/predict", json=RECORD).json()
+    client.post("/predict/batch", json=[RECORD, RECORD])
+    client.get("/no-such-page")
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = samples(response.text)
+
+    def grew(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert grew(f'edupair_predictions_total{{class="{prediction["prediction"]}"}}') == 3
+    assert grew('edupair_request_duration_seconds_count{method="POST",path="/predict",status="200"}') == 1
+    assert grew('edupair_request_duration_seconds_count{method="POST",path="/predict/batch",status="200"}') == 1
+    # Unknown URLs share one series
+    assert grew('edupair_request_duration_seconds_count{method="GET",path="other",status="404"}') == 1
+    assert grew('edupair_stage_duration_seconds_count{stage="inference"}') == 2
+    assert after["edupair_store_rows"] == main.store.row_count
+    assert after[f'edupair_model_info{{version="{prediction["model_version"]}",scorer="compiled"}}'] == 1
+
+
+def test_disabled_metrics_record_nothing(serve):
+    _, client = serve(EDUPAIR_METRICS="0")
+    before = samples(client.get("/metrics").text)
+    client.post("/predict", json=RECORD)
+    after = samples(client.get("/metrics").text)
+    recorded = {name for name in after if name.startswith(("edupair_predictions", "edupair_request", "edupair_stage"))}
+    assert {name: after[name] for name in recorded} == {name: before.get(name) for name in recorded}
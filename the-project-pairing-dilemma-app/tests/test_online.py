@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+
+from conftest import backend_dir
+from online import OnlineLogisticRegression
+from scoring import CompiledScorer, PipelineScorer, load_pipeline
+
+CLUBS = ["Coding Club", "Music Club", "Sports Club"]
+
+
+def stream(n, rng):
+    columns = {"introversion_extraversion": rng.integers(1, 6, n), "risk_taking": rng.integers(1, 6, n),
+               "club_top1": rng.choice(CLUBS, n).tolist(), "weekly_hobby_hours": rng.integers(0, 21, n)}
+    z = -1.5 * (columns["introversion_extraversion"] - 3) + 0.8 * (columns["risk_taking"] - 3)
+    return columns, (rng.random(n) < 1 / (1 + np.exp(-z))).astype(int)
+
+
+@pytest.fixture(scope="module")
+def shipped_pipeline():
+    return load_pipeline(os.path.join(backend_dir, "model.pkl"))
+
+
+def test_learns_and_snapshots_score_like_the_model(shipped_pipeline):
+    rng = np.random.default_rng(0)
+    model = OnlineLogisticRegression.from_scorer(CompiledScorer.from_pipeline(shipped_pipeline))
+    columns, labels = stream(20000, rng)
+    for start in range(0, len(labels), 64):
+        model.partial_fit({feature: values[start:start + 64] for feature, values in columns.items()},
+                          labels[start:start + 64])
+    holdout, holdout_labels = stream(5000, rng)
+    predicted, _ = model.to_scorer().score(holdout)
+    assert (predicted == holdout_labels).mean() > 0.75
+    # A snapshot continues exactly where the learner is
+    again = OnlineLogisticRegression.from_scorer(model.to_scorer())
+    assert np.allclose(again.coef, model.coef)
+
+
+def test_refuses_non_linear_models(shipped_pipeline):
+    rng = np.random.default_rng(0)
+    columns, labels = stream(200, rng)
+    pipeline = clone(shipped_pipeline)
+    pipeline.steps[-1] = ("model", RandomForestClassifier(n_estimators=5))
+    pipeline.fit(pd.DataFrame(columns), labels)
+    with pytest.raises(ValueError):
+        OnlineLogisticRegression.from_scorer(PipelineScorer(pipeline))
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from conftest import backend_dir
+from partners import FEATURE_ORDER, FeatureSpace, PartnerIndex
+from scoring import FEATURES, load_pipeline, parity_grid
+
+RECORD = {"introversion_extraversion": 4, "risk_taking": 2, "club_top1": "Coding Club", "weekly_hobby_hours": 6}
+
+
+def shipped_space():
+    pipeline = load_pipeline(os.path.join(backend_dir, "model.pkl"))
+    return pipeline, FeatureSpace.from_pipeline(pipeline)
+
+
+def test_feature_space_matches_the_fitted_preprocess_step():
+    pipeline, space = shipped_space()
+    columns = parity_grid(space.clubs)
+    expected = pipeline.named_steps["preprocess"].transform(pd.DataFrame(columns, columns=FEATURES))
+    expected = expected.toarray() if hasattr(expected, "toarray") else expected
+    keys = space.impute_columns(columns)
+    assert np.max(np.abs(space.transform(keys) - expected)) <= 1e-9
+
+
+def test_queries_match_a_brute_force_search():
+    _, space = shipped_space()
+    rng = np.random.default_rng(3)
+    clubs = list(space.clubs) + ["Chess Club"]
+    history = {
+        "introversion_extraversion": rng.integers(1, 6, 400).astype(float),
+        "risk_taking": rng.integers(1, 6, 400).astype(float),
+        "club_top1": np.array([clubs[i] for i in rng.integers(0, len(clubs), 400)], dtype=object),
+        "weekly_hobby_hours": rng.integers(0, 15, 400).astype(float),
+    }
+    history["weekly_hobby_hours"][::7] = np.nan
+    index = PartnerIndex()
+    index.seed(space, {feature: history[feature][:300] for feature in FEATURE_ORDER}, "v1")
+    index.update([{feature: history[feature][i] for feature in FEATURE_ORDER} for i in range(300, 400)])
+    assert index.stats()["rows"] == 400
+    # Repeated features share points
+    assert index.stats()["points"] < 400
+
+    vectors = space.transform(space.impute_columns(history))
+    for student in [0, 123, 399]:
+        partners = index.query(index.key_of(student), 15, exclude=student)
+        distances = np.sqrt(((vectors - vectors[student]) ** 2).sum(axis=1))
+        distances[student] = np.inf
+        rows = [row for row, _, _ in partners]
+        assert len(set(rows)) == 15 and student not in rows
+        # The 15 smallest distances; which of several equally distant rows come back is not specified
+        assert np.allclose([distance for _, distance, _ in partners], np.sort(distances)[:15])
+        assert np.allclose(distances[rows], [distance for _, distance, _ in partners])
+        # Rows at the same point come back in storage order
+        for point in {key for _, _, key in partners}:
+            at_point = [row for row, _, key in partners if key == point]
+            assert at_point == sorted(at_point)
+
+
+def test_endpoint_finds_stored_and_new_students(serve):
+    main, client = serve(EDUPAIR_STORE_DURABILITY="fsync")
+    rows = main.store.row_count
+
+    by_id = client.get("/partners?id=0&k=5").json()
+    assert len(by_id["partners"]) == 5
+    assert 0 not in [partner["id"] for partner in by_id["partners"]]
+    distances = [partner["distance"] for partner in by_id["partners"]]
+    assert distances == sorted(distances)
+
+    client.post("/predict", json=RECORD)
+    query = "&".join(f"{name}={value}" for name, value in RECORD.items())
+    nearest = client.get(f"/partners?{query}&k=1").json()["partners"][0]
+    # The new submission is indexed as soon as it is stored
+    assert (nearest["id"], nearest["distance"]) == (rows, 0.0)
+    assert {name: nearest[name] for name in RECORD} == RECORD
+
+    assert client.get(f"/partners?id={rows + 1}").status_code == 404
+    assert client.get("/partners?risk_taking=3").status_code == 422
+    assert client.get("/partners?id=0&k=0").status_code == 422
@@ -0,0 +1,53 @@
+import csv
+
+RECORDS = [
+    {"introversion_extraversion": 1, "risk_taking": 2, "club_top1": "Literary Club", "weekly_hobby_hours": 3},
+    {"introversion_extraversion": 5, "risk_taking": 4, "club_top1": "Sports Club", "weekly_hobby_hours": 12},
+    {"introversion_extraversion": 3, "risk_taking": 3, "club_top1": "Chess Club", "weekly_hobby_hours": 0},
+]
+
+
+def to_csv(records):
+    header = list(records[0])
+    return "\n".join([",".join(header)] + [",".join(str(record[name]) for name in header) for record in records])
+
+
+def test_batch_matches_single_predictions_in_input_order(serve, tmp_path):
+    main, client = serve(EDUPAIR_STORE_DURABILITY="fsync")
+    stored = main.store.row_count
+    singles = [client.post("/predict", json=record).json() for record in RECORDS]
+
+    response = client.post("/predict/batch", json=RECORDS).json()
+    assert response["count"] == 3
+    assert response["model_version"] == singles[0]["model_version"]
+    for single, batched in zip(singles, response["predictions"]):
+        assert batched["prediction"] == single["prediction"]
+        assert abs(batched["prediction_probability"]["Team"] - single["prediction_probability"]["Team"]) <= 1e-9
+
+    from_csv = client.post("/predict/batch", content=to_csv(RECORDS), headers={"Content-Type": "text/csv"}).json()
+    assert from_csv["predictions"] == response["predictions"]
+
+    # Every scored record is stored with its prediction as the preference
+    assert main.store.row_count == stored + 9
+    with open(tmp_path / "newdata.csv") as f:
+        rows = list(csv.DictReader(f))[-3:]
+    assert [row["club_top1"] for row in rows] == [record["club_top1"] for record in RECORDS]
+    assert [int(row["teamwork_preference"]) >= 4 for row in rows] == \
+        [batched["prediction"] == "Team" for batched in response["predictions"]]
+
+
+def test_batches_are_validated_as_a_whole(serve):
+    main, client = serve(EDUPAIR_MAX_BATCH_SIZE="3")
+    stored = main.store.row_count
+    assert client.post("/predict/batch", json=RECORDS + RECORDS[:1]).status_code == 413
+
+    invalid = client.post("/predict/batch", json=[RECORDS[0], {**RECORDS[1], "risk_taking": "high"}])
+    assert invalid.status_code == 422
+    assert invalid.json()["detail"]["record"] == 1
+    assert client.post("/predict/batch", json={"records": RECORDS}).status_code == 422
+    assert client.post("/predict/batch", content="not json").status_code == 400
+
+    assert client.post("/predict/batch", json=[]).json()["count"] == 0
+    # Nothing from a rejected batch is stored
+    main.store.flush()
+    assert main.store.row_count == stored
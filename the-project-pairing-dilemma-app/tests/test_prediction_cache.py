@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+from prediction_cache import PredictionCache, predict_history
+from store import open_store
+
+HEADER = "timestamp,introversion_extraversion,risk_taking,club_top1,weekly_hobby_hours,teamwork_preference\n"
+COLUMNS = ["introversion_extraversion", "risk_taking", "club_top1", "weekly_hobby_hours", "teamwork_preference"]
+
+
+class CountingScorer:
+    """Predicts Team for extraverts and counts the rows it scores."""
+
+    classes = np.array([0, 1])
+
+    def __init__(self):
+        self.scored = 0
+
+    def predict(self, columns):
+        self.scored += len(columns["introversion_extraversion"])
+        return (np.asarray(columns["introversion_extraversion"]) >= 3).astype(int)
+
+
+def write_store(path, rows):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for intro, club in rows:
+            f.write(f"2025-01-01 00:00:00,{intro},3,{club},5,4\n")
+
+
+def evaluate(cache, store, scorer):
+    cache.check(store)
+    return predict_history(store.read_columns(COLUMNS), scorer, cache)
+
+
+def test_roles_keep_their_own_predictions(tmp_path):
+    PredictionCache(str(tmp_path), "aaaa", role="backend")
+    open(os.path.join(tmp_path, "predictions-backend-aaaa.i8"), "wb").close()
+    PredictionCache(str(tmp_path), "bbbb", role="dashboard")
+    assert os.path.exists(os.path.join(tmp_path, "predictions-backend-aaaa.i8"))
+    PredictionCache(str(tmp_path), "cccc", role="backend")
+    assert not os.path.exists(os.path.join(tmp_path, "predictions-backend-aaaa.i8"))
+
+
+def test_only_new_rows_are_scored(tmp_path):
+    data = str(tmp_path / "newdata.csv")
+    write_store(data, [(1, "Art")] * 10)
+    cache, scorer = PredictionCache(str(tmp_path / "cache"), "model"), CountingScorer()
+    store = open_store(data, parser="csv")
+    evaluate(cache, store, scorer)
+    store.append([{"timestamp": "2025-01-02 00:00:00", "introversion_extraversion": 5, "risk_taking": 3,
+                   "club_top1": "Art", "weekly_hobby_hours": 5, "teamwork_preference": 4}], wait=True)
+    predictions = evaluate(cache, store, scorer)
+    store.close()
+    assert scorer.scored == 11
+    assert predictions.tolist() == [0] * 10 + [1]
+
+
+@pytest.mark.parametrize("replace", [True, False])
+def test_rewritten_store_is_evaluated_again(tmp_path, replace):
+    data = str(tmp_path / "newdata.csv")
+    write_store(data, [(1, "Art")] * 10)
+    cache, scorer = PredictionCache(str(tmp_path / "cache"), "model"), CountingScorer()
+    store = open_store(data, parser="csv")
+    evaluate(cache, store, scorer)
+    store.close()
+
+    # Replaced (or rewritten in place) by a store just as long, with different students
+    if replace:
+        os.remove(data)
+    write_store(data, [(5, "Art")] * 10)
+    store = open_store(data, parser="csv")
+    predictions = evaluate(cache, store, scorer)
+    store.close()
+    assert scorer.scored == 20
+    assert predictions.tolist() == [1] * 10
@@ -0,0 +1,19 @@
+RECORD = {"introversion_extraversion": 4, "risk_taking": 2, "club_top1": "Coding Club", "weekly_hobby_hours": 6}
+
+
+def test_hit_rate_counts_only_prediction_lookups(serve):
+    main, client = serve(EDUPAIR_PREDICTION_TABLE="1")
+    # Startup scored the stored history and warmed the scorer; none of that is a table lookup
+    assert client.get("/prediction-table").json()["hits"] == 0
+    assert client.get("/prediction-table").json()["hit_rate"] is None
+
+    assert client.post("/predict", json=RECORD).status_code == 200
+    batch = [RECORD, {**RECORD, "club_top1": "Chess Club"}, {**RECORD, "weekly_hobby_hours": 200}]
+    assert client.post("/predict/batch", json=batch).status_code == 200
+    # Rosters and the summary score through the table without counting
+    assert client.post("/teams", json=[RECORD] * 4).status_code == 200
+    assert client.get("/data-summary").status_code == 200
+
+    stats = client.get("/prediction-table").json()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    assert stats["hit_rate"] == 0.5
@@ -0,0 +1,75 @@
+import os
+
+import joblib
+import pytest
+
+from conftest import backend_dir
+from registry import ModelRegistry
+from scoring import load_pipeline
+
+RECORD = {"introversion_extraversion": 4, "risk_taking": 2, "club_top1": "Coding Club", "weekly_hobby_hours": 6}
+
+
+@pytest.fixture
+def models(tmp_path):
+    """The shipped model.pkl and a copy whose every prediction is flipped."""
+    shipped = os.path.join(backend_dir, "model.pkl")
+    pipeline = load_pipeline(shipped)
+    classifier = pipeline.steps[-1][1]
+    classifier.coef_ = -classifier.coef_
+    classifier.intercept_ = -classifier.intercept_
+    flipped = str(tmp_path / "flipped" / "model.pkl")
+    os.makedirs(os.path.dirname(flipped))
+    joblib.dump({"model": pipeline}, flipped)
+    return shipped, flipped
+
+
+def test_publish_activate_and_resolve(tmp_path, models):
+    shipped, flipped = models
+    registry = ModelRegistry(str(tmp_path / "models"))
+    assert registry.resolve(fallback=shipped)[0] == shipped
+    with pytest.raises(LookupError):
+        registry.resolve()
+
+    assert registry.publish({"pipeline": shipped})["version"] == "v0001"
+    assert registry.publish({"pipeline": flipped}, activate=False)["version"] == "v0002"
+    path, version = registry.resolve(fallback=shipped)
+    assert version == "v0001" and path == str(tmp_path / "models" / "v0001" / "model.pkl")
+
+    registry.activate("v0002")
+    assert registry.resolve()[1] == "v0002"
+    with pytest.raises(LookupError):
+        registry.resolve(kind="compiled")
+    with pytest.raises(LookupError):
+        registry.activate("v0003")
+
+
+def test_reload_swaps_the_served_model(serve, tmp_path, models):
+    shipped, flipped = models
+    registry = ModelRegistry(str(tmp_path / "models"))
+    registry.publish({"pipeline": shipped})
+    main, client = serve(EDUPAIR_ADMIN_TOKEN="secret")
+    assert client.get("/model").json()["version"] == "v0001"
+    first = client.post("/predict", json=RECORD).json()
+
+    # Publishing alone does not change what is served
+    registry.publish({"pipeline": flipped})
+    assert client.post("/predict", json=RECORD).json()["model_version"] == "v0001"
+    accuracy = client.get("/data-summary").json()["accuracy"]
+
+    assert client.post("/admin/reload").status_code == 403
+    admin = {"X-Admin-Token": "secret"}
+    reloaded = client.post("/admin/reload", headers=admin).json()
+    assert (reloaded["version"], reloaded["swapped"]) == ("v0002", True)
+    # The stored history is evaluated again by the new model
+    assert abs(client.get("/data-summary").json()["accuracy"] - (1 - accuracy)) <= 1e-9
+    second = client.post("/predict", json=RECORD).json()
+    assert second["model_version"] == "v0002"
+    assert second["prediction"] != first["prediction"]
+    assert abs(second["prediction_probability"]["Team"] - first["prediction_probability"]["Solo"]) <= 1e-9
+
+    assert client.post("/admin/reload", headers=admin).json()["swapped"] is False
+    assert client.post("/admin/reload?version=v0001", headers=admin).json()["version"] == "v0001"
+    assert client.post("/predict", json=RECORD).json()["prediction"] == first["prediction"]
+    assert client.post("/admin/reload?version=v0009", headers=admin).status_code == 404
+    assert client.get("/model").json()["registry"] == {"current": "v0002", "versions": ["v0001", "v0002"]}
@@ -0,0 +1,36 @@
+from starlette.requests import Request
+
+from responses import CachedJSON
+
+
+def request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+
+def test_processes_with_the_same_content_send_the_same_etag():
+    content = {"accuracy": 0.5, "recent_submissions": [{"club_top1": "Coding Club"}] * 100}
+    first = CachedJSON().response(request(), (10, "aaaa"), lambda: ((10, "aaaa"), content))
+    # Another worker reached the same content by a different local history
+    second = CachedJSON().response(request(), (3, "aaaa"), lambda: ((3, "aaaa"), content))
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["etag"].startswith("W/")
+
+    changed = CachedJSON().response(request(), (10, "aaaa"), lambda: ((10, "aaaa"), {**content, "accuracy": 1}))
+    assert changed.headers["etag"] != first.headers["etag"]
+
+
+def test_matching_etag_is_not_modified_for_either_encoding():
+    cache = CachedJSON()
+    content = {"recent_submissions": [{"club_top1": "Coding Club"}] * 100}
+    plain = cache.response(request(), 1, lambda: (1, content))
+    gzipped = cache.response(request(accept_encoding="gzip"), 1, lambda: (1, content))
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == plain.headers["etag"]
+
+    etag = plain.headers["etag"]
+    assert cache.response(request(if_none_match=etag), 1, lambda: (1, content)).status_code == 304
+    # Weak comparison: a proxy may have dropped the W/ prefix
+    assert cache.response(request(if_none_match=etag[2:]), 1, lambda: (1, content)).status_code == 304
+    assert cache.response(request(if_none_match='W/"stale"'), 1, lambda: (1, content)).status_code == 200
+    assert cache.stats() == {"hits": 4, "misses": 1, "not_modified": 2}
@@ -0,0 +1,43 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from conftest import backend_dir
+from scoring import FEATURES, CompiledScorer, PipelineScorer, check_parity, parity_grid
+
+
+@pytest.fixture(scope="module")
+def shipped_pipeline():
+    payload = joblib.load(os.path.join(backend_dir, "model.pkl"))
+    return payload["model"] if isinstance(payload, dict) else payload
+
+
+def test_compiled_scorer_matches_shipped_pipeline(shipped_pipeline):
+    scorer = CompiledScorer.from_pipeline(shipped_pipeline)
+    assert check_parity(shipped_pipeline, scorer) <= 1e-9
+
+
+def test_compiled_scorer_matches_with_missing_values(shipped_pipeline):
+    scorer = CompiledScorer.from_pipeline(shipped_pipeline)
+    columns = parity_grid(scorer.club_weights)
+    rng = np.random.default_rng(0)
+    for feature in FEATURES:
+        values = np.asarray(columns[feature], dtype=object)
+        # Missing values as the loader reads them from the store, and None as a JSON null sends it
+        draw = rng.random(len(values))
+        values[draw < 0.2] = np.nan
+        values[draw > 0.9] = None
+        columns[feature] = values.tolist()
+    pipeline = PipelineScorer(shipped_pipeline)
+    expected_labels, expected = pipeline.score(columns)
+    labels, proba = scorer.score(columns)
+    assert np.array_equal(labels, expected_labels)
+    assert np.max(np.abs(proba - expected)) <= 1e-9
+
+    for i in range(len(labels)):
+        record = {feature: columns[feature][i] for feature in FEATURES}
+        label, _, prob_team = scorer.score_one(record)
+        assert label == expected_labels[i]
+        assert abs(prob_team - expected[i, 1]) <= 1e-9
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+
+import stage_cache
+from conftest import backend_dir
+from stage_cache import StageCache, prefix_fingerprint
+from store import LABEL_COLUMNS
+
+app_dir = os.path.dirname(backend_dir)
+data_path = os.path.join(os.path.dirname(app_dir), "model_notebook", "data.csv")
+
+
+def test_results_are_cached_by_key_and_pruned(tmp_path):
+    cache = StageCache(str(tmp_path), keep=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return {"value": value}
+
+    first = cache.key("fit", "v1", {"C": 1.0})
+    assert cache.key("fit", "v1", {"C": 1.0}) == first != cache.key("fit", "v1", {"C": 2.0})
+    assert cache.run("fit", first, lambda: compute(1)) == {"value": 1}
+    assert cache.run("fit", first, lambda: compute(99)) == {"value": 1}
+    assert calls == [1]
+
+    for value in [2, 3]:
+        cache.run("fit", cache.key("fit", value), lambda: compute(value))
+    # Only the two most recently used entries per stage are kept
+    assert cache.load("fit", first) == (False, None)
+    assert len(os.listdir(tmp_path)) == 2
+
+    # A corrupt entry is recomputed instead of failing the run
+    with open(os.path.join(str(tmp_path), f"fit-{cache.key('fit', 3)}.joblib"), "wb") as f:
+        f.write(b"not a pickle")
+    assert cache.run("fit", cache.key("fit", 3), lambda: compute(4)) == {"value": 4}
+
+    disabled = StageCache(str(tmp_path / "off"), enabled=False)
+    disabled.run("fit", first, lambda: compute(5))
+    assert disabled.run("fit", first, lambda: compute(6)) == {"value": 6}
+
+
+def test_files_are_rehashed_only_when_they_change(tmp_path, monkeypatch):
+    path = tmp_path / "data.csv"
+    path.write_text("a,b\n1,2\n")
+    cache = StageCache(str(tmp_path / "cache"))
+    hashed = []
+    real_hash = stage_cache._hash_file
+    monkeypatch.setattr(stage_cache, "_hash_file", lambda p: hashed.append(p) or real_hash(p))
+
+    digest = cache.file_digest(str(path))
+    assert cache.file_digest(str(path)) == digest
+    assert len(hashed) == 1
+    path.write_text("a,b\n1,3\n")
+    assert cache.file_digest(str(path)) != digest
+    assert len(hashed) == 2
+
+
+def test_prefix_fingerprint_survives_appends(tmp_path):
+    path = tmp_path / "labels.csv"
+    path.write_bytes(b"x" * 200_000)
+    end = path.stat().st_size
+    before = prefix_fingerprint(str(path), end)
+    with open(path, "ab") as f:
+        f.write(b"y" * 10)
+    assert prefix_fingerprint(str(path), end) == before
+    assert prefix_fingerprint(str(path), end + 10) != before
+
+
+def train(output_dir):
+    return subprocess.run([sys.executable, os.path.join(app_dir, "train.py"), "--data", data_path,
+                           "--output-dir", str(output_dir)], check=True, capture_output=True, text=True).stdout
+
+
+def append_labels(path, rows):
+    new = not os.path.exists(path)
+    with open(path, "a") as f:
+        if new:
+            f.write(",".join(LABEL_COLUMNS) + "\n")
+        for i in range(rows):
+            values = {"timestamp": f"2025-01-01 00:00:{i:02d}", "introversion_extraversion": i % 5 + 1,
+                      "risk_taking": 3, "club_top1": "Music Club", "weekly_hobby_hours": 4,
+                      "teamwork_preference": 5 if i % 2 else 1}
+            f.write(",".join(str(values[column]) for column in LABEL_COLUMNS) + "\n")
+
+
+def test_train_reruns_only_what_changed(tmp_path):
+    first = train(tmp_path)
+    assert "fit: computed" in first
+
+    # Nothing changed: the fitted model comes straight from the cache
+    second = train(tmp_path)
+    assert "fit: cached" in second
+    assert "load:" not in second and "clean:" not in second
+
+    append_labels(str(tmp_path / "labels.csv"), 10)
+    third = train(tmp_path)
+    assert "labels: 10 new rows read" in third
+    assert "fit: computed" in third
+
+    # Only the appended rows are read again
+    append_labels(str(tmp_path / "labels.csv"), 4)
+    fourth = train(tmp_path)
+    assert "labels: 4 new rows read, 14 usable rows in total" in fourth
@@ -0,0 +1,46 @@
+import pytest
+
+from columnar import INTEGER, TEXT, ColumnarSubmissionStore, StoreBuilder
+from store import CsvSubmissionStore
+
+COLUMNS = ["timestamp", "introversion_extraversion", "club_top1", "teamwork_preference"]
+
+
+def open_pair(tmp_path, format):
+    if format == "csv":
+        path = str(tmp_path / "newdata.csv")
+        with open(path, "w") as f:
+            f.write(",".join(COLUMNS) + "\n2025-01-01 00:00:00,2,Music,1\n")
+        return [CsvSubmissionStore(path, parser="csv", durability="locked") for _ in range(2)]
+    path = str(tmp_path / "store")
+    StoreBuilder(path, COLUMNS, [TEXT, INTEGER, TEXT, INTEGER]).finish()
+    first = ColumnarSubmissionStore(path, segment_rows=4)
+    first.append([{"timestamp": "2025-01-01 00:00:00", "introversion_extraversion": 2, "club_top1": "Music",
+                   "teamwork_preference": 1}], wait=True)
+    return [first, ColumnarSubmissionStore(path, segment_rows=4)]
+
+
+def row(writer, i):
+    return {"timestamp": f"2025-01-01 00:0{writer}:{i:02d}", "introversion_extraversion": i % 5 + 1,
+            "club_top1": f"club-{writer}", "teamwork_preference": writer}
+
+
+@pytest.mark.parametrize("format", ["csv", "columnar"])
+def test_follow_sees_every_writer_in_store_order(tmp_path, format):
+    first, second = open_pair(tmp_path, format)
+    history, position = first.follow(COLUMNS)
+    assert history["club_top1"].tolist() == ["Music"]
+
+    first.append([row(1, 0)], wait=True)
+    second.append([row(2, i) for i in range(5)], wait=True)
+    first.append([row(1, 1)], wait=True)
+    columns, position = first.follow(COLUMNS, position)
+    assert columns["club_top1"].tolist() == ["club-1"] + ["club-2"] * 5 + ["club-1"]
+    assert columns["introversion_extraversion"].tolist() == [1.0, 1.0, 2.0, 3.0, 4.0, 5.0, 2.0]
+
+    # The other process numbers the rows the same way
+    everything, _ = second.follow(COLUMNS)
+    assert everything["club_top1"].tolist() == ["Music"] + columns["club_top1"].tolist()
+    assert first.follow(COLUMNS, position)[0]["club_top1"].tolist() == []
+    first.close()
+    second.close()
@@ -0,0 +1,97 @@
+import pytest
+
+from columnar import INTEGER, TEXT, ColumnarSubmissionStore, StoreBuilder
+from store import CsvSubmissionStore
+from submissions import QUERY_COLUMNS, SubmissionQuery, normalize_time
+
+CLUBS = ["Coding Club", "Music Club", "Drama Club"]
+# More than two CSV index blocks (1024 rows) and several columnar segments
+ROWS = 2600
+
+
+def row(i):
+    # Every 50th row carries a mangled timestamp, as the original survey rows do
+    timestamp = "00:00.0" if i % 50 == 0 else f"2025-{1 + i // 300:02d}-01 {i % 24:02d}:00:00"
+    return {"timestamp": timestamp, "introversion_extraversion": i % 5 + 1, "risk_taking": 3,
+            "club_top1": CLUBS[i % 3], "weekly_hobby_hours": i % 11, "teamwork_preference": i % 5 + 1}
+
+
+def open_store(tmp_path, format):
+    rows = [row(i) for i in range(ROWS)]
+    if format == "csv":
+        path = str(tmp_path / "newdata.csv")
+        with open(path, "w") as f:
+            f.write(",".join(QUERY_COLUMNS) + "\n")
+        store = CsvSubmissionStore(path, parser="csv")
+    else:
+        path = str(tmp_path / "store")
+        StoreBuilder(path, QUERY_COLUMNS, [TEXT, INTEGER, INTEGER, TEXT, INTEGER, INTEGER]).finish()
+        store = ColumnarSubmissionStore(path, segment_rows=500)
+    store.append(rows, wait=True)
+    return store, rows
+
+
+def expected(rows, query):
+    return [i for i, record in enumerate(rows) if query.matches(record)]
+
+
+def read_pages(store, query, limit):
+    ids, cursor, pages = [], 0, 0
+    while cursor is not None:
+        records, cursor = store.query(query, cursor, limit)
+        ids.extend(record["id"] for record in records)
+        pages += 1
+    return ids, pages
+
+
+QUERIES = [
+    SubmissionQuery(),
+    SubmissionQuery(club="Music Club", preference="Team"),
+    SubmissionQuery(since=normalize_time("2025-03-01"), until=normalize_time("2025-05-01T12:00:00")),
+    SubmissionQuery(since=normalize_time("2025-08-01"), club="Drama Club"),
+    SubmissionQuery(until=normalize_time("2024-12-31")),
+]
+
+
+@pytest.mark.parametrize("format", ["csv", "columnar"])
+@pytest.mark.parametrize("query", QUERIES)
+def test_pages_cover_exactly_the_matching_rows(tmp_path, format, query):
+    store, rows = open_store(tmp_path, format)
+    ids, pages = read_pages(store, query, limit=97)
+    assert ids == expected(rows, query)
+    # Full pages until the last one
+    assert pages <= len(ids) // 97 + 1
+    store.close()
+
+
+@pytest.mark.parametrize("format", ["csv", "columnar"])
+def test_records_and_appends_after_the_index_was_built(tmp_path, format):
+    store, rows = open_store(tmp_path, format)
+    query = SubmissionQuery(club="Coding Club", since=normalize_time("2025-09-01"))
+    records, cursor = store.query(query, 0, 5)
+    # Row 2400 has a mangled timestamp, so it never matches a time filter
+    assert records[0] == {"id": 2403, "timestamp": "2025-09-01 03:00:00", "introversion_extraversion": 4,
+                          "risk_taking": 3, "club_top1": "Coding Club", "weekly_hobby_hours": 5,
+                          "teamwork_preference": 4, "preference": "Team"}
+    assert [record["id"] for record in records] == [2403, 2406, 2409, 2412, 2415]
+    assert cursor == 2416
+
+    late = {**row(3), "timestamp": "2025-12-24 18:00:00"}
+    store.append([late], wait=True)
+    ids, _ = read_pages(store, query, limit=50)
+    assert ids[-1] == ROWS
+    store.close()
+
+
+def test_endpoint_validates_and_pages(serve):
+    _, client = serve()
+    assert client.get("/submissions?since=yesterday").status_code == 422
+    assert client.get("/submissions?preference=Maybe").status_code == 422
+    assert client.get("/submissions?limit=0").status_code == 422
+
+    first = client.get("/submissions?limit=10").json()
+    assert [record["id"] for record in first["submissions"]] == list(range(10))
+    second = client.get(f"/submissions?limit=10&cursor={first['next_cursor']}").json()
+    assert second["submissions"][0]["id"] == 10
+    last = client.get("/submissions?limit=1000").json()
+    assert last["next_cursor"] is None
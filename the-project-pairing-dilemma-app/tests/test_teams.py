@@ -0,0 +1,69 @@
+import numpy as np
+
+from teams import balance, form_teams, team_capacities
+
+CLUBS = ["Coding Club", "Sports Club", "Music Club", "Drama Club", None]
+
+
+def cohort(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return rng.random(n), rng.integers(1, 6, n).astype(float), [CLUBS[i] for i in rng.integers(0, 5, n)]
+
+
+def objective(team, p, intro, clubs):
+    """The objective form_teams minimizes, recomputed from the final assignment alone."""
+    placed = team >= 0
+    features = np.column_stack([p, intro])
+    centered = (features - features[placed].mean(axis=0)) / features[placed].std(axis=0)
+    total = 0.0
+    for t in np.unique(team[placed]):
+        members = team == t
+        total += (centered[members].sum(axis=0) ** 2).sum()
+        named = [club for club, member in zip(clubs, members) if member and club is not None]
+        total += sum(named.count(club) * (named.count(club) - 1) / 2 for club in set(named))
+    return total
+
+
+def test_every_student_is_placed_once_and_the_search_only_improves():
+    p, intro, clubs = cohort(203)
+    team, stats = form_teams(p, intro, clubs, team_size=4)
+
+    # 203 = 50 * 4 + 3: the three most confident Solo predictions work alone
+    solo = np.flatnonzero(team < 0)
+    assert sorted(solo.tolist()) == sorted(np.argsort(p)[:3].tolist())
+    sizes = np.bincount(team[team >= 0])
+    assert sizes.tolist() == team_capacities(200, 4).tolist() == [4] * 50
+    assert stats["objective"] <= stats["greedy_objective"]
+    # The swaps kept the running sums and club counts consistent
+    assert abs(stats["objective"] - objective(team, p, intro, clubs)) <= 1e-6
+
+    shuffled = np.random.default_rng(0).permutation(team)
+    assert balance(team, p, intro, clubs)["shared_club_pairs"] <= balance(shuffled, p, intro, clubs)["shared_club_pairs"]
+
+
+def test_max_solo_zero_places_everybody_in_larger_teams():
+    p, intro, clubs = cohort(22)
+    team, stats = form_teams(p, intro, clubs, team_size=4, max_solo=0)
+    assert (team >= 0).all()
+    assert sorted(np.bincount(team).tolist()) == [4, 4, 4, 5, 5]
+    assert stats["solo"] == 0
+
+
+def test_endpoint_forms_teams_from_a_csv_roster(serve):
+    main, client = serve()
+    stored = main.store.row_count
+    p, intro, clubs = cohort(10)
+    roster = "student_id,introversion_extraversion,risk_taking,club_top1,weekly_hobby_hours\n" + "\n".join(
+        f"s{i},{int(intro[i])},3,{clubs[i] or 'Literary Club'},{i}" for i in range(10))
+    response = client.post("/teams?team_size=3", content=roster, headers={"Content-Type": "text/csv"}).json()
+
+    members = [member for team in response["teams"] for member in team["members"]]
+    assert len(response["teams"]) == 3 and len(response["solo"]) == 1
+    assert sorted(members + response["solo"]) == sorted(f"s{i}" for i in range(10))
+    assert set(response["balance"]) == {"team_probability_std", "introversion_std", "shared_club_pairs"}
+
+    assert client.post("/teams?team_size=1", json=[]).status_code == 422
+    assert client.post("/teams", json=[]).json()["teams"] == []
+    # Rosters are not stored as submissions
+    main.store.flush()
+    assert main.store.row_count == stored
@@ -0,0 +1,28 @@
+import json
+import os
+import subprocess
+import sys
+
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_path = os.path.join(os.path.dirname(app_dir), "model_notebook", "data.csv")
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def test_select_writes_a_valid_report_and_picks_the_best_candidate(tmp_path):
+    subprocess.run([sys.executable, os.path.join(app_dir, "train.py"), "--data", data_path,
+                    "--output-dir", str(tmp_path), "--select", "--folds", "2", "--no-cache"],
+                   check=True, capture_output=True, text=True)
+    with open(tmp_path / "model_selection.json") as f:
+        report = json.load(f, parse_constant=reject_constant)
+
+    neighbors = [candidate for candidate in report["candidates"] if candidate["estimator"] == "KNeighborsClassifier"]
+    # 73 rows leave about 27 per training fold; more neighbours than that cannot be fitted
+    assert all(candidate["params"]["n_neighbors"] <= report["train_rows"] // 2 for candidate in neighbors)
+    assert all(candidate["mean_score"] is not None for candidate in report["candidates"])
+
+    best = max(candidate["mean_score"] for candidate in report["candidates"] if candidate["eligible"])
+    assert report["winner"]["mean_score"] == best
+    assert os.path.exists(tmp_path / "model.pkl")
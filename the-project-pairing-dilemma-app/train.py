@@ -1,15 +1,25 @@
+import argparse
+import json
 import re
+import shutil
+import tempfile
+import time
 import warnings
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+import sklearn
+from sklearn.base import clone
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.neighbors import KNeighborsClassifier
 import joblib
 import os
+import sys
 
 warnings.filterwarnings("ignore")
 np.random.seed(42)
@@ -17,17 +27,62 @@ np.random.seed(42)
 # Define paths relative to the script's location
 app_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.join(app_dir, "backend")
-model_path = os.path.join(backend_dir, "model.pkl")
+
+parser = argparse.ArgumentParser(description="Train the teamwork preference model.")
+parser.add_argument("--format", choices=["csv", "columnar"], default="csv",
+                    help="submission store the backend will use (EDUPAIR_STORE_FORMAT)")
 # The original dataset is now in the root directory, one level above the-project-pairing-dilemma-app
-data_path = os.path.join(app_dir, "..", "data.csv")
+parser.add_argument("--data", default=os.path.join(app_dir, "..", "data.csv"), help="survey CSV to train on")
+parser.add_argument("--output-dir", default=backend_dir,
+                    help="where the model artifacts, registry and submission store are written")
+parser.add_argument("--select", action="store_true",
+                    help="cross-validate a grid of candidate models in parallel and keep the best one")
+parser.add_argument("--folds", type=int, default=5, help="stratified folds for --select")
+parser.add_argument("--jobs", type=int, default=-1, help="parallel fits for --select (-1 = every core)")
+parser.add_argument("--scoring", default="accuracy", help="sklearn scorer that ranks the --select candidates")
+parser.add_argument("--max-latency-ms", type=float,
+                    help="with --select, only candidates that score one row within this many ms can win")
+parser.add_argument("--report", help="JSON report written by --select (default: <output-dir>/model_selection.json)")
+parser.add_argument("--cache-dir", help="stage cache (default: <output-dir>/.cache/train)")
+parser.add_argument("--no-cache", action="store_true", help="recompute every stage")
+parser.add_argument("--reset-store", action="store_true",
+                    help="recreate the submission store from --data, dropping the collected submissions")
+parser.add_argument("--no-submissions", action="store_true",
+                    help="train on --data only, without the labeled submissions in labels.csv")
+args = parser.parse_args()
+
+output_dir = args.output_dir
+data_path = args.data
+model_path = os.path.join(output_dir, "model.pkl")
+# Parameters-only export served with EDUPAIR_MODEL_FORMAT=npz
+compiled_model_path = os.path.join(output_dir, "model.npz")
 # The new data file for the app
-new_data_path = os.path.join(backend_dir, "newdata.csv")
+new_data_path = os.path.join(output_dir, "newdata.csv")
+# The columnar submission store, used with --format columnar
+store_dir = os.path.join(output_dir, "submissions")
+
+# Create the output directory if it doesn't exist
+os.makedirs(output_dir, exist_ok=True)
+
+# The survey loader is shared with the backend and dashboard
+sys.path.insert(0, backend_dir)
+from loader import load_survey, read_header
+from columnar import migrate_csv
+from prediction_cache import model_fingerprint
+from registry import ModelRegistry
+from scoring import CompiledScorer, check_parity
+from stage_cache import StageCache, prefix_fingerprint
+from store import read_appended
 
-# Create backend directory if it doesn't exist
-os.makedirs(backend_dir, exist_ok=True)
+# Every stage is cached under a content hash of its inputs; reruns on
+# unchanged data load the results instead of recomputing them
+cache = StageCache(args.cache_dir or os.path.join(output_dir, ".cache", "train"), enabled=not args.no_cache)
+# Part of every stage key; bump it when the resolve/clean/fit logic below changes
+PIPELINE_VERSION = 1
 
-# Load data
-raw = pd.read_csv(data_path)
+# Only the header is needed to resolve columns; the data itself is read
+# once the required columns are known
+raw_columns = read_header(data_path)
 
 # --- Data processing and model training logic from the notebook ---
 
@@ -38,13 +93,7 @@ def _normalize(s: str) -> str:
     s = re.sub(r"_+", "_", s).strip("_")
     return s.lower()
 
-norm_cols = {c: _normalize(c) for c in raw.columns}
-norm_to_orig = {}
-for orig, norm in norm_cols.items():
-    norm_to_orig.setdefault(norm, orig)
-norm_list = list(norm_to_orig.keys())
-
-def find_col_by_keywords(keywords):
+def find_col_by_keywords(norm_list, keywords):
     candidates = []
     for col in norm_list:
         ok = True
@@ -64,39 +113,127 @@ def find_col_by_keywords(keywords):
     candidates.sort(key=len)
     return candidates[0]
 
-intro_col_norm = find_col_by_keywords(["introversion", "extraversion"])
-risk_col_norm = find_col_by_keywords(["risk", "taking"])
-weekly_col_norm = find_col_by_keywords(["weekly", "hobby", "hours"])
-club1_col_norm = find_col_by_keywords([["club"], ["top1", "top_1"]])
-teamwork_col_norm = find_col_by_keywords(["teamwork", "preference"])
+def resolve_columns(raw_columns):
+    """Map the survey's column names to the model's: file column -> canonical name."""
+    norm_to_orig = {}
+    for orig in raw_columns:
+        norm_to_orig.setdefault(_normalize(orig), orig)
+    norm_list = list(norm_to_orig.keys())
+
+    required_map = {
+        "introversion_extraversion": find_col_by_keywords(norm_list, ["introversion", "extraversion"]),
+        "risk_taking": find_col_by_keywords(norm_list, ["risk", "taking"]),
+        "weekly_hobby_hours": find_col_by_keywords(norm_list, ["weekly", "hobby", "hours"]),
+        "club_top1": find_col_by_keywords(norm_list, [["club"], ["top1", "top_1"]]),
+        "teamwork_preference": find_col_by_keywords(norm_list, ["teamwork", "preference"]),
+    }
+    return {norm_to_orig[v]: k for k, v in required_map.items()}
+
+TRAIN_COLUMNS = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1", "teamwork_preference"]
+
+def clean(df):
+    """Numeric scales, only rows with a clear preference, and the binary target."""
+    df = df[TRAIN_COLUMNS].copy()
+    for col in ["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "teamwork_preference"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df = df[df["teamwork_preference"].isin([1, 2, 4, 5])].copy()
+    df["teamwork_preference_bin"] = (df["teamwork_preference"] >= 4).astype(int)
+    return df
+
+rename_map = cache.run("resolve", cache.key("resolve", PIPELINE_VERSION, raw_columns),
+                       lambda: resolve_columns(raw_columns))
+data_digest = cache.file_digest(data_path)
+load_key = cache.key("load", PIPELINE_VERSION, data_digest, rename_map)
+clean_key = cache.key("clean", PIPELINE_VERSION, load_key)
+
+def load_data():
+    return cache.run("load", load_key, lambda: load_survey(data_path, columns=list(rename_map), rename=rename_map))
+
+def clean_data():
+    return cache.run("clean", clean_key, lambda: clean(load_data()))
+
+# --- Submission store ---
+
+store_path = store_dir if args.format == "columnar" else new_data_path
+# Students' own answers, written by the backend's POST /labels. The store's
+# /predict rows carry the model's own prediction as teamwork_preference, so
+# training on them would teach the model its own outputs.
+labels_path = os.path.join(output_dir, "labels.csv")
+
+def seed_store():
+    """Create the submission store from data.csv."""
+    if args.format == "columnar":
+        shutil.rmtree(store_dir, ignore_errors=True)
+        migrate_csv(data_path, store_dir)
+        print(f"Data migrated to the columnar store in {store_dir}")
+    else:
+        shutil.copy(data_path, new_data_path)
+        print(f"Data copied to {new_data_path}")
+
+def labels_fingerprint(position):
+    """Identity of labels.csv up to ``position``, or None once it no longer holds that much."""
+    if not os.path.exists(labels_path) or os.path.getsize(labels_path) < position:
+        return None
+    return prefix_fingerprint(labels_path, position)
+
+def merge_labels():
+    """Cleaned rows of labels.csv, and their cache key.
 
-required_map = {
-    "introversion_extraversion": intro_col_norm,
-    "risk_taking": risk_col_norm,
-    "weekly_hobby_hours": weekly_col_norm,
-    "club_top1": club1_col_norm,
-    "teamwork_preference": teamwork_col_norm,
-}
+    Only the rows appended since the previous run are read and cleaned; the
+    earlier ones come from the cache as long as the file still holds them.
+    """
+    state = cache.state("labels") if cache.enabled else None
+    previous = None
+    if (state and state["path"] == os.path.abspath(labels_path)
+            and labels_fingerprint(state["position"]) == state["fingerprint"]):
+        hit, previous = cache.load("labels", state["key"])
+    columns, position = read_appended(labels_path, TRAIN_COLUMNS, state["position"] if previous is not None else None)
+    frame = pd.DataFrame(columns, columns=TRAIN_COLUMNS)
+    frame["club_top1"] = frame["club_top1"].where(frame["club_top1"] != "", None)
+    if previous is not None and frame.empty:
+        print(f"labels: cached ({state['key']}, {len(previous)} rows)")
+        return previous, state["key"]
 
-rename_map = {norm_to_orig[v]: k for k, v in required_map.items()}
-df = raw.rename(columns=rename_map)[list(required_map.keys())].copy()
+    merged = clean(frame) if previous is None else pd.concat([previous, clean(frame)], ignore_index=True)
+    fingerprint = labels_fingerprint(position)
+    key = cache.key("labels", PIPELINE_VERSION, os.path.abspath(labels_path), position, fingerprint)
+    cache.save("labels", key, merged)
+    cache.set_state("labels", {"path": os.path.abspath(labels_path), "position": position,
+                               "fingerprint": fingerprint, "key": key})
+    print(f"labels: {len(frame)} new rows read, {len(merged)} usable rows in total")
+    return merged, key
 
-for col in ["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "teamwork_preference"]:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
+# The live store is created once; later runs keep it and the submissions it collected
+if args.reset_store or not os.path.exists(store_path):
+    seed_store()
+else:
+    print(f"Keeping the submission store at {store_path}")
 
-df = df[df["teamwork_preference"].isin([1, 2, 4, 5])].copy()
-df["teamwork_preference_bin"] = (df["teamwork_preference"] >= 4).astype(int)
+labels, labels_key = None, None
+if not args.no_submissions:
+    if os.path.exists(labels_path):
+        labels, labels_key = merge_labels()
+    else:
+        print(f"No labeled submissions yet ({labels_path} does not exist)")
 
 features = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours", "club_top1"]
 num_features = ["introversion_extraversion", "risk_taking", "weekly_hobby_hours"]
 cat_features = ["club_top1"]
 
-y = df["teamwork_preference_bin"].astype(int).values
-X = df[features].copy()
+def training_split():
+    """data.csv plus the labeled submissions, split 75/25."""
+    df = clean_data()
+    merged = len(labels) if labels is not None else 0
+    if merged:
+        df = pd.concat([df, labels], ignore_index=True)
+    print(f"Training on {len(df)} rows, {merged} of them labeled submissions")
 
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, test_size=0.25, random_state=42, stratify=y
-)
+    y = df["teamwork_preference_bin"].astype(int).values
+    # Plain float/object columns, as the backend feeds the pipeline at serving time
+    X = df[features].astype({**{col: "float64" for col in num_features}, "club_top1": object})
+
+    return train_test_split(X, y, test_size=0.25, random_state=42, stratify=y)
 
 numeric_transformer = Pipeline(steps=[
     ("imputer", SimpleImputer(strategy="median")),
@@ -120,13 +257,183 @@ final_model = Pipeline(steps=[
     ("model", LogisticRegression(max_iter=5000, solver="liblinear"))
 ])
 
-final_model.fit(X_train, y_train)
+# --- Model selection (--select) ---
 
-# Save the model
-joblib.dump(final_model, model_path)
-print(f"Model saved to {model_path}")
+def candidate_grid(fit_rows):
+    """Estimators and hyperparameters tried by --select, as GridSearchCV parameter grids.
 
-# Copy the original data.csv to newdata.csv in the backend folder to initialize it
-import shutil
-shutil.copy(data_path, new_data_path)
-print(f"Data copied to {new_data_path}")
+    ``fit_rows`` is the size of the smallest training fold; k-NN cannot use
+    more neighbours than that.
+    """
+    neighbors = sorted({min(k, fit_rows) for k in [15, 45]})
+    return [
+        {"model": [LogisticRegression(max_iter=5000, solver="liblinear")],
+         "model__C": [0.01, 0.1, 1.0, 10.0], "model__class_weight": [None, "balanced"]},
+        {"model": [RandomForestClassifier(n_estimators=200, random_state=42)],
+         "model__max_depth": [4, 8, None], "model__min_samples_leaf": [1, 5],
+         "model__class_weight": [None, "balanced"]},
+        {"model": [HistGradientBoostingClassifier(random_state=42)],
+         "model__learning_rate": [0.05, 0.1], "model__max_depth": [3, None]},
+        {"model": [KNeighborsClassifier()], "model__n_neighbors": neighbors},
+    ]
+
+def candidate_name(params):
+    estimator = type(params["model"]).__name__
+    settings = ", ".join(f"{key.split('__', 1)[1]}={value}" for key, value in params.items() if key != "model")
+    return f"{estimator}({settings})"
+
+def fit_candidate(pipeline, params, X, y):
+    """The candidate fitted on X, or None if it cannot be fitted."""
+    try:
+        return clone(pipeline).set_params(**params).fit(X, y)
+    except Exception as e:
+        print(f"Skipping {candidate_name(params)}: {e}")
+        return None
+
+def finite(value):
+    # NaN and inf are not valid JSON; the report writes them as null
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+def predict_latency_ms(model, row, repeats=200, budget=0.2):
+    """Median time to score one row, as the backend's /predict does, over ``repeats`` calls or ``budget`` seconds."""
+    model.predict_proba(row)
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeats and (len(samples) < 5 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        model.predict_proba(row)
+        samples.append(time.perf_counter() - started)
+    return float(np.median(samples)) * 1000
+
+def select_model(pipeline, X_train, y_train, X_test, y_test):
+    """Cross-validate every candidate, time it, and return (winner fitted on X_train, report)."""
+    cache_dir = tempfile.mkdtemp(prefix="edupair-select-")
+    try:
+        # The ColumnTransformer does not depend on the candidate: with a memory
+        # it is fitted once per fold (and once on X_train) and then loaded
+        # from the cache, across the parallel workers too. A dense output lets
+        # every estimator take it.
+        pipeline = clone(pipeline).set_params(memory=joblib.Memory(cache_dir, verbose=0),
+                                              preprocess__sparse_threshold=0.0)
+        cv = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42)
+        fit_rows = min(len(train) for train, _ in cv.split(X_train, y_train))
+        # A candidate that fails in a fold scores NaN there and cannot win
+        search = GridSearchCV(pipeline, candidate_grid(fit_rows), scoring=args.scoring, n_jobs=args.jobs,
+                              refit=False, cv=cv, error_score=np.nan)
+        started = time.perf_counter()
+        search.fit(X_train, y_train)
+        search_seconds = time.perf_counter() - started
+
+        results = search.cv_results_
+        candidates = results["params"]
+        # Refit every candidate on the whole training split to time it as it would be served
+        fitted = joblib.Parallel(n_jobs=args.jobs)(
+            joblib.delayed(fit_candidate)(pipeline, params, X_train, y_train) for params in candidates)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    row = X_test.iloc[:1]
+    fold_rows = len(X_train) / args.folds
+    report = []
+    for i, (params, model) in enumerate(zip(candidates, fitted)):
+        mean_score = finite(results["mean_test_score"][i])
+        latency = predict_latency_ms(model, row) if model is not None else None
+        report.append({
+            "name": candidate_name(params),
+            "estimator": type(params["model"]).__name__,
+            "params": {key.split("__", 1)[1]: value for key, value in params.items() if key != "model"},
+            "mean_score": mean_score,
+            "std_score": finite(results["std_test_score"][i]),
+            "rank": int(results["rank_test_score"][i]),
+            "mean_fit_seconds": float(results["mean_fit_time"][i]),
+            "batch_predict_us_per_row": float(results["mean_score_time"][i]) / fold_rows * 1e6,
+            "predict_latency_ms": latency,
+            "eligible": (mean_score is not None and latency is not None
+                         and (args.max_latency_ms is None or latency <= args.max_latency_ms)),
+        })
+
+    eligible = [i for i, candidate in enumerate(report) if candidate["eligible"]]
+    if not eligible:
+        raise SystemExit(f"No candidate fits every fold and scores a row within {args.max_latency_ms} ms")
+    best = max(eligible, key=lambda i: (report[i]["mean_score"], -report[i]["predict_latency_ms"]))
+    winner = fitted[best].set_params(memory=None)
+    summary = {
+        "scoring": args.scoring,
+        "folds": args.folds,
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "search_seconds": search_seconds,
+        "max_latency_ms": args.max_latency_ms,
+        "winner": {**report[best], "test_score": float(search.scorer_(winner, X_test, y_test))},
+        "candidates": sorted(report, key=lambda candidate: candidate["rank"]),
+    }
+    return winner, summary
+
+def fit():
+    X_train, X_test, y_train, y_test = training_split()
+    if args.select:
+        model, selection = select_model(final_model, X_train, y_train, X_test, y_test)
+    else:
+        model, selection = clone(final_model).fit(X_train, y_train), None
+    return {"model": model, "selection": selection, "test_accuracy": float(model.score(X_test, y_test))}
+
+# Everything besides the data that decides which model comes out
+fit_config = {"select": args.select, "folds": args.folds, "scoring": args.scoring,
+              "max_latency_ms": args.max_latency_ms, "sklearn_version": sklearn.__version__}
+fit_key = cache.key("fit", PIPELINE_VERSION, clean_key, labels_key, fit_config)
+fitted = cache.run("fit", fit_key, fit)
+final_model, selection = fitted["model"], fitted["selection"]
+
+if selection is not None:
+    report_path = args.report or os.path.join(output_dir, "model_selection.json")
+    with open(report_path, "w") as f:
+        json.dump(selection, f, indent=2, allow_nan=False)
+    print(f"Selected {selection['winner']['name']}: cv {args.scoring} {selection['winner']['mean_score']:.3f}, "
+          f"test {selection['winner']['test_score']:.3f}, {selection['winner']['predict_latency_ms']:.2f} ms/row")
+    print(f"Model selection report saved to {report_path}")
+
+# The artifacts are rewritten only when the fitted model changed or they were modified
+export_key = cache.key("export", fit_key)
+exported = cache.state("export") if cache.enabled else None
+if (exported and exported["key"] == export_key
+        and all(os.path.exists(path) and cache.file_digest(path) == exported["digests"][kind]
+                for kind, path in exported["artifacts"].items())):
+    artifacts = exported["artifacts"]
+    print(f"export: cached ({export_key})")
+else:
+    # Save the model
+    joblib.dump(final_model, model_path)
+    print(f"Model saved to {model_path}")
+
+    # Export the fitted parameters; the backend can serve them with NumPy alone
+    artifacts = {"pipeline": model_path}
+    try:
+        compiled = CompiledScorer.from_pipeline(final_model)
+        check_parity(final_model, compiled)
+    except ValueError as e:
+        # Only linear models compile; others are served through the pipeline
+        print(f"No compiled export for this model: {e}")
+        if os.path.exists(compiled_model_path):
+            os.remove(compiled_model_path)
+    else:
+        compiled.save(compiled_model_path, sklearn_version=sklearn.__version__, source=os.path.basename(model_path))
+        artifacts["compiled"] = compiled_model_path
+        print(f"Compiled model saved to {compiled_model_path}")
+    cache.set_state("export", {"key": export_key, "artifacts": artifacts,
+                               "digests": {kind: cache.file_digest(path) for kind, path in artifacts.items()}})
+
+# Publish both as the next registry version; a running backend swaps it in
+# through its watcher or POST /admin/reload
+registry = ModelRegistry(os.path.join(output_dir, "models"))
+current = registry.entry()
+fingerprints = {kind: model_fingerprint(path) for kind, path in artifacts.items()}
+if current is not None and current.get("fingerprints") == fingerprints:
+    print(f"Model unchanged; {current['version']} stays current")
+else:
+    metadata = {"sklearn_version": sklearn.__version__, "test_accuracy": fitted["test_accuracy"]}
+    if selection is not None:
+        metadata["selection"] = {"name": selection["winner"]["name"], "cv_score": selection["winner"]["mean_score"],
+                                 "scoring": args.scoring}
+    entry = registry.publish(artifacts, metadata=metadata)
+    print(f"Model registered as {entry['version']}")